@@ -1,935 +1,4137 @@
-from flask import Flask, render_template_string, request, send_file, redirect, url_for
-import pandas as pd
-from fpdf import FPDF
-import io
-import os
-import json
-from datetime import datetime
-import secrets
-
-app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
-
-# Configuration
-CONFIG_FILE = "schools_config.json"
-DATA_DIR = "school_data"
-
-# Ensure directories exist
-os.makedirs(DATA_DIR, exist_ok=True)
-
-# Class-wise subjects mapping
-SUBJECTS_MAPPING = {
-    "Nursery": ["Math", "English", "Hindi"],
-    "LKG": ["Math", "English", "Hindi"], 
-    "UKG": ["Math", "English", "Hindi"],
-    "I": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
-    "II": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
-    "III": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
-    "IV": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
-    "V": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
-    "VI": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
-    "VII": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
-    "VIII": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
-    "IX": ["Math", "English", "Hindi", "Science", "Sanskrit", "SST"],
-    "X": ["Math", "English", "Hindi", "Science", "Sanskrit", "SST"],
-    "XI": ["Math", "English", "Hindi", "Bio", "Physics", "Chemistry", "Sanskrit", "SST"],
-    "XII": ["Math", "English", "Hindi", "Bio", "Physics", "Chemistry", "Sanskrit", "SST"]
-}
-
-# HTML Templates
-INDEX_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>School Result Portal</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh; padding: 20px;
-        }
-        .container { 
-            max-width: 800px; margin: 0 auto; background: white;
-            padding: 40px; border-radius: 20px; box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }
-        h1 { 
-            text-align: center; margin-bottom: 10px; font-size: 36px;
-            background: linear-gradient(45deg, #667eea, #764ba2);
-            -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-        }
-        .subtitle { text-align: center; color: #666; margin-bottom: 40px; font-size: 18px; }
-        .card { 
-            background: #f8f9fa; padding: 30px; border-radius: 15px; 
-            margin: 20px 0; border-left: 5px solid #667eea;
-        }
-        .btn { 
-            display: block; width: 100%; padding: 15px; text-align: center;
-            background: linear-gradient(45deg, #667eea, #764ba2); color: white;
-            text-decoration: none; border-radius: 10px; font-size: 18px;
-            font-weight: 600; margin: 10px 0; transition: all 0.3s ease;
-        }
-        .btn:hover { transform: translateY(-3px); box-shadow: 0 10px 20px rgba(102,126,234,0.3); }
-        .btn-school { background: linear-gradient(45deg, #27ae60, #2ecc71); }
-        .btn-student { background: linear-gradient(45deg, #e74c3c, #e67e22); }
-        .school-list { margin: 20px 0; }
-        .school-item { 
-            padding: 15px; margin: 10px 0; background: white; 
-            border-radius: 10px; border-left: 4px solid #3498db;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🎓 School Result Portal</h1>
-        <div class="subtitle">Multi-School Platform - Student Results & Management</div>
-        
-        <div class="card">
-            <h2>🏫 For Schools</h2>
-            <p>Register your school and upload student results</p>
-            <a href="/school_admin" class="btn btn-school">📊 School Administration</a>
-        </div>
-
-        <div class="card">
-            <h2>👨‍🎓 For Students</h2>
-            <p>Check your result by selecting school and academic year</p>
-            <a href="/student_login" class="btn btn-student">📝 Check My Result</a>
-        </div>
-
-        {% if schools %}
-        <div class="card">
-            <h3>🏆 Registered Schools</h3>
-            <div class="school-list">
-                {% for school in schools %}
-                <div class="school-item">
-                    <strong>{{ school.name }}</strong><br>
-                    <small>ID: {{ school.id }} | Students: {{ school.student_count }}</small>
-                </div>
-                {% endfor %}
-            </div>
-        </div>
-        {% endif %}
-    </div>
-</body>
-</html>
-'''
-
-SCHOOL_ADMIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>School Administration</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh; padding: 20px;
-        }
-        .container { 
-            max-width: 900px; margin: 0 auto; background: white;
-            padding: 40px; border-radius: 20px; box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }
-        h1 { 
-            text-align: center; margin-bottom: 10px; font-size: 32px;
-            background: linear-gradient(45deg, #667eea, #764ba2);
-            -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-        }
-        .form-group { margin: 20px 0; }
-        label { display: block; margin-bottom: 8px; font-weight: 600; color: #555; }
-        input, select { 
-            width: 100%; padding: 12px; border: 2px solid #ddd; border-radius: 8px;
-            font-size: 16px; margin-bottom: 10px;
-        }
-        .btn { 
-            padding: 15px 30px; background: linear-gradient(45deg, #27ae60, #2ecc71);
-            color: white; border: none; border-radius: 10px; cursor: pointer;
-            font-size: 16px; font-weight: 600; margin: 10px 5px;
-        }
-        .btn-upload { background: linear-gradient(45deg, #3498db, #2980b9); }
-        .success { background: #d4edda; color: #155724; padding: 15px; border-radius: 8px; margin: 15px 0; }
-        .error { background: #f8d7da; color: #721c24; padding: 15px; border-radius: 8px; margin: 15px 0; }
-        .tabs { display: flex; margin: 20px 0; }
-        .tab { padding: 15px 20px; background: #f8f9fa; margin-right: 5px; cursor: pointer; border-radius: 8px 8px 0 0; }
-        .tab.active { background: #3498db; color: white; }
-        .tab-content { display: none; padding: 20px; background: #f8f9fa; border-radius: 0 8px 8px 8px; }
-        .tab-content.active { display: block; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🏫 School Administration Panel</h1>
-        <a href="/" style="padding: 10px 15px; background: #95a5a6; color: white; text-decoration: none; border-radius: 5px; margin-bottom: 20px; display: inline-block;">← Back to Home</a>
-        
-        <div class="tabs">
-            <div class="tab active" onclick="showTab('register')">📝 Register School</div>
-            <div class="tab" onclick="showTab('upload')">📤 Upload Results</div>
-            <div class="tab" onclick="showTab('manage')">⚙️ Manage Schools</div>
-        </div>
-
-        <div id="register" class="tab-content active">
-            <h3>Register New School</h3>
-            <form method="POST" action="/register_school">
-                <div class="form-group">
-                    <label>School Name:</label>
-                    <input type="text" name="school_name" required placeholder="Enter school name">
-                </div>
-                <div class="form-group">
-                    <label>School ID (Unique):</label>
-                    <input type="text" name="school_id" required placeholder="e.g., S001, DPS001">
-                </div>
-                <div class="form-group">
-                    <label>Contact Email:</label>
-                    <input type="email" name="contact_email" placeholder="school@email.com">
-                </div>
-                <button type="submit" class="btn">🏫 Register School</button>
-            </form>
-        </div>
-
-        <div id="upload" class="tab-content">
-            <h3>Upload Student Results</h3>
-            <form method="POST" action="/upload_results" enctype="multipart/form-data">
-                <div class="form-group">
-                    <label>Select School:</label>
-                    <select name="school_id" required>
-                        <option value="">-- Select School --</option>
-                        {% for school in schools %}
-                        <option value="{{ school.id }}">{{ school.name }} ({{ school.id }})</option>
-                        {% endfor %}
-                    </select>
-                </div>
-                <div class="form-group">
-                    <label>Academic Year:</label>
-                    <select name="academic_year" required>
-                        <option value="2024-25">2024-25</option>
-                        <option value="2023-24">2023-24</option>
-                        <option value="2025-26">2025-26</option>
-                    </select>
-                </div>
-                <div class="form-group">
-                    <label>Term:</label>
-                    <select name="term" required>
-                        <option value="1st_term">1st Term</option>
-                        <option value="2nd_term">2nd Term</option>
-                    </select>
-                </div>
-                <div class="form-group">
-                    <label>Upload Excel File:</label>
-                    <input type="file" name="excel_file" accept=".xlsx,.xls" required>
-                </div>
-                <button type="submit" class="btn btn-upload">📤 Upload Results</button>
-            </form>
-        </div>
-
-        <div id="manage" class="tab-content">
-            <h3>Manage Schools</h3>
-            {% if schools %}
-                {% for school in schools %}
-                <div style="background: white; padding: 15px; margin: 10px 0; border-radius: 8px;">
-                    <strong>{{ school.name }}</strong> ({{ school.id }})<br>
-                    <small>Registered: {{ school.registered_date }}</small><br>
-                    <a href="/delete_school/{{ school.id }}" style="color: red; text-decoration: none;">🗑️ Delete</a>
-                </div>
-                {% endfor %}
-            {% else %}
-                <p>No schools registered yet.</p>
-            {% endif %}
-        </div>
-
-        {% if message %}
-        <div class="{{ 'success' if message_type == 'success' else 'error' }}">{{ message }}</div>
-        {% endif %}
-    </div>
-
-    <script>
-        function showTab(tabName) {
-            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
-            event.currentTarget.classList.add('active');
-            document.getElementById(tabName).classList.add('active');
-        }
-    </script>
-</body>
-</html>
-'''
-
-STUDENT_LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Student Result Portal</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh; padding: 20px;
-        }
-        .container { 
-            max-width: 600px; margin: 0 auto; background: white;
-            padding: 40px; border-radius: 20px; box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }
-        h1 { 
-            text-align: center; margin-bottom: 10px; font-size: 32px;
-            background: linear-gradient(45deg, #667eea, #764ba2);
-            -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-        }
-        .form-group { margin: 20px 0; }
-        label { display: block; margin-bottom: 8px; font-weight: 600; color: #555; }
-        input, select { 
-            width: 100%; padding: 12px; border: 2px solid #ddd; border-radius: 8px;
-            font-size: 16px; margin-bottom: 10px;
-        }
-        .btn { 
-            padding: 15px 30px; background: linear-gradient(45deg, #e74c3c, #e67e22);
-            color: white; border: none; border-radius: 10px; cursor: pointer;
-            font-size: 16px; font-weight: 600; width: 100%;
-        }
-        .error { background: #f8d7da; color: #721c24; padding: 15px; border-radius: 8px; margin: 15px 0; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>👨‍🎓 Student Result Portal</h1>
-        <p style="text-align: center; color: #666; margin-bottom: 30px;">Check your academic performance</p>
-        <a href="/" style="padding: 10px 15px; background: #95a5a6; color: white; text-decoration: none; border-radius: 5px; margin-bottom: 20px; display: inline-block;">← Back to Home</a>
-        
-        <form method="POST" action="/student_result">
-            <div class="form-group">
-                <label>Select Your School:</label>
-                <select name="school_id" required>
-                    <option value="">-- Select School --</option>
-                    {% for school in schools %}
-                    <option value="{{ school.id }}">{{ school.name }}</option>
-                    {% endfor %}
-                </select>
-            </div>
-            
-            <div class="form-group">
-                <label>Academic Year:</label>
-                <select name="academic_year" required>
-                    <option value="2024-25">2024-25</option>
-                    <option value="2023-24">2023-24</option>
-                    <option value="2025-26">2025-26</option>
-                </select>
-            </div>
-            
-            <div class="form-group">
-                <label>Enter Your Roll Number:</label>
-                <input type="text" name="roll_number" required placeholder="e.g., 101, 205, 301">
-            </div>
-            
-            <button type="submit" class="btn">🔍 Get My Result</button>
-        </form>
-
-        {% if error %}
-        <div class="error">{{ error }}</div>
-        {% endif %}
-    </div>
-</body>
-</html>
-'''
-
-STUDENT_RESULT_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Student Result</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh; padding: 20px;
-        }
-        .container { 
-            max-width: 1000px; margin: 0 auto; background: white;
-            padding: 30px; border-radius: 20px; box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }
-        .header { 
-            text-align: center; margin-bottom: 30px; padding: 20px;
-            background: linear-gradient(45deg, #667eea, #764ba2); color: white;
-            border-radius: 15px;
-        }
-        table { 
-            width: 100%; border-collapse: collapse; margin: 20px 0;
-            background: white; border-radius: 10px; overflow: hidden;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        }
-        th, td { border: 1px solid #e0e0e0; padding: 12px 15px; text-align: left; }
-        th { background: #34495e; color: white; font-weight: 600; }
-        .btn { 
-            padding: 12px 25px; background: linear-gradient(45deg, #27ae60, #2ecc71);
-            color: white; border: none; border-radius: 8px; cursor: pointer;
-            font-size: 16px; font-weight: 600; margin: 10px 5px; text-decoration: none;
-            display: inline-block;
-        }
-        .performance-summary { 
-            background: #f8f9fa; padding: 20px; border-radius: 10px; 
-            margin: 20px 0; border-left: 4px solid #3498db;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎓 Academic Report Card</h1>
-            <h3>{{ school_name }} - {{ academic_year }}</h3>
-        </div>
-
-        <div style="background: #f8f9fa; padding: 20px; border-radius: 10px; margin: 20px 0;">
-            <p><strong>Student Name:</strong> {{ student_data.name }}</p>
-            <p><strong>Roll Number:</strong> {{ student_data.roll }}</p>
-            <p><strong>Class:</strong> {{ student_data.class }}</p>
-            <p><strong>Academic Year:</strong> {{ academic_year }}</p>
-        </div>
-
-        <h3>📊 Academic Performance</h3>
-        <table>
-            <tr>
-                <th>Subject</th>
-                <th>1st Term</th>
-                <th>2nd Term</th>
-                <th>Total</th>
-            </tr>
-            {% for subject, marks in student_data.subjects.items() %}
-            <tr>
-                <td>{{ subject }}</td>
-                <td>{{ marks.term1 }}</td>
-                <td>{{ marks.term2 }}</td>
-                <td><strong>{{ marks.total }}</strong></td>
-            </tr>
-            {% endfor %}
-            <tr style="background: #f8f9fa; font-weight: bold;">
-                <td>🎯 Grand Total</td>
-                <td>{{ student_data.total1 }}</td>
-                <td>{{ student_data.total2 }}</td>
-                <td>{{ student_data.total1 + student_data.total2 }}</td>
-            </tr>
-        </table>
-
-        <div class="performance-summary">
-            <h3>📈 Performance Summary</h3>
-            <table>
-                <tr><td>1st Term Percentage</td><td><strong style="color: #667eea;">{{ student_data.percent1 }}%</strong></td></tr>
-                <tr><td>2nd Term Percentage</td><td><strong style="color: #667eea;">{{ student_data.percent2 }}%</strong></td></tr>
-                <tr><td>Combined Annual Percentage</td><td><strong style="color: #27ae60; font-size: 18px;">{{ student_data.combined_percent }}%</strong></td></tr>
-            </table>
-        </div>
-
-        <div style="text-align: center; margin: 30px 0;">
-            <form method="POST" action="/download_result_pdf" style="display: inline;">
-                <input type="hidden" name="school_id" value="{{ school_id }}">
-                <input type="hidden" name="academic_year" value="{{ academic_year }}">
-                <input type="hidden" name="roll_number" value="{{ student_data.roll }}">
-                <button type="submit" class="btn">📥 Download PDF Report</button>
-            </form>
-            <a href="/student_login" class="btn" style="background: linear-gradient(45deg, #3498db, #2980b9);">🔍 Check Another Result</a>
-            <a href="/" class="btn" style="background: linear-gradient(45deg, #95a5a6, #7f8c8d);">🏠 Home</a>
-        </div>
-    </div>
-</body>
-</html>
-'''
-
-# Utility Functions
-def load_schools_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    return []
-
-def save_schools_config(schools):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(schools, f, indent=2)
-
-def get_school_folder(school_id, academic_year):
-    return os.path.join(DATA_DIR, school_id, academic_year)
-
-def calculate_student_result(student1, student2, subjects_list):
-    """Calculate student result from both terms"""
-    subjects_data = {}
-    total_term1 = 0
-    total_term2 = 0
-    valid_subjects_count = 0
-    
-    for subject in subjects_list:
-        term1_mark = 0
-        term2_mark = 0
-        
-        if not student1.empty and subject in student1.columns:
-            try:
-                term1_mark = float(student1[subject].iloc[0])
-                if pd.isna(term1_mark):
-                    term1_mark = 0
-            except:
-                term1_mark = 0
-        
-        if not student2.empty and subject in student2.columns:
-            try:
-                term2_mark = float(student2[subject].iloc[0])
-                if pd.isna(term2_mark):
-                    term2_mark = 0
-            except:
-                term2_mark = 0
-        
-        if term1_mark > 0 or term2_mark > 0:
-            subjects_data[subject] = {
-                'term1': term1_mark,
-                'term2': term2_mark,
-                'total': term1_mark + term2_mark
-            }
-            total_term1 += term1_mark
-            total_term2 += term2_mark
-            valid_subjects_count += 1
-    
-    # Calculate percentages
-    max_marks_term1 = valid_subjects_count * 20
-    max_marks_term2 = valid_subjects_count * 20
-    max_marks_combined = valid_subjects_count * 40
-    
-    percent1 = round((total_term1 / max_marks_term1) * 100, 2) if max_marks_term1 > 0 else 0
-    percent2 = round((total_term2 / max_marks_term2) * 100, 2) if max_marks_term2 > 0 else 0
-    combined_percent = round(((total_term1 + total_term2) / max_marks_combined) * 100, 2) if max_marks_combined > 0 else 0
-    
-    return {
-        'subjects': subjects_data,
-        'total1': total_term1,
-        'total2': total_term2,
-        'percent1': percent1,
-        'percent2': percent2,
-        'combined_percent': combined_percent
-    }
-
-def create_pdf_report(student_data, school_name, academic_year):
-    """Create professional PDF report"""
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Header
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'SCHOOL REPORT CARD', 0, 1, 'C')
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, school_name, 0, 1, 'C')
-    pdf.cell(0, 10, f'Academic Year: {academic_year}', 0, 1, 'C')
-    pdf.ln(5)
-    
-    # Student Details
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'Student Information:', 0, 1)
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 8, f"Name: {student_data['name']}", 0, 1)
-    pdf.cell(0, 8, f"Roll No: {student_data['roll']}", 0, 1)
-    pdf.cell(0, 8, f"Class: {student_data['class']}", 0, 1)
-    pdf.ln(5)
-    
-    # Marks Table
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(80, 10, 'Subject', 1, 0, 'C')
-    pdf.cell(35, 10, '1st Term', 1, 0, 'C')
-    pdf.cell(35, 10, '2nd Term', 1, 0, 'C')
-    pdf.cell(35, 10, 'Total', 1, 1, 'C')
-    
-    pdf.set_font('Arial', '', 12)
-    for subject, marks in student_data['subjects'].items():
-        pdf.cell(80, 10, subject, 1, 0)
-        pdf.cell(35, 10, str(marks['term1']), 1, 0, 'C')
-        pdf.cell(35, 10, str(marks['term2']), 1, 0, 'C')
-        pdf.cell(35, 10, str(marks['total']), 1, 1, 'C')
-    
-    # Totals
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(80, 10, 'TOTAL', 1, 0)
-    pdf.cell(35, 10, str(student_data['total1']), 1, 0, 'C')
-    pdf.cell(35, 10, str(student_data['total2']), 1, 0, 'C')
-    pdf.cell(35, 10, str(student_data['total1'] + student_data['total2']), 1, 1, 'C')
-    
-    pdf.ln(5)
-    
-    # Performance Summary
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Performance Summary:', 0, 1)
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 8, f"1st Term Percentage: {student_data['percent1']}%", 0, 1)
-    pdf.cell(0, 8, f"2nd Term Percentage: {student_data['percent2']}%", 0, 1)
-    pdf.cell(0, 8, f"Combined Percentage: {student_data['combined_percent']}%", 0, 1)
-    
-    # Footer
-    pdf.ln(15)
-    pdf.cell(0, 8, "Principal Signature: ___________________", 0, 1)
-    pdf.cell(0, 8, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", 0, 1)
-    
-    return pdf
-
-# Routes
-@app.route('/')
-def index():
-    schools = load_schools_config()
-    return render_template_string(INDEX_TEMPLATE, schools=schools)
-
-@app.route('/school_admin')
-def school_admin():
-    schools = load_schools_config()
-    return render_template_string(SCHOOL_ADMIN_TEMPLATE, schools=schools)
-
-@app.route('/student_login')
-def student_login():
-    schools = load_schools_config()
-    return render_template_string(STUDENT_LOGIN_TEMPLATE, schools=schools)
-
-@app.route('/register_school', methods=['POST'])
-def register_school():
-    school_name = request.form.get('school_name')
-    school_id = request.form.get('school_id')
-    contact_email = request.form.get('contact_email', '')
-    
-    schools = load_schools_config()
-    
-    # Check if school ID already exists
-    if any(school['id'] == school_id for school in schools):
-        return render_template_string(SCHOOL_ADMIN_TEMPLATE, 
-                                   schools=load_schools_config(),
-                                   message="School ID already exists!",
-                                   message_type="error")
-    
-    # Add new school
-    new_school = {
-        'id': school_id,
-        'name': school_name,
-        'email': contact_email,
-        'registered_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'student_count': 0
-    }
-    
-    schools.append(new_school)
-    save_schools_config(schools)
-    
-    # Create school directory
-    os.makedirs(os.path.join(DATA_DIR, school_id), exist_ok=True)
-    
-    return render_template_string(SCHOOL_ADMIN_TEMPLATE, 
-                               schools=load_schools_config(),
-                               message=f"School '{school_name}' registered successfully!",
-                               message_type="success")
-
-@app.route('/upload_results', methods=['POST'])
-def upload_results():
-    if 'excel_file' not in request.files:
-        return render_template_string(SCHOOL_ADMIN_TEMPLATE,
-                                   schools=load_schools_config(),
-                                   message="No file selected!",
-                                   message_type="error")
-    
-    file = request.files['excel_file']
-    school_id = request.form.get('school_id')
-    academic_year = request.form.get('academic_year')
-    term = request.form.get('term')
-    
-    if file.filename == '':
-        return render_template_string(SCHOOL_ADMIN_TEMPLATE,
-                                   schools=load_schools_config(),
-                                   message="No file selected!",
-                                   message_type="error")
-    
-    try:
-        # Save the file
-        school_folder = get_school_folder(school_id, academic_year)
-        os.makedirs(school_folder, exist_ok=True)
-        
-        filename = f"{term}.xlsx"
-        file_path = os.path.join(school_folder, filename)
-        file.save(file_path)
-        
-        # Update student count
-        schools = load_schools_config()
-        for school in schools:
-            if school['id'] == school_id:
-                df = pd.read_excel(file_path)
-                school['student_count'] = len(df)
-                break
-        save_schools_config(schools)
-        
-        return render_template_string(SCHOOL_ADMIN_TEMPLATE,
-                                   schools=load_schools_config(),
-                                   message=f"Results uploaded successfully! Students: {len(df)}",
-                                   message_type="success")
-    
-    except Exception as e:
-        return render_template_string(SCHOOL_ADMIN_TEMPLATE,
-                                   schools=load_schools_config(),
-                                   message=f"Error uploading file: {str(e)}",
-                                   message_type="error")
-
-@app.route('/student_result', methods=['POST'])
-def student_result():
-    school_id = request.form.get('school_id')
-    academic_year = request.form.get('academic_year')
-    roll_number = request.form.get('roll_number')
-    
-    try:
-        school_folder = get_school_folder(school_id, academic_year)
-        term1_file = os.path.join(school_folder, "1st_term.xlsx")
-        term2_file = os.path.join(school_folder, "2nd_term.xlsx")
-        
-        if not os.path.exists(term1_file) or not os.path.exists(term2_file):
-            return render_template_string(STUDENT_LOGIN_TEMPLATE,
-                                       schools=load_schools_config(),
-                                       error="Result data not available for selected school and year")
-        
-        df1 = pd.read_excel(term1_file)
-        df2 = pd.read_excel(term2_file)
-        
-        df1['Roll #'] = df1['Roll #'].astype(str)
-        df2['Roll #'] = df2['Roll #'].astype(str)
-        
-        student1 = df1[df1['Roll #'] == roll_number]
-        student2 = df2[df2['Roll #'] == roll_number]
-        
-        if student1.empty and student2.empty:
-            return render_template_string(STUDENT_LOGIN_TEMPLATE,
-                                       schools=load_schools_config(),
-                                       error="Roll number not found")
-        
-        student_row = student1 if not student1.empty else student2
-        name = student_row['Student Name'].iloc[0]
-        student_class = str(student_row['Class'].iloc[0])
-        
-        # Get subjects based on class
-        if student_class in SUBJECTS_MAPPING:
-            subjects_list = SUBJECTS_MAPPING[student_class]
-        else:
-            metadata_cols = ['Roll #', 'Student Name', 'Class', 'Sec']
-            subjects_list = [col for col in df1.columns if col not in metadata_cols]
-        
-        # Calculate complete result
-        result_data = calculate_student_result(student1, student2, subjects_list)
-        result_data.update({
-            'name': name,
-            'roll': roll_number,
-            'class': student_class
-        })
-        
-        # Get school name
-        schools = load_schools_config()
-        school_name = next((s['name'] for s in schools if s['id'] == school_id), "Unknown School")
-        
-        return render_template_string(STUDENT_RESULT_TEMPLATE,
-                                   student_data=result_data,
-                                   school_name=school_name,
-                                   school_id=school_id,
-                                   academic_year=academic_year)
-        
-    except Exception as e:
-        return render_template_string(STUDENT_LOGIN_TEMPLATE,
-                                   schools=load_schools_config(),
-                                   error=f"Error processing result: {str(e)}")
-
-@app.route('/download_result_pdf', methods=['POST'])
-def download_result_pdf():
-    school_id = request.form.get('school_id')
-    academic_year = request.form.get('academic_year')
-    roll_number = request.form.get('roll_number')
-    
-    try:
-        # Get student data
-        school_folder = get_school_folder(school_id, academic_year)
-        term1_file = os.path.join(school_folder, "1st_term.xlsx")
-        term2_file = os.path.join(school_folder, "2nd_term.xlsx")
-        
-        df1 = pd.read_excel(term1_file)
-        df2 = pd.read_excel(term2_file)
-        
-        df1@app.route('/download_result_pdf', methods=['POST'])
-def download_result_pdf():
-    school_id = request.form.get('school_id')
-    academic_year = request.form.get('academic_year')
-    roll_number = request.form.get('roll_number')
-    
-    try:
-        # Get student data
-        school_folder = get_school_folder(school_id, academic_year)
-        term1_file = os.path.join(school_folder, "1st_term.xlsx")
-        term2_file = os.path.join(school_folder, "2nd_term.xlsx")
-        
-        df1 = pd.read_excel(term1_file)
-        df2 = pd.read_excel(term2_file)
-        
-        df1['Roll #'] = df1['Roll #'].astype(str)
-        df2['Roll #'] = df2['Roll #'].astype(str)
-        
-        student1 = df1[df1['Roll #'] == roll_number]
-        student2 = df2[df2['Roll #'] == roll_number]
-        
-        if student1.empty and student2.empty:
-            return "Student data not found", 404
-        
-        student_row = student1 if not student1.empty else student2
-        name = student_row['Student Name'].iloc[0]
-        student_class = str(student_row['Class'].iloc[0])
-        
-        # Get subjects based on class
-        if student_class in SUBJECTS_MAPPING:
-            subjects_list = SUBJECTS_MAPPING[student_class]
-        else:
-            metadata_cols = ['Roll #', 'Student Name', 'Class', 'Sec']
-            subjects_list = [col for col in df1.columns if col not in metadata_cols]
-        
-        # Calculate result
-        result_data = calculate_student_result(student1, student2, subjects_list)
-        result_data.update({
-            'name': name,
-            'roll': roll_number,
-            'class': student_class
-        })
-        
-        # Get school name
-        schools = load_schools_config()
-        school_name = next((s['name'] for s in schools if s['id'] == school_id), "Unknown School")
-        
-        # Create PDF
-        pdf = create_pdf_report(result_data, school_name, academic_year)
-        
-        # Save to bytes buffer
-        pdf_buffer = io.BytesIO()
-        pdf_output = pdf.output(dest='S').encode('latin-1')
-        pdf_buffer.write(pdf_output)
-        pdf_buffer.seek(0)
-        
-        filename = f"ReportCard_{school_id}_{roll_number}_{academic_year}.pdf"
-        return send_file(pdf_buffer, as_attachment=True, download_name=filename, mimetype='application/pdf')
-        
-    except Exception as e:
-        return f"Error generating PDF: {str(e)}", 500
-
-@app.route('/delete_school/<school_id>')
-def delete_school(school_id):
-    try:
-        schools = load_schools_config()
-        schools = [s for s in schools if s['id'] != school_id]
-        save_schools_config(schools)
-        
-        # Delete school data folder
-        school_folder = os.path.join(DATA_DIR, school_id)
-        if os.path.exists(school_folder):
-            import shutil
-            shutil.rmtree(school_folder)
-        
-        return redirect('/school_admin')
-    except Exception as e:
-        return f"Error deleting school: {str(e)}", 500
-
-# Admin Dashboard Route
-@app.route('/admin_dashboard')
-def admin_dashboard():
-    schools = load_schools_config()
-    
-    # Calculate statistics
-    total_students = sum(school.get('student_count', 0) for school in schools)
-    active_years = set()
-    
-    for school in schools:
-        school_folder = os.path.join(DATA_DIR, school['id'])
-        if os.path.exists(school_folder):
-            for year in os.listdir(school_folder):
-                active_years.add(year)
-    
-    stats = {
-        'total_schools': len(schools),
-        'total_students': total_students,
-        'active_years': len(active_years)
-    }
-    
-    recent_schools = sorted(schools, key=lambda x: x.get('registered_date', ''), reverse=True)[:5]
-    
-    ADMIN_DASHBOARD_TEMPLATE = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Admin Dashboard</title>
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #2c3e50 0%, #3498db 100%);
-                min-height: 100vh; padding: 20px;
-            }
-            .container { 
-                max-width: 1200px; margin: 0 auto; background: white;
-                padding: 30px; border-radius: 20px; box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            }
-            .header { 
-                display: flex; justify-content: space-between; align-items: center;
-                margin-bottom: 30px; padding-bottom: 20px; border-bottom: 2px solid #eee;
-            }
-            .stats { display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; margin: 30px 0; }
-            .stat-card { 
-                background: linear-gradient(45deg, #667eea, #764ba2); color: white;
-                padding: 25px; border-radius: 15px; text-align: center;
-            }
-            .stat-number { font-size: 36px; font-weight: bold; margin-bottom: 10px; }
-            .stat-label { font-size: 16px; opacity: 0.9; }
-            .actions { display: grid; grid-template-columns: 1fr 1fr; gap: 30px; margin: 30px 0; }
-            .action-card { padding: 20px; background: #f8f9fa; border-radius: 10px; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🏫 School Admin Dashboard</h1>
-                <a href="/" style="padding: 10px 20px; background: #e74c3c; color: white; 
-                   text-decoration: none; border-radius: 8px;">🏠 Home</a>
-            </div>
-
-            <div class="stats">
-                <div class="stat-card">
-                    <div class="stat-number">{{ stats.total_schools }}</div>
-                    <div class="stat-label">Total Schools</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number">{{ stats.total_students }}</div>
-                    <div class="stat-label">Total Students</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number">{{ stats.active_years }}</div>
-                    <div class="stat-label">Active Years</div>
-                </div>
-            </div>
-
-            <div class="actions">
-                <div class="action-card">
-                    <h3>📊 Quick Actions</h3>
-                    <div style="display: flex; flex-direction: column; gap: 10px; margin-top: 20px;">
-                        <a href="/school_admin" style="padding: 15px; background: #27ae60; color: white; 
-                           text-decoration: none; border-radius: 8px; text-align: center;">🏫 Manage Schools</a>
-                        <a href="/student_login" style="padding: 15px; background: #e67e22; color: white; 
-                           text-decoration: none; border-radius: 8px; text-align: center;">👨‍🎓 Student Portal</a>
-                    </div>
-                </div>
-
-                <div class="action-card">
-                    <h3>🏆 Recent Schools</h3>
-                    {% for school in recent_schools %}
-                    <div style="background: white; padding: 15px; margin: 10px 0; border-radius: 8px;
-                               border-left: 4px solid #3498db;">
-                        <strong>{{ school.name }}</strong><br>
-                        <small>ID: {{ school.id }} | Students: {{ school.student_count }}</small>
-                    </div>
-                    {% endfor %}
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    
-    return render_template_string(ADMIN_DASHBOARD_TEMPLATE, 
-                                stats=stats, 
-                                recent_schools=recent_schools)
-
-if __name__ == '__main__':
-    print("🚀 Starting Multi-School Result Platform...")
-    print("🏫 Features: School Registration, Result Upload, Student Portal")
-    print("📊 Advanced: PDF Reports, Admin Dashboard, Multi-School Support")
-    app.run(debug=False)  # debug=False for production
-
-
+from flask import (Flask, render_template, request, send_file, redirect, url_for, Response, jsonify,
+                   g, has_request_context, before_render_template, template_rendered)
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+import click
+from jinja2 import DictLoader
+import atexit
+import io
+import math
+import os
+import json
+import sqlite3
+from datetime import datetime, timezone
+import re
+import random
+import secrets
+import hashlib
+import shutil
+import sys
+import threading
+import time
+import zipfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+app = Flask(__name__)
+app.secret_key = secrets.token_hex(16)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 3600  # Static assets are versioned by content hash
+
+# Configuration
+CONFIG_FILE = "schools_config.json"  # Legacy registry, migrated into REGISTRY_DB on startup
+REGISTRY_DB = os.environ.get("REGISTRY_DB", "schools.db")
+PASS_PERCENT = float(os.environ.get("PASS_PERCENT", 33))
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 1000))  # 0 disables the slow request log
+WARMUP_SCHOOLS = os.environ.get("WARMUP_SCHOOLS", "")  # Comma-separated school ids, empty for all
+WARMUP_YEARS = os.environ.get("WARMUP_YEARS", "")  # Comma-separated years, empty for each school's latest
+DATA_DIR = "school_data"
+TERM_CACHE_MAX_BYTES = int(os.environ.get("TERM_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+RESULTS_CACHE_MAX_BYTES = int(os.environ.get("RESULTS_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+BULK_REPORT_WORKERS = int(os.environ.get("BULK_REPORT_WORKERS", os.cpu_count() or 1))
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", os.cpu_count() or 1))
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PDF_CACHE_DISK_MAX_BYTES = int(os.environ.get("PDF_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+RESULT_PAGE_MAX_AGE = int(os.environ.get("RESULT_PAGE_MAX_AGE", 0))  # Seconds shared caches may reuse a result page unchecked
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+BATCH_MAX_ROLLS = int(os.environ.get("BATCH_MAX_ROLLS", 10000))  # Roll numbers accepted per batch lookup
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 3600))
+# Result lookups per second and burst per client IP and per school, per worker process; 0 disables
+RATE_LIMIT_IP_PER_SECOND = float(os.environ.get("RATE_LIMIT_IP_PER_SECOND", 10))
+RATE_LIMIT_IP_BURST = int(os.environ.get("RATE_LIMIT_IP_BURST", 40))
+RATE_LIMIT_SCHOOL_PER_SECOND = float(os.environ.get("RATE_LIMIT_SCHOOL_PER_SECOND", 200))
+RATE_LIMIT_SCHOOL_BURST = int(os.environ.get("RATE_LIMIT_SCHOOL_BURST", 400))
+MAX_ACTIVE_REQUESTS = int(os.environ.get("MAX_ACTIVE_REQUESTS", 4))  # Result lookups running at once per process, 0 disables
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("QUEUE_TIMEOUT_SECONDS", 2))  # Wait for a free slot before the queue page
+PROXY_HOPS = int(os.environ.get("PROXY_HOPS", 0))  # Reverse proxies in front of the app that set X-Forwarded-For
+
+# Ensure directories exist
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Class-wise subjects mapping
+SUBJECTS_MAPPING = {
+    "Nursery": ["Math", "English", "Hindi"],
+    "LKG": ["Math", "English", "Hindi"], 
+    "UKG": ["Math", "English", "Hindi"],
+    "I": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
+    "II": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
+    "III": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
+    "IV": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
+    "V": ["Math", "English", "Hindi", "EVS", "GK", "Computer"],
+    "VI": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
+    "VII": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
+    "VIII": ["Math", "English", "Hindi", "Science", "Computer", "Sanskrit"],
+    "IX": ["Math", "English", "Hindi", "Science", "Sanskrit", "SST"],
+    "X": ["Math", "English", "Hindi", "Science", "Sanskrit", "SST"],
+    "XI": ["Math", "English", "Hindi", "Bio", "Physics", "Chemistry", "Sanskrit", "SST"],
+    "XII": ["Math", "English", "Hindi", "Bio", "Physics", "Chemistry", "Sanskrit", "SST"]
+}
+
+METADATA_COLUMNS = ['Roll #', 'Student Name', 'Class', 'Sec']
+TERMS = ("1st_term", "2nd_term")
+
+# HTML Templates
+INDEX_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>School Result Portal</title>
+    <link rel="stylesheet" href="{{ static_url('css/index.css') }}">
+</head>
+<body>
+    <div class="container">
+        <h1>🎓 School Result Portal</h1>
+        <div class="subtitle">Multi-School Platform - Student Results & Management</div>
+        
+        <div class="card">
+            <h2>🏫 For Schools</h2>
+            <p>Register your school and upload student results</p>
+            <a href="/school_admin" class="btn btn-school">📊 School Administration</a>
+        </div>
+
+        <div class="card">
+            <h2>👨‍🎓 For Students</h2>
+            <p>Check your result by selecting school and academic year</p>
+            <a href="/student_login" class="btn btn-student">📝 Check My Result</a>
+        </div>
+
+        {% if schools %}
+        <div class="card">
+            <h3>🏆 Registered Schools</h3>
+            <div class="school-list">
+                {% for school in schools %}
+                <div class="school-item">
+                    <strong>{{ school.name }}</strong><br>
+                    <small>ID: {{ school.id }} | Students: {{ school.student_count }}</small>
+                </div>
+                {% endfor %}
+            </div>
+        </div>
+        {% endif %}
+    </div>
+</body>
+</html>
+'''
+
+SCHOOL_ADMIN_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>School Administration</title>
+    <link rel="stylesheet" href="{{ static_url('css/school_admin.css') }}">
+</head>
+<body>
+    <div class="container">
+        <h1>🏫 School Administration Panel</h1>
+        <a href="/" style="padding: 10px 15px; background: #95a5a6; color: white; text-decoration: none; border-radius: 5px; margin-bottom: 20px; display: inline-block;">← Back to Home</a>
+        
+        <div class="tabs">
+            <div class="tab active" onclick="showTab('register')">📝 Register School</div>
+            <div class="tab" onclick="showTab('upload')">📤 Upload Results</div>
+            <div class="tab" onclick="showTab('reports')">📦 Report Cards</div>
+            <div class="tab" onclick="showTab('import')">🗂️ Bulk Import</div>
+            <div class="tab" onclick="showTab('manage')">⚙️ Manage Schools</div>
+        </div>
+
+        <div id="register" class="tab-content active">
+            <h3>Register New School</h3>
+            <form method="POST" action="/register_school">
+                <div class="form-group">
+                    <label>School Name:</label>
+                    <input type="text" name="school_name" required placeholder="Enter school name">
+                </div>
+                <div class="form-group">
+                    <label>School ID (Unique):</label>
+                    <input type="text" name="school_id" required placeholder="e.g., S001, DPS001">
+                </div>
+                <div class="form-group">
+                    <label>Contact Email:</label>
+                    <input type="email" name="contact_email" placeholder="school@email.com">
+                </div>
+                <button type="submit" class="btn">🏫 Register School</button>
+            </form>
+        </div>
+
+        <div id="upload" class="tab-content">
+            <h3>Upload Student Results</h3>
+            <form method="POST" action="/upload_results" enctype="multipart/form-data">
+                <div class="form-group">
+                    <label>Select School:</label>
+                    <select name="school_id" required>
+                        <option value="">-- Select School --</option>
+                        {% for school in schools %}
+                        <option value="{{ school.id }}">{{ school.name }} ({{ school.id }})</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Academic Year:</label>
+                    <select name="academic_year" required>
+                        <option value="2024-25">2024-25</option>
+                        <option value="2023-24">2023-24</option>
+                        <option value="2025-26">2025-26</option>
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Term:</label>
+                    <select name="term" required>
+                        <option value="1st_term">1st Term</option>
+                        <option value="2nd_term">2nd Term</option>
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Upload Excel File:</label>
+                    <input type="file" name="excel_file" accept=".xlsx,.xls" required>
+                </div>
+                <button type="submit" class="btn btn-upload">📤 Upload Results</button>
+            </form>
+        </div>
+
+        <div id="reports" class="tab-content">
+            <h3>Download All Report Cards</h3>
+            <form method="POST" action="/bulk_report_cards">
+                <div class="form-group">
+                    <label>Select School:</label>
+                    <select name="school_id" required>
+                        <option value="">-- Select School --</option>
+                        {% for school in schools %}
+                        <option value="{{ school.id }}">{{ school.name }} ({{ school.id }})</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Academic Year:</label>
+                    <select name="academic_year" required>
+                        <option value="2024-25">2024-25</option>
+                        <option value="2023-24">2023-24</option>
+                        <option value="2025-26">2025-26</option>
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Class (optional):</label>
+                    <input type="text" name="class" placeholder="e.g., X (leave blank for whole school)">
+                </div>
+                <div class="form-group">
+                    <label>Section (optional):</label>
+                    <input type="text" name="section" placeholder="e.g., A">
+                </div>
+                <button type="submit" class="btn btn-upload">📦 Download ZIP</button>
+            </form>
+
+            <h3>Tabulation Register</h3>
+            <form method="POST" action="/tabulation_register">
+                <div class="form-group">
+                    <label>Select School:</label>
+                    <select name="school_id" required>
+                        <option value="">-- Select School --</option>
+                        {% for school in schools %}
+                        <option value="{{ school.id }}">{{ school.name }} ({{ school.id }})</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Academic Year:</label>
+                    <select name="academic_year" required>
+                        <option value="2024-25">2024-25</option>
+                        <option value="2023-24">2023-24</option>
+                        <option value="2025-26">2025-26</option>
+                    </select>
+                </div>
+                <div class="form-group">
+                    <label>Class:</label>
+                    <input type="text" name="class" required placeholder="e.g., X">
+                </div>
+                <div class="form-group">
+                    <label>Section (optional):</label>
+                    <input type="text" name="section" placeholder="e.g., A (leave blank for all sections)">
+                </div>
+                <button type="submit" class="btn btn-upload">📋 Download Register</button>
+            </form>
+        </div>
+
+        <div id="import" class="tab-content">
+            <h3>Import Several Schools</h3>
+            <p>A ZIP laid out as <code>&lt;school_id&gt;/&lt;year&gt;/1st_term.xlsx</code> and
+               <code>2nd_term.xlsx</code>, with an optional <code>&lt;school_id&gt;/school.json</code>
+               (<code>{"name": ..., "email": ...}</code>) for schools that are not registered yet.</p>
+            <form method="POST" action="/bulk_import" enctype="multipart/form-data">
+                <div class="form-group">
+                    <label>ZIP Archive:</label>
+                    <input type="file" name="archive" accept=".zip" required>
+                </div>
+                <button type="submit" class="btn btn-upload">🗂️ Import</button>
+            </form>
+        </div>
+
+        <div id="manage" class="tab-content">
+            <h3>Manage Schools</h3>
+            {% if schools %}
+                {% for school in schools %}
+                <div style="background: white; padding: 15px; margin: 10px 0; border-radius: 8px;">
+                    <strong>{{ school.name }}</strong> ({{ school.id }})<br>
+                    <small>Registered: {{ school.registered_date }}</small><br>
+                    <a href="/delete_school/{{ school.id }}" style="color: red; text-decoration: none;">🗑️ Delete</a>
+                </div>
+                {% endfor %}
+            {% else %}
+                <p>No schools registered yet.</p>
+            {% endif %}
+        </div>
+
+        {% if message %}
+        <div class="{{ 'success' if message_type == 'success' else 'error' }}">{{ message }}</div>
+        {% endif %}
+        {% if errors %}
+        <table class="error-report">
+            <tr><th>Row</th><th>Column</th><th>Problem</th></tr>
+            {% for error in errors %}
+            <tr><td>{{ error.row or '' }}</td><td>{{ error.column or '' }}</td><td>{{ error.message }}</td></tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+    </div>
+
+    <script>
+        function showTab(tabName) {
+            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+            event.currentTarget.classList.add('active');
+            document.getElementById(tabName).classList.add('active');
+        }
+    </script>
+</body>
+</html>
+'''
+
+STUDENT_LOGIN_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Result Portal</title>
+    <link rel="stylesheet" href="{{ static_url('css/student_login.css') }}">
+</head>
+<body>
+    <div class="container">
+        <h1>👨‍🎓 Student Result Portal</h1>
+        <p style="text-align: center; color: #666; margin-bottom: 30px;">Check your academic performance</p>
+        <a href="/" style="padding: 10px 15px; background: #95a5a6; color: white; text-decoration: none; border-radius: 5px; margin-bottom: 20px; display: inline-block;">← Back to Home</a>
+        
+        <form method="POST" action="/student_result">
+            <div class="form-group">
+                <label>Select Your School:</label>
+                <select name="school_id" required>
+                    <option value="">-- Select School --</option>
+                    {% for school in schools %}
+                    <option value="{{ school.id }}">{{ school.name }}</option>
+                    {% endfor %}
+                </select>
+            </div>
+            
+            <div class="form-group">
+                <label>Academic Year:</label>
+                <select name="academic_year" required>
+                    <option value="2024-25">2024-25</option>
+                    <option value="2023-24">2023-24</option>
+                    <option value="2025-26">2025-26</option>
+                </select>
+            </div>
+            
+            <div class="form-group">
+                <label>Enter Your Roll Number:</label>
+                <input type="text" name="roll_number" required placeholder="e.g., 101, 205, 301">
+            </div>
+            
+            <button type="submit" class="btn">🔍 Get My Result</button>
+        </form>
+
+        {% if error %}
+        <div class="error">{{ error }}</div>
+        {% endif %}
+    </div>
+</body>
+</html>
+'''
+
+STUDENT_RESULT_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Result</title>
+    <link rel="stylesheet" href="{{ static_url('css/student_result.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎓 Academic Report Card</h1>
+            <h3>{{ school_name }} - {{ academic_year }}</h3>
+        </div>
+
+        <div style="background: #f8f9fa; padding: 20px; border-radius: 10px; margin: 20px 0;">
+            <p><strong>Student Name:</strong> {{ student_data.name }}</p>
+            <p><strong>Roll Number:</strong> {{ student_data.roll }}</p>
+            <p><strong>Class:</strong> {{ student_data.class }}</p>
+            <p><strong>Academic Year:</strong> {{ academic_year }}</p>
+            {% if student_data.rank %}
+            <p><strong>Class Rank:</strong> {{ student_data.rank }} of {{ student_data.class_size }}</p>
+            {% endif %}
+        </div>
+
+        <h3>📊 Academic Performance</h3>
+        <table>
+            <tr>
+                <th>Subject</th>
+                <th>1st Term</th>
+                <th>2nd Term</th>
+                <th>Total</th>
+            </tr>
+            {% for subject, marks in student_data.subjects.items() %}
+            <tr>
+                <td>{{ subject }}</td>
+                <td>{{ marks.term1 }}</td>
+                <td>{{ marks.term2 }}</td>
+                <td><strong>{{ marks.total }}</strong></td>
+            </tr>
+            {% endfor %}
+            <tr style="background: #f8f9fa; font-weight: bold;">
+                <td>🎯 Grand Total</td>
+                <td>{{ student_data.total1 }}</td>
+                <td>{{ student_data.total2 }}</td>
+                <td>{{ student_data.total1 + student_data.total2 }}</td>
+            </tr>
+        </table>
+
+        <div class="performance-summary">
+            <h3>📈 Performance Summary</h3>
+            <table>
+                <tr><td>1st Term Percentage</td><td><strong style="color: #667eea;">{{ student_data.percent1 }}%</strong></td></tr>
+                <tr><td>2nd Term Percentage</td><td><strong style="color: #667eea;">{{ student_data.percent2 }}%</strong></td></tr>
+                <tr><td>Combined Annual Percentage</td><td><strong style="color: #27ae60; font-size: 18px;">{{ student_data.combined_percent }}%</strong></td></tr>
+            </table>
+        </div>
+
+        <div style="text-align: center; margin: 30px 0;">
+            <form method="GET" action="/download_result_pdf" style="display: inline;">
+                <input type="hidden" name="school_id" value="{{ school_id }}">
+                <input type="hidden" name="academic_year" value="{{ academic_year }}">
+                <input type="hidden" name="roll_number" value="{{ student_data.roll }}">
+                <button type="submit" class="btn">📥 Download PDF Report</button>
+            </form>
+            <a href="/history/{{ school_id }}/{{ student_data.roll }}" class="btn" style="background: linear-gradient(45deg, #27ae60, #229954);">📈 Progress Across Years</a>
+            <a href="/student_login" class="btn" style="background: linear-gradient(45deg, #3498db, #2980b9);">🔍 Check Another Result</a>
+            <a href="/" class="btn" style="background: linear-gradient(45deg, #95a5a6, #7f8c8d);">🏠 Home</a>
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+ADMIN_DASHBOARD_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Admin Dashboard</title>
+    <link rel="stylesheet" href="{{ static_url('css/admin_dashboard.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🏫 School Admin Dashboard</h1>
+            <a href="/" style="padding: 10px 20px; background: #e74c3c; color: white; 
+               text-decoration: none; border-radius: 8px;">🏠 Home</a>
+        </div>
+
+        <div class="stats">
+            <div class="stat-card">
+                <div class="stat-number">{{ stats.total_schools }}</div>
+                <div class="stat-label">Total Schools</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">{{ stats.total_students }}</div>
+                <div class="stat-label">Total Students</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">{{ stats.active_years }}</div>
+                <div class="stat-label">Active Years</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">{{ stats.pass_rate if stats.pass_rate is not none else '-' }}%</div>
+                <div class="stat-label">Pass Rate</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">{{ stats.average_percent if stats.average_percent is not none else '-' }}%</div>
+                <div class="stat-label">Average Percentage</div>
+            </div>
+        </div>
+
+        {% if stats.years %}
+        <h3>📈 Results by School and Year</h3>
+        <table class="year-stats">
+            <tr><th>School</th><th>Year</th><th>Class</th><th>Students</th><th>Pass Rate</th><th>Average %</th></tr>
+            {% for year in stats.years %}
+            <tr class="year-row">
+                <td>{{ school_names.get(year.school_id, year.school_id) }}</td>
+                <td>{{ year.academic_year }}</td>
+                <td>All{% if year.pass_rate is none %} (1 term){% else %}
+                    (<a href="/admin/analytics/{{ year.school_id }}/{{ year.academic_year }}">analytics</a>){% endif %}</td>
+                <td>{{ year.students }}</td>
+                <td>{{ year.pass_rate if year.pass_rate is not none else '-' }}</td>
+                <td>{{ year.average_percent if year.average_percent is not none else '-' }}</td>
+            </tr>
+            {% for class in year.classes %}
+            <tr>
+                <td></td><td></td>
+                <td>{{ class.class }}</td>
+                <td>{{ class.students }}</td>
+                <td>{{ class.pass_rate }}</td>
+                <td>{{ class.average_percent }}</td>
+            </tr>
+            {% endfor %}
+            {% endfor %}
+        </table>
+        <p><small><a href="/admin_dashboard/stats.json">JSON</a></small></p>
+        {% endif %}
+
+        <div class="actions">
+            <div class="action-card">
+                <h3>📊 Quick Actions</h3>
+                <div style="display: flex; flex-direction: column; gap: 10px; margin-top: 20px;">
+                    <a href="/school_admin" style="padding: 15px; background: #27ae60; color: white; 
+                       text-decoration: none; border-radius: 8px; text-align: center;">🏫 Manage Schools</a>
+                    <a href="/student_login" style="padding: 15px; background: #e67e22; color: white; 
+                       text-decoration: none; border-radius: 8px; text-align: center;">👨‍🎓 Student Portal</a>
+                </div>
+            </div>
+
+            <div class="action-card">
+                <h3>🏆 Recent Schools</h3>
+                {% for school in recent_schools %}
+                <div style="background: white; padding: 15px; margin: 10px 0; border-radius: 8px;
+                           border-left: 4px solid #3498db;">
+                    <strong>{{ school.name }}</strong><br>
+                    <small>ID: {{ school.id }} | Students: {{ school.student_count }}</small>
+                </div>
+                {% endfor %}
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+ANALYTICS_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Class Analytics</title>
+    <link rel="stylesheet" href="{{ static_url('css/analytics.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 Class Analytics</h1>
+            <h3>{{ school_name }} - {{ academic_year }}</h3>
+        </div>
+        <a href="/admin_dashboard" class="back">← Back to Dashboard</a>
+        <a href="?format=json" class="back">JSON</a>
+
+        {% for summary in classes %}
+        <div class="class-card">
+            <h3>Class {{ summary.class }}{% if summary.section %} - {{ summary.section }}{% endif %}</h3>
+            <p>
+                Students: <strong>{{ summary.students }}</strong> |
+                Pass Rate: <strong>{{ summary.pass_rate }}%</strong> |
+                Average: <strong>{{ summary.average_percent }}%</strong> |
+                Median: <strong>{{ summary.median_percent }}%</strong> |
+                Highest: <strong>{{ summary.highest_percent }}%</strong>
+            </p>
+            <table>
+                <tr><th>Rank</th><th>Roll No</th><th>Name</th><th>Combined %</th></tr>
+                {% for topper in summary.toppers %}
+                <tr><td>{{ topper.rank }}</td><td>{{ topper.roll }}</td><td>{{ topper.name }}</td><td>{{ topper.combined_percent }}</td></tr>
+                {% endfor %}
+            </table>
+        </div>
+        {% else %}
+        <p>No results available.</p>
+        {% endfor %}
+
+        {% if subjects %}
+        <h3>📚 Subject Statistics (marks out of 40)</h3>
+        <table>
+            <tr><th>Class</th><th>Subject</th><th>Students</th><th>Mean</th><th>Median</th><th>Std Dev</th></tr>
+            {% for stat in subjects %}
+            <tr><td>{{ stat.class }}</td><td>{{ stat.subject }}</td><td>{{ stat.students }}</td>
+                <td>{{ stat.mean }}</td><td>{{ stat.median }}</td><td>{{ stat.std }}</td></tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+    </div>
+</body>
+</html>
+'''
+
+HISTORY_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Progress</title>
+    <link rel="stylesheet" href="{{ static_url('css/history.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📈 Progress Across Years</h1>
+            <h3>{{ school_name }} - Roll No {{ roll_number }}{% if history %} - {{ history[-1].name }}{% endif %}</h3>
+        </div>
+        <a href="javascript:history.back()" class="back">← Back</a>
+        <a href="?format=json" class="back">JSON</a>
+
+        {% if history %}
+        <h3>🎯 Combined Percentage</h3>
+        <table>
+            <tr><th>Academic Year</th><th>Class</th><th>Combined %</th><th>Change</th><th>Class Rank</th></tr>
+            {% for year in history %}
+            <tr>
+                <td><a href="/result/{{ school_id }}/{{ year.academic_year }}/{{ roll_number }}">{{ year.academic_year }}</a></td>
+                <td>{{ year.class }}{% if year.section %} - {{ year.section }}{% endif %}</td>
+                <td><div class="bar" style="width: {{ year.combined_percent }}%;"></div>{{ year.combined_percent }}%</td>
+                <td class="{{ 'up' if year.change and year.change > 0 else 'down' if year.change and year.change < 0 else '' }}">
+                    {% if year.change is not none %}{{ '%+.2f'|format(year.change) }}{% else %}—{% endif %}</td>
+                <td>{% if year.class_rank %}{{ year.class_rank }}{% else %}—{% endif %}</td>
+            </tr>
+            {% endfor %}
+        </table>
+
+        <h3>📚 Subject Marks (out of 40)</h3>
+        <table>
+            <tr><th>Subject</th>{% for year in history %}<th>{{ year.academic_year }}</th>{% endfor %}</tr>
+            {% for subject in subjects %}
+            <tr>
+                <td>{{ subject }}</td>
+                {% for year in history %}<td>{{ year.subjects.get(subject, '—') }}</td>{% endfor %}
+            </tr>
+            {% endfor %}
+        </table>
+        {% else %}
+        <p>No results found for this roll number.</p>
+        {% endif %}
+    </div>
+</body>
+</html>
+'''
+
+JOB_STATUS_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Preparing Report</title>
+    <link rel="stylesheet" href="{{ static_url('css/student_result.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>⏳ Preparing your {{ {'report_card': 'report card', 'bulk_import': 'import report'}.get(job.kind, 'report cards') }}</h1>
+            <h3 id="status">Status: {{ job.status }}</h3>
+        </div>
+        <p style="text-align: center;">Your download will start automatically when it is ready.
+           You can also keep this link: <a href="{{ job.download_url }}">{{ job.download_url }}</a></p>
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="/" class="btn" style="background: linear-gradient(45deg, #95a5a6, #7f8c8d);">🏠 Home</a>
+        </div>
+    </div>
+    <script>
+        function poll() {
+            fetch("{{ job.status_url }}").then(r => r.json()).then(job => {
+                document.getElementById('status').textContent = 'Status: ' + job.status;
+                if (job.status === 'done') {
+                    window.location = job.download_url;
+                } else if (job.status === 'failed') {
+                    document.getElementById('status').textContent = 'Failed: ' + job.error;
+                } else {
+                    setTimeout(poll, 1000);
+                }
+            }).catch(() => setTimeout(poll, 2000));
+        }
+        poll();
+    </script>
+</body>
+</html>
+'''
+
+BUSY_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Please Wait</title>
+    {% if not form %}<meta http-equiv="refresh" content="{{ retry_after }}">{% endif %}
+    <link rel="stylesheet" href="{{ static_url('css/student_result.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>⏳ {{ 'Too many requests' if status == 429 else 'Results are in high demand' }}</h1>
+            <h3>Trying again in <span id="seconds">{{ retry_after }}</span> seconds...</h3>
+        </div>
+        <p style="text-align: center;">
+            {% if status == 429 %}Too many requests have come from your network in a short time.
+            {% else %}Many students are checking their results right now and you are in the queue.{% endif %}
+            Keep this page open; it will retry by itself.</p>
+        {% if form %}
+        <form id="retry" method="POST">
+            {% for name, value in form.items(multi=True) %}
+            <input type="hidden" name="{{ name }}" value="{{ value }}">
+            {% endfor %}
+        </form>
+        {% endif %}
+    </div>
+    <script>
+        let seconds = {{ retry_after }};
+        const timer = setInterval(() => {
+            seconds -= 1;
+            document.getElementById('seconds').textContent = Math.max(seconds, 0);
+            if (seconds <= 0) {
+                clearInterval(timer);
+                {% if form %}document.getElementById('retry').submit();{% endif %}
+            }
+        }, 1000);
+    </script>
+</body>
+</html>
+'''
+
+# Template registry
+# Templates are compiled once at startup and then rendered by name, instead of
+# being re-parsed by render_template_string on every request.
+TEMPLATES = {
+    'index.html': INDEX_TEMPLATE,
+    'school_admin.html': SCHOOL_ADMIN_TEMPLATE,
+    'student_login.html': STUDENT_LOGIN_TEMPLATE,
+    'student_result.html': STUDENT_RESULT_TEMPLATE,
+    'admin_dashboard.html': ADMIN_DASHBOARD_TEMPLATE,
+    'analytics.html': ANALYTICS_TEMPLATE,
+    'job_status.html': JOB_STATUS_TEMPLATE,
+    'history.html': HISTORY_TEMPLATE,
+    'busy.html': BUSY_TEMPLATE,
+}
+app.jinja_loader = DictLoader(TEMPLATES)
+
+_static_versions = {}
+
+@app.template_global()
+def static_url(filename):
+    """URL of a static asset with a content-hash version for long-lived caching"""
+    version = _static_versions.get(filename)
+    if version is None:
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+        _static_versions[filename] = version
+    return url_for('static', filename=filename, v=version)
+
+def compile_templates():
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+
+compile_templates()
+
+# Request instrumentation
+# Hot-path stages are wrapped in timing spans. Durations, bytes read and cache
+# hits/misses are counted in each process and exported in Prometheus text
+# format on /metrics; requests slower than SLOW_REQUEST_MS log their stages.
+# Under gunicorn, multiprocess mode has every worker write its numbers to a
+# shared directory, so whichever worker answers a scrape reports the sum.
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_DIR = os.path.join(DATA_DIR, ".metrics")
+METRICS_FLUSH_SECONDS = 5
+
+class Metrics:
+    """Thread-safe Prometheus-style counters and histograms"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.help = {}
+        self.directory = None
+        self.pid = os.getpid()
+    
+    def enable_multiprocess(self, directory):
+        """Share metrics between the processes forked after this call through files in directory
+        
+        Call it once in the parent (gunicorn's master) before workers fork; it clears
+        the previous run's files.
+        """
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+    
+    def _check_process(self):
+        """After a fork, drop the parent's numbers and start flushing this process's own"""
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.counters, self.histograms = {}, {}
+            self.pid = os.getpid()
+        if self.directory is not None:
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+    
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            self.flush()
+    
+    def snapshot(self):
+        with self.lock:
+            return {'help': {name: list(entry) for name, entry in self.help.items()},
+                    'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                    'histograms': [[name, labels, buckets, total, count]
+                                   for (name, labels), (buckets, total, count) in self.histograms.items()]}
+    
+    def flush(self):
+        """Write this process's numbers for the other workers' /metrics"""
+        if self.directory is not None and self.pid == os.getpid():
+            _write_json_atomic(os.path.join(self.directory, f"{self.pid}.json"), self.snapshot())
+    
+    def inc(self, name, labels=(), value=1, help_text=''):
+        self._check_process()
+        with self.lock:
+            self.help.setdefault(name, ('counter', help_text))
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+    
+    def observe(self, name, seconds, labels=(), help_text=''):
+        self._check_process()
+        with self.lock:
+            self.help.setdefault(name, ('histogram', help_text))
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [[0] * len(METRICS_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(METRICS_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+    
+    def _snapshots(self):
+        """This process's numbers plus, in multiprocess mode, every other worker's last flush
+        
+        Files of workers that have exited are kept, so counters never go backwards.
+        """
+        self._check_process()
+        snapshots = [self.snapshot()]
+        if self.directory is None:
+            return snapshots
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename == f"{self.pid}.json":
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Removed or half-written; it is picked up on the next scrape
+        return snapshots
+    
+    def render(self):
+        def label_text(labels, extra=()):
+            pairs = [f'{key}="{value}"' for key, value in labels + extra]
+            return '{' + ','.join(pairs) + '}' if pairs else ''
+        
+        help_texts, counters, histograms = {}, {}, {}
+        for snapshot in self._snapshots():
+            for name, entry in snapshot['help'].items():
+                help_texts.setdefault(name, tuple(entry))
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.setdefault(key, [[0] * len(METRICS_BUCKETS), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        
+        lines = []
+        for name, (kind, help_text) in sorted(help_texts.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{label_text(labels)} {value}")
+                continue
+            for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(METRICS_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{label_text(labels, (('le', bound),))} {bucket_count}")
+                lines.append(f"{name}_bucket{label_text(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{label_text(labels)} {total}")
+                lines.append(f"{name}_count{label_text(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+@contextmanager
+def span(stage):
+    """Time a hot-path stage, recording it in the metrics and the current request's breakdown"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('portal_stage_duration_seconds', elapsed, (('stage', stage),),
+                        "Time spent in each request stage")
+        if has_request_context():
+            g.setdefault('stages', []).append((stage, elapsed))
+
+def record_bytes_read(stage, nbytes):
+    metrics.inc('portal_stage_bytes_read_total', (('stage', stage),), nbytes, "Bytes read from disk per stage")
+
+def record_cache(cache, hit):
+    metrics.inc('portal_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')), 1,
+                "Cache lookups by cache and outcome")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.stages = []
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    labels = (('endpoint', request.endpoint or 'unknown'), ('method', request.method))
+    metrics.observe('portal_request_duration_seconds', elapsed, labels, "Request latency by endpoint")
+    metrics.inc('portal_requests_total', labels + (('status', response.status_code),), 1,
+                "Requests by endpoint and status")
+    
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        breakdown = ', '.join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in g.get('stages', []))
+        app.logger.warning("Slow request %s %s took %.1fms [%s]", request.method, request.path,
+                           elapsed * 1000, breakdown or "no stages")
+    return response
+
+@before_render_template.connect_via(app)
+def _start_template_timer(sender, template, context, **extra):
+    g.template_start = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def _record_template_time(sender, template, context, **extra):
+    start = g.pop('template_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        metrics.observe('portal_stage_duration_seconds', elapsed, (('stage', 'render_template'),),
+                        "Time spent in each request stage")
+        g.setdefault('stages', []).append(('render_template', elapsed))
+
+# Rate limiting
+# Result routes take a token from the client IP's bucket (429 when empty) and
+# the school's bucket (503), then wait up to QUEUE_TIMEOUT_SECONDS for one of
+# MAX_ACTIVE_REQUESTS slots (503). Turned-away browsers get a small page that
+# retries by itself after Retry-After; API clients get JSON. Buckets live in
+# each worker process, so with N workers the effective limits are N times higher.
+RATE_LIMIT_MAX_KEYS = 100000
+BUSY_RETRY_SECONDS = 3
+
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+
+class RateLimiter:
+    """Token buckets by key, refilled at rate per second up to burst; least recently used keys are dropped"""
+    def __init__(self, rate, burst, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def acquire(self, key):
+        """Take a token for key; return 0 if one was available, else the seconds until one will be"""
+        if not self.rate:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / self.rate
+            self.buckets[key] = (tokens - 1 if not wait else tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+ip_limiter = RateLimiter(RATE_LIMIT_IP_PER_SECOND, RATE_LIMIT_IP_BURST)
+school_limiter = RateLimiter(RATE_LIMIT_SCHOOL_PER_SECOND, RATE_LIMIT_SCHOOL_BURST)
+active_requests = threading.BoundedSemaphore(MAX_ACTIVE_REQUESTS) if MAX_ACTIVE_REQUESTS else None
+
+# The login form's POST already paid for a lookup, so the GET it redirects to is
+# let through on a short-lived signed cookie scoped to that result's path
+LOOKUP_PASS_COOKIE = 'lookup_pass'
+LOOKUP_PASS_SECONDS = 10
+lookup_pass_serializer = URLSafeTimedSerializer(app.secret_key, salt='lookup-pass')
+
+def grant_lookup_pass(response, path, view_args):
+    response.set_cookie(LOOKUP_PASS_COOKIE, lookup_pass_serializer.dumps(view_args), max_age=LOOKUP_PASS_SECONDS,
+                        path=path, httponly=True, samesite='Lax')
+    return response
+
+def has_lookup_pass():
+    token = request.cookies.get(LOOKUP_PASS_COOKIE)
+    if not token or request.method != 'GET':
+        return False
+    try:
+        return lookup_pass_serializer.loads(token, max_age=LOOKUP_PASS_SECONDS) == request.view_args
+    except BadSignature:
+        return False
+
+def throttled_response(status, reason, retry_after):
+    metrics.inc('portal_throttled_total', (('reason', reason),), 1,
+                "Requests turned away by the rate limits or the active request cap")
+    retry_after = max(1, math.ceil(retry_after))
+    if request.path.startswith('/api/') or request.accept_mimetypes.best == 'application/json':
+        response = jsonify({'error': "Too many requests" if status == 429 else "Server busy",
+                            'retry_after': retry_after})
+    else:
+        response = app.make_response(render_template(
+            'busy.html', status=status, retry_after=retry_after,
+            form=request.form if request.method == 'POST' else None))
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def throttled(view):
+    """Apply the per-IP and per-school rate limits and the active request cap to a result route"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if has_lookup_pass():
+            return view(*args, **kwargs)
+        retry_after = ip_limiter.acquire(request.remote_addr)
+        if retry_after:
+            return throttled_response(429, 'ip', retry_after)
+        
+        school_id = kwargs.get('school_id') or request.values.get('school_id')
+        if school_id is None and request.is_json:
+            params = request.get_json(silent=True)
+            school_id = params.get('school_id') if isinstance(params, dict) else None
+        retry_after = school_limiter.acquire(school_id) if school_id else 0
+        if retry_after:
+            return throttled_response(503, 'school', retry_after)
+        
+        if active_requests is None:
+            return view(*args, **kwargs)
+        if not active_requests.acquire(timeout=QUEUE_TIMEOUT_SECONDS):
+            # Spread the retries out so the waiting clients do not all come back at once
+            return throttled_response(503, 'busy', random.uniform(BUSY_RETRY_SECONDS, 2 * BUSY_RETRY_SECONDS))
+        try:
+            return view(*args, **kwargs)
+        finally:
+            active_requests.release()
+    return wrapper
+
+# Utility Functions
+# School registry
+# Schools live in a SQLite database in WAL mode, so gunicorn workers can read
+# concurrently while registrations and uploads update single rows atomically.
+_registry_local = threading.local()
+
+def get_registry():
+    """Return this thread's registry connection (reopened after a fork)"""
+    conn = getattr(_registry_local, 'conn', None)
+    if conn is None or _registry_local.pid != os.getpid():
+        conn = sqlite3.connect(REGISTRY_DB, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _registry_local.conn = conn
+        _registry_local.pid = os.getpid()
+        _registry_local.generations = {}
+        _registry_local.data_version = None
+    return conn
+
+@contextmanager
+def registry_transaction():
+    """BEGIN IMMEDIATE ... COMMIT on this thread's registry connection
+    
+    Nested uses join the outermost transaction, so several registry updates
+    (e.g. a bulk import) can be committed as one batch.
+    """
+    conn = get_registry()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        # Generations noted inside the transaction were never published
+        _registry_local.generations = {}
+        raise
+
+# A school's student count is that of its latest academic year in year_stats
+LATEST_YEAR_STUDENTS = ("SELECT students FROM year_stats WHERE year_stats.school_id = schools.id "
+                        "ORDER BY academic_year DESC LIMIT 1")
+
+def init_registry():
+    """Create the registry schema and migrate schools_config.json into it once"""
+    conn = get_registry()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schools (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL DEFAULT '',
+            registered_date TEXT NOT NULL,
+            student_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Dashboard statistics, maintained by upload_results and delete_school
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS year_stats (
+            school_id TEXT NOT NULL,
+            academic_year TEXT NOT NULL,
+            terms_uploaded INTEGER NOT NULL DEFAULT 0,
+            students INTEGER NOT NULL DEFAULT 0,
+            passed INTEGER NOT NULL DEFAULT 0,
+            percent_sum REAL NOT NULL DEFAULT 0,
+            updated TEXT NOT NULL,
+            PRIMARY KEY (school_id, academic_year)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS class_stats (
+            school_id TEXT NOT NULL,
+            academic_year TEXT NOT NULL,
+            class TEXT NOT NULL,
+            students INTEGER NOT NULL,
+            passed INTEGER NOT NULL,
+            percent_sum REAL NOT NULL,
+            PRIMARY KEY (school_id, academic_year, class)
+        )
+    """)
+    # Upload generation per school/year, bumped whenever its data changes so
+    # every worker's caches can tell their copy is stale without polling files
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            school_id TEXT NOT NULL,
+            academic_year TEXT NOT NULL,
+            generation INTEGER NOT NULL,
+            updated TEXT NOT NULL,
+            PRIMARY KEY (school_id, academic_year)
+        )
+    """)
+    # One row per student per academic year, maintained by upload_results, so
+    # progress across years is one indexed query instead of a load per year
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS student_history (
+            school_id TEXT NOT NULL,
+            roll TEXT NOT NULL,
+            academic_year TEXT NOT NULL,
+            name TEXT,
+            class TEXT NOT NULL,
+            section TEXT NOT NULL,
+            percent1 REAL NOT NULL,
+            percent2 REAL NOT NULL,
+            combined_percent REAL NOT NULL,
+            class_rank INTEGER,
+            subjects TEXT NOT NULL,
+            PRIMARY KEY (school_id, roll, academic_year)
+        )
+    """)
+    # Append-only audit log of single-mark corrections
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corrections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            school_id TEXT NOT NULL,
+            academic_year TEXT NOT NULL,
+            term TEXT NOT NULL,
+            roll TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            old_mark,
+            new_mark,
+            reason TEXT NOT NULL DEFAULT '',
+            corrected_by TEXT NOT NULL DEFAULT '',
+            created TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS corrections_school ON corrections (school_id, academic_year, id)")
+    # Report rendering jobs; only one queued/running job may exist per dedupe key
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            dedupe_key TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result_path TEXT,
+            info TEXT,
+            error TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS jobs_in_flight ON jobs (dedupe_key)
+        WHERE status IN ('queued', 'running')
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, created)")
+    # Older registries stored the count of whichever year was written last
+    conn.execute(f"UPDATE schools SET student_count = ({LATEST_YEAR_STUDENTS}) "
+                 "WHERE id IN (SELECT school_id FROM year_stats)")
+    
+    if not os.path.exists(CONFIG_FILE):
+        return
+    with open(CONFIG_FILE, 'r') as f:
+        legacy_schools = json.load(f)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO schools (id, name, email, registered_date, student_count) VALUES (?, ?, ?, ?, ?)",
+            [(s['id'], s['name'], s.get('email', ''), s.get('registered_date', ''), s.get('student_count', 0))
+             for s in legacy_schools])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    try:
+        os.replace(CONFIG_FILE, CONFIG_FILE + ".migrated")
+    except OSError:
+        pass  # Another worker already migrated it
+
+def list_schools():
+    with span('registry'):
+        return [dict(row) for row in get_registry().execute("SELECT * FROM schools ORDER BY rowid")]
+
+def get_school(school_id):
+    with span('registry'):
+        row = get_registry().execute("SELECT * FROM schools WHERE id = ?", (school_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+def add_school(school_id, name, email):
+    """Register a school, returning False if the id is already taken"""
+    try:
+        get_registry().execute(
+            "INSERT INTO schools (id, name, email, registered_date, student_count) VALUES (?, ?, ?, ?, 0)",
+            (school_id, name, email, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+def remove_school(school_id):
+    with registry_transaction() as conn:
+        conn.execute("DELETE FROM schools WHERE id = ?", (school_id,))
+        conn.execute("DELETE FROM year_stats WHERE school_id = ?", (school_id,))
+        conn.execute("DELETE FROM class_stats WHERE school_id = ?", (school_id,))
+        conn.execute("DELETE FROM student_history WHERE school_id = ?", (school_id,))
+        # Kept rather than deleted so a re-registered school never reuses a generation
+        conn.execute("UPDATE data_versions SET generation = generation + 1, updated = ? WHERE school_id = ?",
+                     (datetime.now().isoformat(), school_id))
+    _registry_local.generations = {}
+
+def bump_generation(school_id, academic_year):
+    """Publish a new version of a school/year's data and return its generation"""
+    updated = datetime.now().isoformat()
+    with registry_transaction() as conn:
+        conn.execute("""
+            INSERT INTO data_versions (school_id, academic_year, generation, updated) VALUES (?, ?, 1, ?)
+            ON CONFLICT (school_id, academic_year) DO UPDATE SET generation = generation + 1, updated = excluded.updated
+        """, (school_id, academic_year, updated))
+        generation = conn.execute("SELECT generation FROM data_versions WHERE school_id = ? AND academic_year = ?",
+                                  (school_id, academic_year)).fetchone()[0]
+    # This connection's own commits do not change its PRAGMA data_version
+    _registry_local.generations[(school_id, academic_year)] = (generation, updated)
+    return generation
+
+def data_version_info(school_folder):
+    """(generation, updated) of a school/year folder's data; (0, None) if never uploaded through the app
+    
+    PRAGMA data_version only changes when another connection commits, so it is
+    a cheap check (no file I/O); the generations are re-read only after that.
+    """
+    conn = get_registry()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if data_version != _registry_local.data_version:
+        _registry_local.generations = {}
+        _registry_local.data_version = data_version
+    school_id, academic_year = os.path.relpath(school_folder, DATA_DIR).split(os.sep)[-2:]
+    key = (school_id, academic_year)
+    info = _registry_local.generations.get(key)
+    if info is None:
+        row = conn.execute("SELECT generation, updated FROM data_versions WHERE school_id = ? AND academic_year = ?",
+                           key).fetchone()
+        info = _registry_local.generations[key] = tuple(row) if row else (0, None)
+    return info
+
+def data_generation(school_folder):
+    return data_version_info(school_folder)[0]
+
+def record_year_stats(school_id, academic_year, term_students, results):
+    """Refresh a school/year's statistics after an upload
+    
+    term_students is the row count of the uploaded term, used until both terms
+    exist; results is the materialized results table once they do.
+    """
+    terms_uploaded = sum(term_data_exists(get_school_folder(school_id, academic_year), term) for term in TERMS)
+    classes = {}
+    if results:
+        for result in results.values():
+            counts = classes.setdefault(result['class'], [0, 0, 0.0])
+            counts[0] += 1
+            counts[1] += result['combined_percent'] >= PASS_PERCENT
+            counts[2] += result['combined_percent']
+    students = sum(counts[0] for counts in classes.values()) if results else term_students
+    
+    with registry_transaction() as conn:
+        conn.execute("DELETE FROM class_stats WHERE school_id = ? AND academic_year = ?", (school_id, academic_year))
+        conn.executemany(
+            "INSERT INTO class_stats (school_id, academic_year, class, students, passed, percent_sum) VALUES (?, ?, ?, ?, ?, ?)",
+            [(school_id, academic_year, student_class, *counts) for student_class, counts in classes.items()])
+        conn.execute(
+            "INSERT OR REPLACE INTO year_stats (school_id, academic_year, terms_uploaded, students, passed, percent_sum, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (school_id, academic_year, terms_uploaded, students,
+             sum(counts[1] for counts in classes.values()), sum(counts[2] for counts in classes.values()),
+             datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        # The school's headline count is its latest year's, whichever year was just written
+        conn.execute(f"UPDATE schools SET student_count = ({LATEST_YEAR_STUDENTS}) WHERE id = ?", (school_id,))
+
+def record_student_history(school_id, academic_year, results, rolls=None):
+    """Replace a school/year's rows in the cross-year student history (only those of rolls, if given)"""
+    rows = []
+    for roll, result in (results or {}).items():
+        name = result['name']
+        rows.append((school_id, roll, academic_year,
+                     None if name is None or name != name else str(name),
+                     result['class'], _section_label(result.get('section')),
+                     result['percent1'], result['percent2'], result['combined_percent'], result.get('rank'),
+                     json.dumps({subject: marks['total'] for subject, marks in result['subjects'].items()})))
+    
+    with registry_transaction() as conn:
+        if rolls is None:
+            conn.execute("DELETE FROM student_history WHERE school_id = ? AND academic_year = ?",
+                         (school_id, academic_year))
+        else:
+            conn.executemany("DELETE FROM student_history WHERE school_id = ? AND roll = ? AND academic_year = ?",
+                             [(school_id, roll, academic_year) for roll in rolls])
+        conn.executemany(
+            "INSERT INTO student_history (school_id, roll, academic_year, name, class, section, percent1, percent2, "
+            "combined_percent, class_rank, subjects) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+def get_student_history(school_id, roll_number):
+    """A student's results in every academic year, oldest first, with the change in combined %"""
+    with span('registry'):
+        rows = get_registry().execute(
+            "SELECT academic_year, name, class, section, percent1, percent2, combined_percent, class_rank, subjects "
+            "FROM student_history WHERE school_id = ? AND roll = ? ORDER BY academic_year",
+            (school_id, roll_number)).fetchall()
+    history = []
+    previous = None
+    for row in rows:
+        year = dict(row)
+        year['subjects'] = json.loads(year['subjects'])
+        year['change'] = round(year['combined_percent'] - previous, 2) if previous is not None else None
+        previous = year['combined_percent']
+        history.append(year)
+    return history
+
+def _with_rates(row):
+    stats = dict(row)
+    complete = stats.pop('terms_uploaded', len(TERMS)) == len(TERMS)
+    stats['pass_rate'] = round(stats['passed'] * 100 / stats['students'], 2) if complete and stats['students'] else None
+    stats['average_percent'] = round(stats['percent_sum'] / stats['students'], 2) if complete and stats['students'] else None
+    del stats['passed'], stats['percent_sum']
+    return stats
+
+def get_dashboard_stats():
+    """Dashboard totals plus per-school, per-year and per-class statistics"""
+    conn = get_registry()
+    totals = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM schools) AS total_schools,
+               (SELECT COALESCE(SUM(student_count), 0) FROM schools) AS total_students,
+               (SELECT COUNT(DISTINCT academic_year) FROM year_stats) AS active_years,
+               (SELECT COALESCE(SUM(students), 0) FROM year_stats WHERE terms_uploaded = ?) AS graded_students,
+               (SELECT COALESCE(SUM(passed), 0) FROM year_stats WHERE terms_uploaded = ?) AS passed,
+               (SELECT COALESCE(SUM(percent_sum), 0) FROM year_stats WHERE terms_uploaded = ?) AS percent_sum
+    """, (len(TERMS),) * 3).fetchone()
+    stats = dict(totals)
+    graded = stats.pop('graded_students')
+    stats['pass_rate'] = round(stats.pop('passed') * 100 / graded, 2) if graded else None
+    stats['average_percent'] = round(stats.pop('percent_sum') / graded, 2) if graded else None
+    
+    years = [_with_rates(row) for row in conn.execute(
+        "SELECT * FROM year_stats ORDER BY school_id, academic_year DESC")]
+    classes = {}
+    for row in conn.execute("SELECT * FROM class_stats ORDER BY school_id, academic_year, class"):
+        row = _with_rates(row)
+        classes.setdefault((row.pop('school_id'), row.pop('academic_year')), []).append(row)
+    for year in years:
+        year['classes'] = classes.get((year['school_id'], year['academic_year']), [])
+    stats['years'] = years
+    return stats
+
+init_registry()
+
+def get_school_folder(school_id, academic_year):
+    return os.path.join(DATA_DIR, school_id, academic_year)
+
+_write_lock = threading.Lock()
+
+@contextmanager
+def school_write_lock(school_folder):
+    """Serialize writers (uploads, corrections) of one school/year across threads and workers"""
+    os.makedirs(school_folder, exist_ok=True)
+    with open(os.path.join(school_folder, '.write.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            _write_lock.acquire()
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                _write_lock.release()
+
+def get_school_name(school_id):
+    school = get_school(school_id)
+    return school['name'] if school is not None else "Unknown School"
+
+# Columnar term store
+# Each uploaded term sheet is converted once into <term>.npz next to the
+# original <term>.xlsx, so result lookups never have to run openpyxl.
+def get_term_store_path(school_folder, term):
+    return os.path.join(school_folder, f"{term}.npz")
+
+def term_data_exists(school_folder, term):
+    return (os.path.exists(get_term_store_path(school_folder, term)) or
+            os.path.exists(os.path.join(school_folder, f"{term}.xlsx")))
+
+def _temp_path(path):
+    """A temp file next to path that no other process or thread writes, for os.replace"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def save_term_store(df, store_path):
+    """Write a term sheet DataFrame to a compact .npz columnar store"""
+    import numpy as np
+    
+    arrays = {'columns': np.array([str(col) for col in df.columns])}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if values.dtype.kind in 'biuf':
+            arrays[f'col{i}'] = values.to_numpy()
+        else:
+            # Text columns are stored as fixed-width unicode plus a null mask
+            # so the store can be loaded without pickle
+            nulls = values.isna().to_numpy()
+            arrays[f'col{i}'] = values.where(~nulls, '').astype(str).to_numpy(dtype=str)
+            arrays[f'null{i}'] = nulls
+    
+    tmp_path = _temp_path(store_path)
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, store_path)
+
+def read_term_store(store_path):
+    """Read a term sheet back from its .npz columnar store"""
+    import numpy as np
+    import pandas as pd
+    
+    with np.load(store_path) as data:
+        columns = data['columns'].tolist()
+        frame = {}
+        for i, col in enumerate(columns):
+            values = data[f'col{i}']
+            if f'null{i}' in data.files:
+                values = values.astype(object)
+                values[data[f'null{i}']] = np.nan
+            frame[col] = values
+    return pd.DataFrame(frame, columns=columns)
+
+def update_term_store(store_path, cells):
+    """Rewrite a term's .npz store with (row, column, mark) cells changed; a NaN mark is a blank"""
+    import numpy as np
+    
+    with np.load(store_path) as data:
+        arrays = {name: data[name] for name in data.files}
+    columns = arrays['columns'].tolist()
+    for row, column, mark in cells:
+        i = columns.index(column)
+        values = arrays[f'col{i}']
+        if f'null{i}' in arrays:
+            # Text column (e.g. converted from an old sheet with 'AB' entries)
+            text = '' if math.isnan(mark) else str(mark)
+            if len(text) > values.dtype.itemsize // 4:
+                values = values.astype(f'<U{len(text)}')
+            values[row] = text
+            arrays[f'null{i}'][row] = math.isnan(mark)
+        else:
+            if values.dtype.kind != 'f':
+                values = values.astype(np.float64)
+            values[row] = mark
+        arrays[f'col{i}'] = values
+    
+    tmp_path = _temp_path(store_path)
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, store_path)
+
+def load_term_data(school_folder, term):
+    """Load a term sheet, falling back to the xlsx (and converting it) if the store is missing"""
+    store_path = get_term_store_path(school_folder, term)
+    excel_path = os.path.join(school_folder, f"{term}.xlsx")
+    
+    if os.path.exists(store_path) and (not os.path.exists(excel_path) or
+                                       os.path.getmtime(store_path) >= os.path.getmtime(excel_path)):
+        with span('read_term_store'):
+            record_bytes_read('read_term_store', os.path.getsize(store_path))
+            return read_term_store(store_path)
+    
+    import pandas as pd
+    with span('read_excel'):
+        record_bytes_read('read_excel', os.path.getsize(excel_path))
+        df = pd.read_excel(excel_path)
+    try:
+        save_term_store(df, store_path)
+    except OSError:
+        pass
+    return df
+
+# Excel ingestion
+# Uploaded workbooks are streamed row by row with openpyxl's read-only mode,
+# validated, and written column by column to spool files so memory stays
+# bounded; the .npz store is assembled from the spool files at the end.
+MAX_MARKS_PER_TERM = 20
+MAX_REPORTED_ERRORS = 200
+INGEST_CHUNK_ROWS = 1024
+
+def _normalize_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def _normalize_mark(value):
+    """Return (mark, error) for a marks cell; blank cells are NaN"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return math.nan, None
+    if isinstance(value, bool):
+        return None, f"invalid mark {value!r}"
+    try:
+        mark = float(value)
+    except (TypeError, ValueError):
+        return None, f"invalid mark {value!r}"
+    if not 0 <= mark <= MAX_MARKS_PER_TERM:
+        return None, f"mark {value!r} is outside 0-{MAX_MARKS_PER_TERM}"
+    return mark, None
+
+class TermStoreWriter:
+    """Writes a normalized term sheet to the .npz store without holding it in memory
+    
+    Metadata columns are text, every other column is a float64 marks column.
+    Values are appended in chunks to one spool file per column.
+    """
+    
+    def __init__(self, columns, spool_dir):
+        self.columns = columns
+        self.text = [col in METADATA_COLUMNS for col in columns]
+        self.spools = [open(os.path.join(spool_dir, f"col{i}"), 'w+b') for i in range(len(columns))]
+        self.text_widths = [1] * len(columns)
+        self.pending = []
+        self.rows = 0
+    
+    def append(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= INGEST_CHUNK_ROWS:
+            self.flush()
+    
+    def flush(self):
+        import numpy as np
+        if not self.pending:
+            return
+        for i, spool in enumerate(self.spools):
+            values = [row[i] for row in self.pending]
+            if self.text[i]:
+                self.text_widths[i] = max(self.text_widths[i], max(len(value) for value in values))
+                spool.write(''.join(json.dumps(value) + '\n' for value in values).encode('utf-8'))
+            else:
+                spool.write(np.asarray(values, dtype=np.float64).tobytes())
+        self.rows += len(self.pending)
+        self.pending = []
+    
+    def write_store(self, store_path):
+        import numpy as np
+        self.flush()
+        tmp_path = _temp_path(store_path)
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            with archive.open('columns.npy', 'w') as member:
+                np.lib.format.write_array(member, np.array([str(col) for col in self.columns]))
+            for i, spool in enumerate(self.spools):
+                spool.seek(0)
+                if self.text[i]:
+                    dtype = np.dtype(f'<U{self.text_widths[i]}')
+                else:
+                    dtype = np.dtype(np.float64)
+                header = {'descr': np.lib.format.dtype_to_descr(dtype),
+                          'fortran_order': False, 'shape': (self.rows,)}
+                with archive.open(f'col{i}.npy', 'w', force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(member, header)
+                    if self.text[i]:
+                        while True:
+                            lines = spool.readlines(1024 * 1024)
+                            if not lines:
+                                break
+                            values = [json.loads(line) for line in lines]
+                            member.write(np.array(values, dtype=dtype).tobytes())
+                    else:
+                        shutil.copyfileobj(spool, member)
+        os.replace(tmp_path, store_path)
+    
+    def close(self):
+        for spool in self.spools:
+            spool.close()
+
+def ingest_term_workbook(source, store_path):
+    """Stream, validate and normalize an uploaded term workbook into its .npz store
+    
+    Returns (student_count, errors) where errors is a list of
+    {'row', 'column', 'message'} dicts. Nothing is written if any row fails.
+    """
+    errors = []
+    error_count = 0
+    
+    def report(row_number, column, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'row': row_number, 'column': column, 'message': message})
+    
+    import openpyxl
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return 0, [{'row': 1, 'column': None, 'message': "The sheet is empty"}]
+        
+        # Header: required metadata columns plus any number of subject columns
+        positions = [(i, _normalize_text(name)) for i, name in enumerate(header) if _normalize_text(name)]
+        columns = [name for _, name in positions]
+        missing = [col for col in METADATA_COLUMNS if col not in columns]
+        duplicated = sorted({col for col in columns if columns.count(col) > 1})
+        if missing or duplicated:
+            for col in missing:
+                report(1, col, "required column is missing")
+            for col in duplicated:
+                report(1, col, "column appears more than once")
+            return 0, errors
+        
+        metadata = {col: columns.index(col) for col in METADATA_COLUMNS}
+        subject_columns = set(columns) - set(METADATA_COLUMNS)
+        seen_rolls = {}
+        checked_classes = set()
+        
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(store_path) or None) as spool_dir:
+            writer = TermStoreWriter(columns, spool_dir)
+            try:
+                for row_number, raw in enumerate(rows, start=2):
+                    cells = [raw[i] if i < len(raw) else None for i, _ in positions]
+                    if all(cell is None or cell == '' for cell in cells):
+                        continue
+                    
+                    row = [None] * len(columns)
+                    row_ok = True
+                    for col, index in metadata.items():
+                        row[index] = _normalize_text(cells[index])
+                        if not row[index] and col != 'Sec':
+                            report(row_number, col, "value is required")
+                            row_ok = False
+                    
+                    roll = row[metadata['Roll #']]
+                    if roll:
+                        if roll in seen_rolls:
+                            report(row_number, 'Roll #', f"duplicate roll number {roll} (first seen on row {seen_rolls[roll]})")
+                            row_ok = False
+                        else:
+                            seen_rolls[roll] = row_number
+                    
+                    student_class = row[metadata['Class']]
+                    if student_class in SUBJECTS_MAPPING and student_class not in checked_classes:
+                        checked_classes.add(student_class)
+                        for subject in SUBJECTS_MAPPING[student_class]:
+                            if subject not in subject_columns:
+                                report(row_number, subject, f"column required for class {student_class} is missing")
+                                row_ok = False
+                    
+                    for index, col in enumerate(columns):
+                        if col in METADATA_COLUMNS:
+                            continue
+                        mark, message = _normalize_mark(cells[index])
+                        if message:
+                            report(row_number, col, message)
+                            row_ok = False
+                        row[index] = mark
+                    
+                    if row_ok and not error_count:
+                        writer.append(row)
+                
+                if error_count:
+                    if error_count > len(errors):
+                        errors.append({'row': None, 'column': None,
+                                       'message': f"... and {error_count - len(errors)} more errors"})
+                    return 0, errors
+                
+                writer.write_store(store_path)
+                return writer.rows, []
+            finally:
+                writer.close()
+    finally:
+        workbook.close()
+
+# In-process term index cache
+def _parse_mark(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return math.nan
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class TermIndex:
+    """Roll number index and numeric marks matrix for one term sheet"""
+    
+    def __init__(self, df, signature):
+        import numpy as np
+        df['Roll #'] = df['Roll #'].astype(str)
+        self.df = df
+        self.signature = signature
+        
+        # First occurrence wins, matching the old boolean filter + iloc[0]
+        self.roll_index = {}
+        for position, roll in enumerate(df['Roll #'].tolist()):
+            self.roll_index.setdefault(roll, position)
+        
+        # Marks as floats, NaN where the cell is blank or not a number
+        self.subjects = [col for col in df.columns if col not in METADATA_COLUMNS]
+        self.subject_positions = {subject: i for i, subject in enumerate(self.subjects)}
+        self.marks = np.full((len(df), len(self.subjects)), np.nan)
+        for i, subject in enumerate(self.subjects):
+            column = df[subject]
+            if column.dtype.kind in 'biuf':
+                self.marks[:, i] = column.to_numpy(dtype=float)
+            else:
+                self.marks[:, i] = [_parse_mark(value) for value in column.tolist()]
+        
+        self.nbytes = (int(df.memory_usage(deep=True).sum()) + self.marks.nbytes +
+                       len(self.roll_index) * 100)
+    
+    def student(self, roll_number):
+        """Return the student's row as a one-row DataFrame (empty if not found)"""
+        position = self.roll_index.get(roll_number)
+        if position is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[position:position + 1]
+
+class FileCache:
+    """LRU cache of objects built from files, bounded by an approximate memory budget
+    
+    Entries are rebuilt when their data generation changes or, for data never
+    uploaded through the app (generation 0), when the mtime/size signature of
+    their source files changes. Cached objects must expose ``signature`` and
+    ``nbytes`` attributes. Concurrent misses for the same key and generation
+    are coalesced: one thread loads while the others wait for its entry.
+    """
+    
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.loading = {}
+    
+    def get(self, key, paths, loader, generation=0):
+        with self.lock:
+            cached = self.entries.get(key)
+        if cached is not None:
+            cached_generation, entry = cached
+            if generation:
+                fresh = cached_generation == generation
+            else:
+                fresh = not cached_generation and entry.signature == tuple(_file_signature(path) for path in paths)
+            if fresh:
+                with self.lock:
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+                record_cache(self.name, True)
+                return entry
+        
+        record_cache(self.name, False)
+        with self.lock:
+            flight = self.loading.get((key, generation))
+            leader = flight is None
+            if leader:
+                flight = self.loading[(key, generation)] = {'done': threading.Event()}
+        if not leader:
+            metrics.inc('portal_cache_coalesced_total', (('cache', self.name),), 1,
+                        "Cache misses that waited for another thread's load instead of loading")
+            flight['done'].wait()
+            if 'error' in flight:
+                raise flight['error']
+            return flight['entry']
+        
+        try:
+            entry = flight['entry'] = loader()
+            if entry is not None:
+                self.put(key, entry, generation)
+            return entry
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.loading[(key, generation)]
+            flight['done'].set()
+    
+    def put(self, key, entry, generation=0):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1].nbytes
+            if entry.nbytes > self.max_bytes:
+                return
+            self.entries[key] = (generation, entry)
+            self.total_bytes += entry.nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+    
+    def discard(self, key):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1].nbytes
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+term_cache = FileCache('term', TERM_CACHE_MAX_BYTES)
+results_cache = FileCache('results', RESULTS_CACHE_MAX_BYTES)
+
+def _term_source_paths(school_folder, term):
+    return (get_term_store_path(school_folder, term), os.path.join(school_folder, f"{term}.xlsx"))
+
+def get_term_index(school_folder, term):
+    """Return the cached TermIndex for a term sheet, loading it if needed"""
+    paths = _term_source_paths(school_folder, term)
+    
+    def loader():
+        df = load_term_data(school_folder, term)
+        # Sign after loading, since the load may have written the .npz store
+        return TermIndex(df, tuple(_file_signature(path) for path in paths))
+    
+    return term_cache.get((school_folder, term), paths, loader, data_generation(school_folder))
+
+def compute_student_result(term1, term2, roll_number):
+    """Look up a student in both term indexes and calculate the combined result"""
+    student1 = term1.student(roll_number)
+    student2 = term2.student(roll_number)
+    
+    if student1.empty and student2.empty:
+        return None
+    
+    student_row = student1 if not student1.empty else student2
+    name = student_row['Student Name'].iloc[0]
+    student_class = str(student_row['Class'].iloc[0])
+    section = student_row['Sec'].iloc[0] if 'Sec' in student_row.columns else None
+    
+    # Get subjects based on class
+    if student_class in SUBJECTS_MAPPING:
+        subjects_list = SUBJECTS_MAPPING[student_class]
+    else:
+        subjects_list = term1.subjects
+    
+    # Calculate complete result
+    with span('calculate_student_result'):
+        result_data = calculate_student_result(student1, student2, subjects_list)
+    result_data.update({
+        'name': _to_python(name),
+        'roll': roll_number,
+        'class': student_class,
+        'section': _to_python(section)
+    })
+    return result_data
+
+# Materialized results
+# Once both terms exist, every student's combined result is computed in one
+# vectorized pass and stored in results.json, keyed by roll number.
+RESULTS_FILE = "results.json"
+
+# Subject columns shared by every results table, in SUBJECTS_MAPPING order;
+# subjects only found in a school's sheets are appended per table
+SUBJECT_POSITIONS = {subject: i for i, subject in enumerate(
+    dict.fromkeys(subject for subjects in SUBJECTS_MAPPING.values() for subject in subjects))}
+BLANK_MARK = -1
+
+class StudentRecord:
+    """One student's materialized result; marks and scores live in the owning ResultsTable"""
+    __slots__ = ('roll', 'name', 'student_class', 'section', 'row', 'rank', 'class_size')
+
+class ResultsTable:
+    """Materialized results for one school/year, keyed by roll number
+    
+    Stored compactly so a worker can keep many schools resident: a __slots__
+    record per student with interned class/section strings, term marks in an
+    int8 matrix of half marks by subject position (float64 if any mark does
+    not fit), and totals/percentages in a float64 matrix. Result dicts are
+    rebuilt on lookup, identical to the ones compute_all_results produced.
+    """
+    
+    def __init__(self, students, subjects, signature):
+        import numpy as np
+        self.signature = signature
+        # Subject order for classes missing from SUBJECTS_MAPPING (the 1st term's columns)
+        self.subjects = subjects
+        self.subject_positions = dict(SUBJECT_POSITIONS)
+        half_marks = True
+        for result in students.values():
+            for subject, marks in result['subjects'].items():
+                self.subject_positions.setdefault(subject, len(self.subject_positions))
+                for mark in (marks['term1'], marks['term2']):
+                    # Blank marks are the integer 0, real marks are floats
+                    if isinstance(mark, float) and not (0 <= mark <= 63.5 and (mark * 2).is_integer()):
+                        half_marks = False
+        
+        shape = (len(students), len(self.subject_positions), 2)
+        if half_marks:
+            self.marks = np.full(shape, BLANK_MARK, dtype=np.int8)
+        else:
+            self.marks = np.full(shape, np.nan)
+        self.present = np.zeros(shape[:2], dtype=bool)
+        # total1, total2, percent1, percent2, combined_percent; NaN where the value is the integer 0
+        self.scores = np.full((len(students), 5), np.nan)
+        
+        self.records = {}
+        nbytes = 0
+        for row, (roll, result) in enumerate(students.items()):
+            for subject, marks in result['subjects'].items():
+                column = self.subject_positions[subject]
+                self.present[row, column] = True
+                for term, mark in enumerate((marks['term1'], marks['term2'])):
+                    if isinstance(mark, float):
+                        self.marks[row, column, term] = mark * 2 if half_marks else mark
+            for i, key in enumerate(('total1', 'total2', 'percent1', 'percent2', 'combined_percent')):
+                if isinstance(result[key], float):
+                    self.scores[row, i] = result[key]
+            
+            record = StudentRecord()
+            record.roll = roll
+            record.name = result['name']
+            record.student_class = sys.intern(result['class'])
+            section = result.get('section')
+            record.section = sys.intern(section) if isinstance(section, str) else section
+            record.row = row
+            record.rank = result.get('rank')
+            record.class_size = result.get('class_size')
+            self.records[roll] = record
+            nbytes += sys.getsizeof(record) + sys.getsizeof(roll) + sys.getsizeof(record.name)
+        self.nbytes = nbytes + sys.getsizeof(self.records) + self.marks.nbytes + self.present.nbytes + self.scores.nbytes
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def get(self, roll):
+        record = self.records.get(roll)
+        return self.result(record) if record is not None else None
+    
+    def select(self, rolls=None, student_class=None, section=None):
+        """Records for the given roll numbers (in order, unknown ones skipped) or all
+        students, optionally filtered by class and section"""
+        if rolls is None:
+            records = self.records.values()
+        else:
+            records = (self.records[roll] for roll in rolls if roll in self.records)
+        return [record for record in records
+                if (not student_class or record.student_class == student_class) and
+                   (not section or str(record.section) == section)]
+    
+    def result(self, record):
+        """Rebuild a student's result dict from its record"""
+        row = record.row
+        present = self.present[row].tolist()
+        marks = self.marks[row].tolist()
+        half_marks = self.marks.dtype.kind == 'i'
+        subjects_data = {}
+        for subject in SUBJECTS_MAPPING.get(record.student_class, self.subjects):
+            column = self.subject_positions.get(subject)
+            if column is None or not present[column]:
+                continue
+            term_marks = []
+            for mark in marks[column]:
+                if half_marks:
+                    term_marks.append(0 if mark == BLANK_MARK else mark / 2)
+                else:
+                    term_marks.append(0 if math.isnan(mark) else mark)
+            subjects_data[subject] = {
+                'term1': term_marks[0],
+                'term2': term_marks[1],
+                'total': term_marks[0] + term_marks[1]
+            }
+        
+        total1, total2, percent1, percent2, combined = (0 if math.isnan(value) else value
+                                                        for value in self.scores[row].tolist())
+        result = {
+            'subjects': subjects_data,
+            'total1': total1,
+            'total2': total2,
+            'percent1': percent1,
+            'percent2': percent2,
+            'combined_percent': combined,
+            'name': record.name,
+            'roll': record.roll,
+            'class': record.student_class,
+            'section': record.section
+        }
+        if record.rank is not None:
+            result['rank'] = record.rank
+            result['class_size'] = record.class_size
+        return result
+
+def _to_python(value):
+    import numpy as np
+    return value.item() if isinstance(value, np.generic) else value
+
+def _term_marks(term, positions, subject):
+    """Marks for one subject at the given row positions (NaN where missing)"""
+    import numpy as np
+    marks = np.full(len(positions), np.nan)
+    column = term.subject_positions.get(subject)
+    if column is not None:
+        present = positions >= 0
+        marks[present] = term.marks[positions[present], column]
+    return marks
+
+def _column_at(term, column, positions):
+    """Values of a metadata column at the given row positions (None where missing)"""
+    import numpy as np
+    values = np.empty(len(positions), dtype=object)
+    if column not in term.df.columns:
+        return values
+    present = positions >= 0
+    values[present] = term.df[column].to_numpy(dtype=object)[positions[present]]
+    return values
+
+def compute_all_results(term1, term2):
+    """Compute every student's combined result in one pass over both terms
+    
+    Matches calculate_student_result exactly: blank or non-numeric marks count
+    as 0, a subject counts only if one of its term marks is greater than 0,
+    and each term is out of 20 marks per subject.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    rolls = list(term1.roll_index)
+    rolls += [roll for roll in term2.roll_index if roll not in term1.roll_index]
+    positions1 = np.array([term1.roll_index.get(roll, -1) for roll in rolls], dtype=np.int64)
+    positions2 = np.array([term2.roll_index.get(roll, -1) for roll in rolls], dtype=np.int64)
+    
+    # Name and class come from the 1st term row when the student has one
+    in_term1 = positions1 >= 0
+    names = np.where(in_term1, _column_at(term1, 'Student Name', positions1),
+                     _column_at(term2, 'Student Name', positions2))
+    classes = np.where(in_term1, _column_at(term1, 'Class', positions1),
+                       _column_at(term2, 'Class', positions2))
+    classes = np.array([str(value) for value in classes.tolist()], dtype=object)
+    sections = np.where(in_term1, _column_at(term1, 'Sec', positions1),
+                        _column_at(term2, 'Sec', positions2))
+    
+    results = {}
+    for student_class in pd.unique(classes):
+        members = np.flatnonzero(classes == student_class)
+        subjects_list = SUBJECTS_MAPPING.get(student_class, term1.subjects)
+        pos1 = positions1[members]
+        pos2 = positions2[members]
+        
+        total1 = np.zeros(len(members))
+        total2 = np.zeros(len(members))
+        valid_count = np.zeros(len(members), dtype=np.int64)
+        # A term total stays the integer 0 until a real (non-blank) mark is added
+        total1_is_float = np.zeros(len(members), dtype=bool)
+        total2_is_float = np.zeros(len(members), dtype=bool)
+        subject_marks = []
+        
+        for subject in subjects_list:
+            marks1 = _term_marks(term1, pos1, subject)
+            marks2 = _term_marks(term2, pos2, subject)
+            missing1 = np.isnan(marks1)
+            missing2 = np.isnan(marks2)
+            marks1[missing1] = 0
+            marks2[missing2] = 0
+            valid = (marks1 > 0) | (marks2 > 0)
+            
+            # Accumulate subject by subject to keep the same float summation order
+            total1 += np.where(valid, marks1, 0)
+            total2 += np.where(valid, marks2, 0)
+            valid_count += valid
+            total1_is_float |= valid & ~missing1
+            total2_is_float |= valid & ~missing2
+            subject_marks.append((subject, valid, marks1, marks2, missing1, missing2))
+        
+        max_marks_term = valid_count * 20
+        max_marks_combined = valid_count * 40
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio1 = (total1 / max_marks_term) * 100
+            ratio2 = (total2 / max_marks_term) * 100
+            ratio_combined = ((total1 + total2) / max_marks_combined) * 100
+        
+        for i, member in enumerate(members.tolist()):
+            subjects_data = {}
+            for subject, valid, marks1, marks2, missing1, missing2 in subject_marks:
+                if valid[i]:
+                    term1_mark = 0 if missing1[i] else float(marks1[i])
+                    term2_mark = 0 if missing2[i] else float(marks2[i])
+                    subjects_data[subject] = {
+                        'term1': term1_mark,
+                        'term2': term2_mark,
+                        'total': term1_mark + term2_mark
+                    }
+            
+            has_subjects = valid_count[i] > 0
+            results[rolls[member]] = {
+                'subjects': subjects_data,
+                'total1': float(total1[i]) if total1_is_float[i] else 0,
+                'total2': float(total2[i]) if total2_is_float[i] else 0,
+                'percent1': round(float(ratio1[i]), 2) if has_subjects else 0,
+                'percent2': round(float(ratio2[i]), 2) if has_subjects else 0,
+                'combined_percent': round(float(ratio_combined[i]), 2) if has_subjects else 0,
+                'name': _to_python(names[member]),
+                'roll': rolls[member],
+                'class': student_class,
+                'section': _to_python(sections[member])
+            }
+    
+    return results
+
+def _write_json_atomic(path, payload):
+    tmp_path = _temp_path(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+def materialize_results(school_folder):
+    """Compute and store results.json and analytics.json for a school/year once both terms exist"""
+    if not term_data_exists(school_folder, "1st_term") or not term_data_exists(school_folder, "2nd_term"):
+        return None
+    
+    term1 = get_term_index(school_folder, "1st_term")
+    term2 = get_term_index(school_folder, "2nd_term")
+    with span('compute_all_results'):
+        results = compute_all_results(term1, term2)
+    with span('compute_analytics'):
+        analytics = compute_analytics(results)
+    
+    _write_json_atomic(os.path.join(school_folder, ANALYTICS_FILE), analytics)
+    _write_json_atomic(os.path.join(school_folder, RESULTS_FILE), {
+        'sources': {'1st_term': _signature_to_json(term1.signature),
+                    '2nd_term': _signature_to_json(term2.signature)},
+        'subjects': term1.subjects,
+        'students': results
+    })
+    return results
+
+def _signature_to_json(signature):
+    return [list(part) if part is not None else None for part in signature]
+
+def _read_results_table(school_folder):
+    results_path = os.path.join(school_folder, RESULTS_FILE)
+    signature = (_file_signature(results_path),)
+    if signature[0] is None:
+        return None
+    with span('read_results'):
+        with open(results_path, 'r') as f:
+            payload = json.load(f)
+    record_bytes_read('read_results', signature[0][1])
+    
+    # Ignore a table built from term files that have since changed, or
+    # written before the subject order was stored
+    if 'subjects' not in payload:
+        return None
+    for term in ("1st_term", "2nd_term"):
+        current = tuple(_file_signature(path) for path in _term_source_paths(school_folder, term))
+        if payload['sources'].get(term) != _signature_to_json(current):
+            return None
+    with span('build_results_table'):
+        return ResultsTable(payload['students'], payload['subjects'], signature)
+
+def get_results_table(school_folder):
+    """Return the materialized results for a school/year, rebuilding them if stale"""
+    results_path = os.path.join(school_folder, RESULTS_FILE)
+    
+    def loader():
+        # Materialized inside the load, so a burst of requests for stale results computes them once
+        table = _read_results_table(school_folder)
+        if table is None and materialize_results(school_folder) is not None:
+            table = _read_results_table(school_folder)
+        return table
+    
+    return results_cache.get((school_folder, RESULTS_FILE), (results_path,), loader, data_generation(school_folder))
+
+def find_student_result(school_folder, roll_number):
+    """Return a student's combined result from the materialized results table"""
+    table = get_results_table(school_folder)
+    if table is None:
+        return None
+    with span('result_lookup'):
+        return table.get(roll_number)
+
+def calculate_student_result(student1, student2, subjects_list):
+    """Calculate student result from both terms"""
+    import pandas as pd
+    subjects_data = {}
+    total_term1 = 0
+    total_term2 = 0
+    valid_subjects_count = 0
+    
+    for subject in subjects_list:
+        term1_mark = 0
+        term2_mark = 0
+        
+        if not student1.empty and subject in student1.columns:
+            try:
+                term1_mark = float(student1[subject].iloc[0])
+                if pd.isna(term1_mark):
+                    term1_mark = 0
+            except:
+                term1_mark = 0
+        
+        if not student2.empty and subject in student2.columns:
+            try:
+                term2_mark = float(student2[subject].iloc[0])
+                if pd.isna(term2_mark):
+                    term2_mark = 0
+            except:
+                term2_mark = 0
+        
+        if term1_mark > 0 or term2_mark > 0:
+            subjects_data[subject] = {
+                'term1': term1_mark,
+                'term2': term2_mark,
+                'total': term1_mark + term2_mark
+            }
+            total_term1 += term1_mark
+            total_term2 += term2_mark
+            valid_subjects_count += 1
+    
+    # Calculate percentages
+    max_marks_term1 = valid_subjects_count * 20
+    max_marks_term2 = valid_subjects_count * 20
+    max_marks_combined = valid_subjects_count * 40
+    
+    percent1 = round((total_term1 / max_marks_term1) * 100, 2) if max_marks_term1 > 0 else 0
+    percent2 = round((total_term2 / max_marks_term2) * 100, 2) if max_marks_term2 > 0 else 0
+    combined_percent = round(((total_term1 + total_term2) / max_marks_combined) * 100, 2) if max_marks_combined > 0 else 0
+    
+    return {
+        'subjects': subjects_data,
+        'total1': total_term1,
+        'total2': total_term2,
+        'percent1': percent1,
+        'percent2': percent2,
+        'combined_percent': combined_percent
+    }
+
+def create_pdf_report(student_data, school_name, academic_year):
+    """Create professional PDF report with fpdf (the reference layout for render_report_card)"""
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    
+    # Header
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'SCHOOL REPORT CARD', 0, 1, 'C')
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, school_name, 0, 1, 'C')
+    pdf.cell(0, 10, f'Academic Year: {academic_year}', 0, 1, 'C')
+    pdf.ln(5)
+    
+    # Student Details
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 8, 'Student Information:', 0, 1)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f"Name: {student_data['name']}", 0, 1)
+    pdf.cell(0, 8, f"Roll No: {student_data['roll']}", 0, 1)
+    pdf.cell(0, 8, f"Class: {student_data['class']}", 0, 1)
+    pdf.ln(5)
+    
+    # Marks Table
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(80, 10, 'Subject', 1, 0, 'C')
+    pdf.cell(35, 10, '1st Term', 1, 0, 'C')
+    pdf.cell(35, 10, '2nd Term', 1, 0, 'C')
+    pdf.cell(35, 10, 'Total', 1, 1, 'C')
+    
+    pdf.set_font('Arial', '', 12)
+    for subject, marks in student_data['subjects'].items():
+        pdf.cell(80, 10, subject, 1, 0)
+        pdf.cell(35, 10, str(marks['term1']), 1, 0, 'C')
+        pdf.cell(35, 10, str(marks['term2']), 1, 0, 'C')
+        pdf.cell(35, 10, str(marks['total']), 1, 1, 'C')
+    
+    # Totals
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(80, 10, 'TOTAL', 1, 0)
+    pdf.cell(35, 10, str(student_data['total1']), 1, 0, 'C')
+    pdf.cell(35, 10, str(student_data['total2']), 1, 0, 'C')
+    pdf.cell(35, 10, str(student_data['total1'] + student_data['total2']), 1, 1, 'C')
+    
+    pdf.ln(5)
+    
+    # Performance Summary
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Performance Summary:', 0, 1)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f"1st Term Percentage: {student_data['percent1']}%", 0, 1)
+    pdf.cell(0, 8, f"2nd Term Percentage: {student_data['percent2']}%", 0, 1)
+    pdf.cell(0, 8, f"Combined Percentage: {student_data['combined_percent']}%", 0, 1)
+    
+    # Footer
+    pdf.ln(15)
+    pdf.cell(0, 8, "Principal Signature: ___________________", 0, 1)
+    pdf.cell(0, 8, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", 0, 1)
+    
+    return pdf
+
+def report_card_filename(school_id, roll_number, academic_year):
+    return f"ReportCard_{school_id}_{roll_number}_{academic_year}.pdf"
+
+# Report card renderer
+# Cards are written as PDF directly instead of through fpdf. The layout that is
+# the same for every card (header, labels, table grid, subject names, signature
+# line) is rendered once per school, year and subject list into content stream
+# bytes, and each card only adds its student's values. Cell geometry follows
+# fpdf (A4, 10mm margins, text placement), so cards look like create_pdf_report's.
+PDF_UNIT = 72 / 25.4  # Points per mm
+PDF_MARGIN = 10.0
+PDF_BOTTOM_MARGIN = 20.0  # fpdf's automatic page break margin
+PDF_CELL_MARGIN = 1.0
+PDF_LINE_WIDTH = 0.2
+A4_PORTRAIT = (210.0, 297.0)
+A4_LANDSCAPE = (297.0, 210.0)
+REPORT_CARD_VERSION = 2  # Part of the PDF cache key; bump when the card layout changes
+
+_core_font_widths = {}
+
+def _pdf_text(text):
+    """Encode text for the core fonts (WinAnsi), replacing characters they cannot show"""
+    return str(text).encode('cp1252', 'replace')
+
+def _pdf_text_width(encoded, bold, size):
+    """Width in mm of encoded text set in Helvetica at size points"""
+    widths = _core_font_widths.get(bold)
+    if widths is None:
+        from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+        table = CORE_FONTS_CHARWIDTHS['helveticaB' if bold else 'helvetica']
+        widths = _core_font_widths[bold] = [table[chr(code)] for code in range(256)]
+    return sum(widths[code] for code in encoded) * size / 1000 / PDF_UNIT
+
+def pdf_text_op(text, x, y, w, h, align, bold, size, page_height):
+    """Content stream operator drawing text in the cell at (x, y), placed the way fpdf places it"""
+    encoded = _pdf_text(text)
+    if align == 'C':
+        dx = (w - _pdf_text_width(encoded, bold, size)) / 2
+    elif align == 'R':
+        dx = w - PDF_CELL_MARGIN - _pdf_text_width(encoded, bold, size)
+    else:
+        dx = PDF_CELL_MARGIN
+    baseline = page_height - y - 0.5 * h - 0.3 * size / PDF_UNIT
+    escaped = encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b"BT /F%d %.2f Tf %.2f %.2f Td (%s) Tj ET\n" % (
+        2 if bold else 1, size, (x + dx) * PDF_UNIT, baseline * PDF_UNIT, escaped)
+
+class PdfCanvas:
+    """fpdf-style cell cursor for one page, emitting PDF content stream operators
+    
+    Positions are in mm from the top-left corner, like fpdf's. Only what report
+    cards and registers need is supported: Helvetica regular/bold, bordered or
+    plain cells, left/centre/right aligned single-line text.
+    """
+    def __init__(self, page_size=A4_PORTRAIT):
+        self.page_width, self.page_height = page_size
+        self.x = self.y = PDF_MARGIN
+        self.bold, self.size = False, 12
+        self.ops = [b"2 J\n%.2f w\n" % (PDF_LINE_WIDTH * PDF_UNIT)]
+    
+    def set_font(self, bold, size):
+        self.bold, self.size = bold, size
+    
+    def cell_width(self, w):
+        return w or self.page_width - PDF_MARGIN - self.x
+    
+    def fits(self, h):
+        return self.y + h <= self.page_height - PDF_BOTTOM_MARGIN
+    
+    def rect(self, w, h):
+        self.ops.append(b"%.2f %.2f %.2f %.2f re S\n" % (
+            self.x * PDF_UNIT, (self.page_height - self.y - h) * PDF_UNIT, w * PDF_UNIT, h * PDF_UNIT))
+    
+    def cell(self, w, h, text='', border=False, ln=False, align='L'):
+        w = self.cell_width(w)
+        if border:
+            self.rect(w, h)
+        if text != '':
+            self.ops.append(pdf_text_op(text, self.x, self.y, w, h, align, self.bold, self.size, self.page_height))
+        self.advance(w, h, ln)
+    
+    def advance(self, w, h, ln):
+        if ln:
+            self.ln(h)
+        else:
+            self.x += w
+    
+    def ln(self, h):
+        self.x = PDF_MARGIN
+        self.y += h
+    
+    def content(self):
+        return b''.join(self.ops)
+
+class PdfWriter:
+    """Minimal streaming PDF writer: core Helvetica fonts, one content stream per page
+    
+    Each page is written to out as soon as it is added, and the page tree and
+    cross-reference table at close(), so memory does not grow with page count.
+    """
+    def __init__(self, out, page_size=A4_PORTRAIT):
+        self.out = out
+        self.offset = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 6
+        self.media_box = b"[0 0 %.2f %.2f]" % (page_size[0] * PDF_UNIT, page_size[1] * PDF_UNIT)
+        # 1 is the catalog and 2 the page tree, both written at close()
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+        self._object(5, b"<< /Font << /F1 3 0 R /F2 4 0 R >> >>")
+    
+    def _write(self, data):
+        self.out.write(data)
+        self.offset += len(data)
+    
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.offset
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+    
+    def add_page(self, content):
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self.offsets[content_id] = self.offset
+        self._write(b"%d 0 obj\n<< /Length %d >>\nstream\n" % (content_id, len(content)))
+        self._write(content)
+        self._write(b"\nendstream\nendobj\n")
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Resources 5 0 R /Contents %d 0 R >>"
+                     % (self.media_box, content_id))
+        self.page_ids.append(page_id)
+    
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self.offset
+        rows = [b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id]
+        rows.extend(b"%010d 00000 n \n" % self.offsets[object_id] for object_id in range(1, self.next_id))
+        rows.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, xref_offset))
+        self._write(b"".join(rows))
+
+class ReportCardLayout:
+    """A report card's pages for one school, year and subject list, built once
+    
+    Each page keeps its fixed content as bytes plus slots: (value function,
+    cell position and font) for the student's values drawn on top of it.
+    """
+    def __init__(self, school_name, academic_year, subjects):
+        self.pages = []
+        self.canvas = PdfCanvas()
+        self.slots = []
+        
+        self.canvas.set_font(True, 16)
+        self.cell(0, 10, 'SCHOOL REPORT CARD', ln=True, align='C')
+        self.canvas.set_font(True, 14)
+        self.cell(0, 10, school_name, ln=True, align='C')
+        self.cell(0, 10, f'Academic Year: {academic_year}', ln=True, align='C')
+        self.canvas.ln(5)
+        
+        self.canvas.set_font(True, 12)
+        self.cell(0, 8, 'Student Information:', ln=True)
+        self.canvas.set_font(False, 12)
+        self.cell(0, 8, lambda student: f"Name: {student['name']}", ln=True)
+        self.cell(0, 8, lambda student: f"Roll No: {student['roll']}", ln=True)
+        self.cell(0, 8, lambda student: f"Class: {student['class']}", ln=True)
+        self.canvas.ln(5)
+        
+        self.canvas.set_font(True, 12)
+        self.cell(80, 10, 'Subject', border=True, align='C')
+        self.cell(35, 10, '1st Term', border=True, align='C')
+        self.cell(35, 10, '2nd Term', border=True, align='C')
+        self.cell(35, 10, 'Total', border=True, ln=True, align='C')
+        self.canvas.set_font(False, 12)
+        for subject in subjects:
+            self.cell(80, 10, subject, border=True)
+            for column in ('term1', 'term2', 'total'):
+                self.cell(35, 10, lambda student, subject=subject, column=column:
+                          str(student['subjects'][subject][column]), border=True, ln=column == 'total', align='C')
+        
+        self.canvas.set_font(True, 12)
+        self.cell(80, 10, 'TOTAL', border=True)
+        self.cell(35, 10, lambda student: str(student['total1']), border=True, align='C')
+        self.cell(35, 10, lambda student: str(student['total2']), border=True, align='C')
+        self.cell(35, 10, lambda student: str(student['total1'] + student['total2']), border=True, ln=True,
+                  align='C')
+        self.canvas.ln(5)
+        
+        self.cell(0, 10, 'Performance Summary:', ln=True)
+        self.canvas.set_font(False, 12)
+        self.cell(0, 8, lambda student: f"1st Term Percentage: {student['percent1']}%", ln=True)
+        self.cell(0, 8, lambda student: f"2nd Term Percentage: {student['percent2']}%", ln=True)
+        self.cell(0, 8, lambda student: f"Combined Percentage: {student['combined_percent']}%", ln=True)
+        
+        self.canvas.ln(15)
+        self.cell(0, 8, "Principal Signature: ___________________", ln=True)
+        self.cell(0, 8, lambda student: f"Generated on: {student['generated']}", ln=True)
+        self.pages.append((self.canvas.content(), self.slots))
+        del self.canvas, self.slots
+    
+    def cell(self, w, h, text, border=False, ln=False, align='L'):
+        """Add a cell, deferring its text to render time if text is a function of the student"""
+        canvas = self.canvas
+        if not canvas.fits(h):
+            # Same automatic page break as fpdf
+            self.pages.append((canvas.content(), self.slots))
+            self.canvas, self.slots = PdfCanvas(), []
+            self.canvas.set_font(canvas.bold, canvas.size)
+            canvas = self.canvas
+        if not callable(text):
+            canvas.cell(w, h, text, border, ln, align)
+            return
+        w = canvas.cell_width(w)
+        self.slots.append((text, canvas.x, canvas.y, w, h, align, canvas.bold, canvas.size))
+        if border:
+            canvas.rect(w, h)
+        canvas.advance(w, h, ln)
+    
+    def render(self, student_data, out):
+        """Write the PDF for one student to out"""
+        student = dict(student_data, generated=datetime.now().strftime('%Y-%m-%d %H:%M'))
+        writer = PdfWriter(out)
+        for static, slots in self.pages:
+            ops = [static]
+            for value, x, y, w, h, align, bold, size in slots:
+                ops.append(pdf_text_op(value(student), x, y, w, h, align, bold, size, A4_PORTRAIT[1]))
+            writer.add_page(b''.join(ops))
+        writer.close()
+
+@lru_cache(maxsize=256)
+def get_report_card_layout(school_name, academic_year, subjects):
+    return ReportCardLayout(school_name, academic_year, subjects)
+
+def render_report_card(student_data, school_name, academic_year):
+    """Render a student's report card and return the PDF bytes"""
+    layout = get_report_card_layout(school_name, academic_year, tuple(student_data['subjects']))
+    buffer = io.BytesIO()
+    layout.render(student_data, buffer)
+    return buffer.getvalue()
+
+# Tabulation registers
+# One landscape PDF per class (or section) with a row per student: every
+# subject's term marks and total, the term totals, percentages and rank, from
+# the materialized results (calculate_student_result's numbers). Rows come from
+# a generator and each page is written out as soon as it is full, so memory
+# stays flat however many students a class has.
+REGISTER_FONT_SIZE = 8
+REGISTER_ROW_HEIGHT = 6
+
+def _roll_order(roll):
+    return (0, int(roll), roll) if roll.isdigit() else (1, 0, roll)
+
+def _fit_text(text, w, bold, size):
+    """text, shortened with a trailing '.' if it is wider than a w mm cell"""
+    text = str(text)
+    if _pdf_text_width(_pdf_text(text), bold, size) <= w - 2 * PDF_CELL_MARGIN:
+        return text
+    while text and _pdf_text_width(_pdf_text(text + '.'), bold, size) > w - 2 * PDF_CELL_MARGIN:
+        text = text[:-1]
+    return text + '.'
+
+def iter_register_rows(table, student_class, section=None):
+    """A class's results (optionally one section) in section and roll number order, built one at a time"""
+    records = table.select(student_class=student_class, section=section)
+    records.sort(key=lambda record: (_section_label(record.section), _roll_order(record.roll)))
+    for record in records:
+        yield table.result(record)
+
+class TabulationRegister:
+    """Columns and page header of a class's tabulation register, laid out once for all its pages"""
+    def __init__(self, school_name, academic_year, student_class, section, subjects):
+        width = A4_LANDSCAPE[0] - 2 * PDF_MARGIN
+        fixed = [('Roll No', 16, lambda student: student['roll'], 'C'),
+                 ('Name', 38, lambda student: student['name'], 'L'),
+                 ('Sec', 9, lambda student: _section_label(student.get('section')), 'C')]
+        totals = [('Total', ('I', 'II', 'Grand'), 11, (lambda student: student['total1'],
+                                                       lambda student: student['total2'],
+                                                       lambda student: student['total1'] + student['total2'])),
+                  ('Percentage', ('I', 'II', 'Comb.'), 12, (lambda student: student['percent1'],
+                                                            lambda student: student['percent2'],
+                                                            lambda student: student['combined_percent']))]
+        rank = ('Rank', 10, lambda student: student.get('rank', ''), 'C')
+        # Subject marks share what the other columns leave, in a font small enough for "20.0"
+        mark_width = (width - sum(column[1] for column in fixed + [rank]) -
+                      sum(3 * group[2] for group in totals)) / (3 * max(len(subjects), 1))
+        self.mark_size = min(REGISTER_FONT_SIZE, REGISTER_FONT_SIZE * (mark_width - 0.5) /
+                             _pdf_text_width(b'20.0', False, REGISTER_FONT_SIZE))
+        
+        groups = [(subject, ('I', 'II', 'Tot'), mark_width, tuple(
+            lambda student, subject=subject, column=column:
+                student['subjects'][subject][column] if subject in student['subjects'] else ''
+            for column in ('term1', 'term2', 'total'))) for subject in subjects] + totals
+        # (width, value function, align, font size) per body column, left to right
+        self.columns = ([(w, value, align, REGISTER_FONT_SIZE) for _, w, value, align in fixed] +
+                        [(w, value, 'C', self.mark_size if i < len(subjects) else REGISTER_FONT_SIZE)
+                         for i, (_, _, w, values) in enumerate(groups) for value in values] +
+                        [(rank[1], rank[2], rank[3], REGISTER_FONT_SIZE)])
+        
+        canvas = PdfCanvas(A4_LANDSCAPE)
+        canvas.set_font(True, 14)
+        canvas.cell(0, 8, 'TABULATION REGISTER', ln=True, align='C')
+        canvas.set_font(True, 12)
+        canvas.cell(0, 7, school_name, ln=True, align='C')
+        canvas.set_font(True, 10)
+        details = f"Academic Year: {academic_year}     Class: {student_class}"
+        canvas.cell(0, 6, details + (f"     Section: {section}" if section else ''), ln=True, align='C')
+        canvas.ln(3)
+        
+        # Two heading rows: single columns span both, groups put their sub-columns in the second
+        canvas.set_font(True, REGISTER_FONT_SIZE)
+        top = canvas.y
+        for title, w, _, _ in fixed:
+            canvas.cell(w, 10, title, border=True, align='C')
+        for title, sub_titles, w, _ in groups:
+            x = canvas.x
+            canvas.cell(3 * w, 5, _fit_text(title, 3 * w, True, REGISTER_FONT_SIZE), border=True, align='C')
+            canvas.x, canvas.y = x, top + 5
+            for sub_title in sub_titles:
+                canvas.cell(w, 5, sub_title, border=True, align='C')
+            canvas.y = top
+        canvas.cell(rank[1], 10, rank[0], border=True, ln=True, align='C')
+        self.header = canvas.content()
+        self.body_top = canvas.y
+    
+    def new_page(self, number):
+        canvas = PdfCanvas(A4_LANDSCAPE)
+        canvas.ops = [self.header]
+        canvas.set_font(False, REGISTER_FONT_SIZE)
+        canvas.y = canvas.page_height - PDF_BOTTOM_MARGIN + 5
+        canvas.cell(0, 5, f"Page {number}", align='R')
+        canvas.x, canvas.y = PDF_MARGIN, self.body_top
+        return canvas
+    
+    def pages(self, rows):
+        """Yield the content stream of each page, filled from the rows generator"""
+        number = 1
+        canvas = self.new_page(number)
+        for student in rows:
+            if not canvas.fits(REGISTER_ROW_HEIGHT):
+                yield canvas.content()
+                number += 1
+                canvas = self.new_page(number)
+            for w, value, align, size in self.columns:
+                canvas.set_font(False, size)
+                text = value(student)
+                if align == 'L':
+                    text = _fit_text(text, w, False, size)
+                canvas.cell(w, REGISTER_ROW_HEIGHT, str(text), border=True, align=align)
+            canvas.ln(REGISTER_ROW_HEIGHT)
+        yield canvas.content()
+
+def tabulation_register_pdf(rows, school_name, academic_year, student_class, section=None, subjects=None):
+    """Yield a tabulation register PDF in chunks, one page at a time, for rows from a generator"""
+    if subjects is None:
+        subjects = SUBJECTS_MAPPING.get(student_class, [])
+    register = TabulationRegister(school_name, academic_year, student_class, section, subjects)
+    buffer = io.BytesIO()
+    writer = PdfWriter(buffer, A4_LANDSCAPE)
+    for content in register.pages(rows):
+        writer.add_page(content)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    writer.close()
+    yield buffer.getvalue()
+
+def register_filename(school_id, academic_year, student_class, section=None):
+    return f"Register_{school_id}_{academic_year}_{student_class}{'_' + section if section else ''}.pdf"
+
+# Class analytics
+# Ranks, class summaries and subject statistics are computed with pandas
+# group-bys over the materialized results, stored in analytics.json, and the
+# ranks are written into each student's materialized result. This is a section
+# of app.py like every other feature rather than its own module:
+# materialize_results calls compute_analytics, which reads SUBJECTS_MAPPING and
+# PASS_PERCENT, so a separate module would import app back. compute_analytics
+# and merge_class_analytics use neither Flask nor the registry, so they can
+# move out unchanged if app.py is ever split into a package.
+ANALYTICS_FILE = "analytics.json"
+ANALYTICS_TOP_N = 10
+
+def _section_label(section):
+    if section is None or (isinstance(section, float) and math.isnan(section)):
+        return ''
+    return str(section)
+
+def _class_order(student_class):
+    classes = list(SUBJECTS_MAPPING)
+    return (classes.index(student_class) if student_class in classes else len(classes), student_class)
+
+def _class_summary_key(summary):
+    return (_class_order(summary['class']), summary['section'])
+
+def _subject_stat_key(stat):
+    class_subjects = SUBJECTS_MAPPING.get(stat['class'], [])
+    return (_class_order(stat['class']),
+            class_subjects.index(stat['subject']) if stat['subject'] in class_subjects else 99)
+
+def compute_analytics(results, top_n=ANALYTICS_TOP_N):
+    """Dense class/section ranks, class summaries, toppers and subject statistics
+    
+    Adds 'rank' and 'class_size' to every result in place.
+    """
+    if not results:
+        return {'classes': [], 'subjects': []}
+    
+    import pandas as pd
+    students = pd.DataFrame({
+        'roll': list(results),
+        'name': [result['name'] for result in results.values()],
+        'class': [result['class'] for result in results.values()],
+        'section': [_section_label(result.get('section')) for result in results.values()],
+        'total': [result['total1'] + result['total2'] for result in results.values()],
+        'combined_percent': [result['combined_percent'] for result in results.values()],
+    })
+    groups = students.groupby(['class', 'section'])
+    students['rank'] = groups['combined_percent'].rank(method='dense', ascending=False).astype(int)
+    students['class_size'] = groups['roll'].transform('size')
+    for roll, rank, class_size in zip(students['roll'].tolist(), students['rank'].tolist(),
+                                      students['class_size'].tolist()):
+        results[roll]['rank'] = rank
+        results[roll]['class_size'] = class_size
+    
+    summary = groups['combined_percent'].agg(['size', 'mean', 'median', 'max', 'min'])
+    passed = (students['combined_percent'] >= PASS_PERCENT).groupby([students['class'], students['section']]).sum()
+    toppers = students[students['rank'] <= top_n].sort_values(['class', 'section', 'rank', 'roll'])
+    toppers_by_group = {key: group for key, group in toppers.groupby(['class', 'section'])}
+    
+    classes = []
+    for (student_class, section), row in summary.iterrows():
+        group_toppers = toppers_by_group.get((student_class, section), toppers.iloc[0:0])
+        classes.append({
+            'class': student_class,
+            'section': section,
+            'students': int(row['size']),
+            'pass_rate': round(float(passed[(student_class, section)]) * 100 / row['size'], 2),
+            'average_percent': round(float(row['mean']), 2),
+            'median_percent': round(float(row['median']), 2),
+            'highest_percent': float(row['max']),
+            'lowest_percent': float(row['min']),
+            'toppers': [{'roll': roll, 'name': _to_python(name), 'rank': int(rank), 'combined_percent': percent}
+                        for roll, name, rank, percent in zip(group_toppers['roll'], group_toppers['name'],
+                                                             group_toppers['rank'], group_toppers['combined_percent'])]
+        })
+    classes.sort(key=_class_summary_key)
+    
+    # One row per (student, subject taken), then aggregate per class and subject
+    marks = pd.DataFrame([(result['class'], subject, subject_marks['total'])
+                          for result in results.values()
+                          for subject, subject_marks in result['subjects'].items()],
+                         columns=['class', 'subject', 'total'])
+    subject_stats = marks.groupby(['class', 'subject'])['total'].agg(
+        students='size', mean='mean', median='median', std=lambda totals: totals.std(ddof=0))
+    subjects = [{
+        'class': student_class,
+        'subject': subject,
+        'students': int(row['students']),
+        'mean': round(float(row['mean']), 2),
+        'median': round(float(row['median']), 2),
+        'std': round(float(row['std']), 2),
+    } for (student_class, subject), row in subject_stats.iterrows()]
+    subjects.sort(key=_subject_stat_key)
+    
+    return {'classes': classes, 'subjects': subjects}
+
+def merge_class_analytics(analytics, student_class, class_analytics):
+    """Replace one class's summaries and subject statistics, keeping compute_analytics' order"""
+    return {
+        'classes': sorted([summary for summary in analytics['classes'] if summary['class'] != student_class] +
+                          class_analytics['classes'], key=_class_summary_key),
+        'subjects': sorted([stat for stat in analytics['subjects'] if stat['class'] != student_class] +
+                           class_analytics['subjects'], key=_subject_stat_key),
+    }
+
+def load_analytics(school_folder):
+    """Return the precomputed analytics for a school/year, materializing them if needed"""
+    analytics_path = os.path.join(school_folder, ANALYTICS_FILE)
+    if get_results_table(school_folder) is None:
+        return None
+    if not os.path.exists(analytics_path):
+        materialize_results(school_folder)
+    with open(analytics_path, 'r') as f:
+        return json.load(f)
+
+# PDF report cache
+# Rendered report cards are content addressed: the key hashes the student's
+# computed result plus school name and year, so changed marks get a new key.
+PDF_CACHE_DIR = "pdf_cache"
+
+def pdf_cache_key(result_data, school_name, academic_year):
+    payload = json.dumps([result_data, school_name, academic_year, REPORT_CARD_VERSION], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class PdfCache:
+    """Size-bounded PDF bytes cache: an in-memory LRU in front of per-school/year files"""
+    
+    def __init__(self, max_bytes, disk_max_bytes):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+    
+    def _path(self, school_folder, key):
+        return os.path.join(school_folder, PDF_CACHE_DIR, f"{key}.pdf")
+    
+    def get(self, school_folder, key):
+        with self.lock:
+            data = self.entries.get((school_folder, key))
+            if data is not None:
+                self.entries.move_to_end((school_folder, key))
+                return data
+        
+        path = self._path(school_folder, key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Keeps disk eviction least-recently-used
+        except OSError:
+            return None
+        self._remember(school_folder, key, data)
+        return data
+    
+    def put(self, school_folder, key, data):
+        self._remember(school_folder, key, data)
+        cache_dir = os.path.join(school_folder, PDF_CACHE_DIR)
+        os.makedirs(cache_dir, exist_ok=True)
+        path = self._path(school_folder, key)
+        tmp_path = _temp_path(path)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict_disk(cache_dir)
+    
+    def _remember(self, school_folder, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if (school_folder, key) in self.entries:
+                return
+            self.entries[(school_folder, key)] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+    
+    def _evict_disk(self, cache_dir):
+        files = []
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+    
+    def discard(self, school_folder, key):
+        """Drop one cached PDF, e.g. after a correction to that student"""
+        with self.lock:
+            data = self.entries.pop((school_folder, key), None)
+            if data is not None:
+                self.total_bytes -= len(data)
+        try:
+            os.remove(self._path(school_folder, key))
+        except OSError:
+            pass
+    
+    def invalidate(self, school_folder):
+        """Drop every cached PDF for a school/year, e.g. after a term file is replaced"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == school_folder]:
+                self.total_bytes -= len(self.entries.pop(key))
+        shutil.rmtree(os.path.join(school_folder, PDF_CACHE_DIR), ignore_errors=True)
+
+pdf_cache = PdfCache(PDF_CACHE_MAX_BYTES, PDF_CACHE_DISK_MAX_BYTES)
+
+# Result page cache
+# GET /result/<school>/<year>/<roll> pages are keyed by an ETag hashed from the
+# student's materialized result, so a repeat view is a 304 or a cached HTML
+# hit (a results table lookup, no rendering), and a correction to one student
+# changes only that student's ETag. Outdated pages simply age out of the LRU.
+with open(os.path.join(app.static_folder, 'css', 'student_result.css'), 'rb') as _f:
+    # Changes whenever the page's template or stylesheet does
+    RESULT_PAGE_VERSION = hashlib.sha256(STUDENT_RESULT_TEMPLATE.encode('utf-8') + _f.read()).hexdigest()[:12]
+
+class PageCache:
+    """LRU cache of rendered HTML bytes, bounded by total size"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+        record_cache('page', data is not None)
+        return data
+    
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self.entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+    
+    def discard(self, key):
+        with self.lock:
+            data = self.entries.pop(key, None)
+            if data is not None:
+                self.total_bytes -= len(data)
+
+page_cache = PageCache(PAGE_CACHE_MAX_BYTES)
+
+def result_page_etag(school_id, academic_year, result_data, school_name):
+    payload = json.dumps([school_id, academic_year, result_data, school_name, RESULT_PAGE_VERSION],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+def result_page_last_modified(school_folder):
+    """When the school/year's data was last published"""
+    generation, updated = data_version_info(school_folder)
+    if generation:
+        return datetime.fromisoformat(updated).astimezone(timezone.utc)
+    # Data never uploaded through the app has no generation; use the results file
+    signature = _file_signature(os.path.join(school_folder, RESULTS_FILE))
+    return datetime.fromtimestamp(signature[0] / 1e9, timezone.utc) if signature else None
+
+def get_report_card_pdf(school_folder, result_data, school_name, academic_year):
+    """Return (cache key, PDF bytes) for a student's report card, rendering it only on a cache miss"""
+    key = pdf_cache_key(result_data, school_name, academic_year)
+    data = pdf_cache.get(school_folder, key)
+    record_cache('pdf', data is not None)
+    if data is None:
+        with span('render_report_card'):
+            data = render_report_card(result_data, school_name, academic_year)
+        pdf_cache.put(school_folder, key, data)
+    return key, data
+
+# Bulk report cards
+def select_students(school_folder, student_class=None, section=None):
+    """Materialized results for a school/year, optionally filtered by class and section"""
+    table = get_results_table(school_folder)
+    if table is None:
+        return []
+    return [table.result(record) for record in table.select(student_class=student_class, section=section)]
+
+def _render_report_cards(task):
+    """Process pool worker: render a chunk of report cards to (filename, bytes) pairs"""
+    students, school_id, school_name, academic_year = task
+    return [(report_card_filename(school_id, student['roll'], academic_year),
+             render_report_card(student, school_name, academic_year))
+            for student in students]
+
+def generate_report_cards_zip(output, school_id, academic_year, student_class=None, section=None, workers=None):
+    """Render every selected report card into a ZIP written to output
+    
+    Term data is loaded once (from the materialized results) and the cards are
+    rendered in chunks across a process pool. Returns (card_count, seconds).
+    """
+    start = time.perf_counter()
+    workers = workers or BULK_REPORT_WORKERS
+    students = select_students(get_school_folder(school_id, academic_year), student_class, section)
+    school_name = get_school_name(school_id)
+    
+    chunk_size = max(1, -(-len(students) // (workers * 4)))
+    tasks = [(students[i:i + chunk_size], school_id, school_name, academic_year)
+             for i in range(0, len(students), chunk_size)]
+    
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = pool.map(_render_report_cards, tasks)
+                for cards in rendered:
+                    for filename, data in cards:
+                        archive.writestr(filename, data)
+        else:
+            for task in tasks:
+                for filename, data in _render_report_cards(task):
+                    archive.writestr(filename, data)
+    
+    elapsed = time.perf_counter() - start
+    return len(students), elapsed
+
+# Report job queue
+# PDF and bulk report rendering runs on a small thread pool in each worker
+# process instead of inside the request. Jobs live in the registry database, so
+# any gunicorn worker can answer status and download requests, and a unique
+# index on the dedupe key makes identical in-flight requests share one job.
+JOBS_DIR = os.path.join(DATA_DIR, ".jobs")
+JOB_STALE_SECONDS = 60
+JOB_HEARTBEAT_SECONDS = 10  # How often a running job refreshes its updated time
+
+_job_executor = None
+_job_executor_pid = None
+_job_executor_lock = threading.Lock()
+
+def get_job_executor():
+    """Return this process's job thread pool, created lazily so it is never inherited across fork"""
+    global _job_executor, _job_executor_pid
+    with _job_executor_lock:
+        if _job_executor is None or _job_executor_pid != os.getpid():
+            _job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='report-job')
+            _job_executor_pid = os.getpid()
+        return _job_executor
+
+def _job_row(job_id):
+    row = get_registry().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+def submit_job(kind, params, dedupe_key, reuse_finished=True):
+    """Queue a report job, or return the queued/running job with the same dedupe key
+    
+    With reuse_finished, a finished job whose result is still on disk is returned too.
+    """
+    conn = get_registry()
+    _purge_old_jobs()
+    
+    existing = conn.execute(
+        "SELECT * FROM jobs WHERE dedupe_key = ? AND status != 'failed' ORDER BY created DESC LIMIT 1",
+        (dedupe_key,)).fetchone()
+    if existing is not None:
+        existing = _resume_if_stale(dict(existing))
+        if existing['status'] in ('queued', 'running') or (
+                reuse_finished and existing['status'] == 'done' and os.path.exists(existing['result_path'])):
+            return existing
+    
+    job_id = secrets.token_hex(16)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, dedupe_key, params, status, created, updated) VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, dedupe_key, json.dumps(params), time.time(), time.time()))
+    except sqlite3.IntegrityError:
+        # Another worker queued the same job between our check and insert; it may have finished since
+        row = conn.execute("SELECT * FROM jobs WHERE dedupe_key = ? ORDER BY created DESC LIMIT 1",
+                           (dedupe_key,)).fetchone()
+        return dict(row)
+    
+    get_job_executor().submit(run_job, job_id)
+    return _job_row(job_id)
+
+def _resume_if_stale(job):
+    """Re-run a job that has sat queued for too long, and fail a running job whose heartbeat stopped
+    
+    Both happen when the worker process holding the job dies (restart, OOM kill).
+    """
+    conn = get_registry()
+    cutoff = time.time() - JOB_STALE_SECONDS
+    if job['status'] == 'queued' and job['updated'] < cutoff:
+        conn.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'queued'", (time.time(), job['id']))
+        get_job_executor().submit(run_job, job['id'])
+    elif job['status'] == 'running' and job['updated'] < cutoff:
+        conn.execute("UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                     "WHERE id = ? AND status = 'running' AND updated < ?",
+                     ("The worker running this job stopped, please try again", time.time(), job['id'], cutoff))
+        return _job_row(job['id'])
+    return job
+
+def _heartbeat(job_id, stopped):
+    """Refresh a running job's updated time until stopped is set, so it is not taken for dead"""
+    while not stopped.wait(JOB_HEARTBEAT_SECONDS):
+        get_registry().execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running'",
+                               (time.time(), job_id))
+
+def run_job(job_id):
+    conn = get_registry()
+    claimed = conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'",
+                           (time.time(), job_id)).rowcount
+    if not claimed:
+        return
+    
+    job = _job_row(job_id)
+    params = json.loads(job['params'])
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    stopped = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, stopped), name=f'job-heartbeat-{job_id[:8]}',
+                     daemon=True).start()
+    try:
+        if job['kind'] == 'report_card':
+            school_folder = get_school_folder(params['school_id'], params['academic_year'])
+            result_data = find_student_result(school_folder, params['roll_number'])
+            if result_data is None:
+                raise LookupError("Student data not found")
+            _, pdf_bytes = get_report_card_pdf(school_folder, result_data, get_school_name(params['school_id']),
+                                               params['academic_year'])
+            result_path = os.path.join(JOBS_DIR, f"{job_id}.pdf")
+            with open(result_path, 'wb') as f:
+                f.write(pdf_bytes)
+            info = {}
+        elif job['kind'] == 'bulk_import':
+            try:
+                report = import_schools(params['archive'])
+            finally:
+                if os.path.exists(params['archive']):
+                    os.remove(params['archive'])
+            result_path = os.path.join(JOBS_DIR, f"{job_id}.json")
+            _write_json_atomic(result_path, report)
+            info = {'schools': report['schools'], 'files': len(report['files']), 'errors': report['errors'],
+                    'seconds': report['seconds']}
+            app.logger.info("Imported %d workbooks for %d schools in %.2fs (%d errors)", info['files'],
+                            info['schools'], report['seconds'], report['errors'])
+        else:
+            result_path = os.path.join(JOBS_DIR, f"{job_id}.zip")
+            with open(result_path, 'wb') as f:
+                count, elapsed = generate_report_cards_zip(f, params['school_id'], params['academic_year'],
+                                                           params.get('class'), params.get('section'))
+            info = {'report_cards': count, 'seconds': round(elapsed, 2),
+                    'cards_per_second': round(count / elapsed, 1) if elapsed > 0 else None}
+            app.logger.info("Rendered %d report cards for %s/%s in %.2fs (%s cards/sec)", count,
+                            params['school_id'], params['academic_year'], elapsed, info['cards_per_second'])
+        
+        conn.execute("UPDATE jobs SET status = 'done', result_path = ?, info = ?, updated = ? WHERE id = ?",
+                     (result_path, json.dumps(info), time.time(), job_id))
+    except Exception as e:
+        app.logger.exception("Report job %s failed", job_id)
+        conn.execute("UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                     (str(e), time.time(), job_id))
+    finally:
+        stopped.set()
+
+def _purge_old_jobs():
+    conn = get_registry()
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    # Running jobs refresh updated every JOB_HEARTBEAT_SECONDS, so any job this old is finished or dead
+    old_jobs = conn.execute("SELECT id, result_path FROM jobs WHERE updated < ?", (cutoff,)).fetchall()
+    for job in old_jobs:
+        if job['result_path'] and os.path.exists(job['result_path']):
+            os.remove(job['result_path'])
+    if old_jobs:
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(job['id'],) for job in old_jobs])
+
+def job_status(job):
+    status = {
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'status_url': url_for('report_job_status', job_id=job['id']),
+        'download_url': url_for('report_job_download', job_id=job['id']),
+    }
+    if job.get('info'):
+        status.update(json.loads(job['info']))
+    if job.get('error'):
+        status['error'] = job['error']
+    return status
+
+def job_response(job):
+    """202 JSON for API clients, otherwise a page that waits for the job and then downloads it"""
+    if request.accept_mimetypes.best == 'application/json' or request.args.get('format') == 'json':
+        return jsonify(job_status(job)), 202
+    return render_template('job_status.html', job=job_status(job)), 202
+
+# Mark corrections
+# A correction rewrites the changed cells in the term's .npz store (the .xlsx
+# is left as uploaded), recomputes only the corrected students and their
+# class's ranks and analytics, and publishes a new generation. Page and PDF
+# caches are content-addressed, so only the corrected students' entries change.
+class CorrectionError(ValueError):
+    """A correction that does not match the stored term data"""
+
+def apply_corrections(school_id, academic_year, corrections, reason='', corrected_by=''):
+    """Apply [{'roll', 'subject', 'term', 'mark'}] corrections; returns {roll: new result or None}
+    
+    All corrections are validated first; if any fails, CorrectionError is raised
+    with a list of {'index', 'message'} problems and nothing is changed.
+    """
+    school_folder = get_school_folder(school_id, academic_year)
+    with school_write_lock(school_folder):
+        # Validate everything against the current term data before writing anything
+        problems = []
+        cells = {}
+        audit = []
+        for index, correction in enumerate(corrections):
+            if not isinstance(correction, dict):
+                problems.append({'index': index, 'message': "correction must be an object"})
+                continue
+            if 'mark' not in correction:
+                # A forgotten mark must not silently blank the cell
+                problems.append({'index': index, 'message': 'mark is required; use null or "" to blank it'})
+                continue
+            roll = correction.get('roll')
+            subject = correction.get('subject')
+            term = correction.get('term')
+            if not isinstance(roll, (str, int)) or isinstance(roll, bool):
+                problems.append({'index': index, 'message': "roll must be a string or a number"})
+                continue
+            if not isinstance(subject, str):
+                problems.append({'index': index, 'message': "subject must be a string"})
+                continue
+            roll = str(roll).strip()
+            if term not in TERMS:
+                problems.append({'index': index, 'message': f"term must be one of {', '.join(TERMS)}"})
+                continue
+            if not term_data_exists(school_folder, term):
+                problems.append({'index': index, 'message': f"{term} has not been uploaded"})
+                continue
+            term_index = get_term_index(school_folder, term)
+            if roll not in term_index.roll_index:
+                problems.append({'index': index, 'message': f"roll number {roll!r} not found in {term}"})
+                continue
+            if subject not in term_index.subject_positions:
+                problems.append({'index': index, 'message': f"subject {subject!r} not found in {term}"})
+                continue
+            mark, error = _normalize_mark(correction.get('mark'))
+            if error:
+                problems.append({'index': index, 'message': error})
+                continue
+            row = term_index.roll_index[roll]
+            old_mark = _to_python(term_index.df[subject].iloc[row])
+            cells.setdefault(term, []).append((row, subject, mark))
+            audit.append((school_id, academic_year, term, roll, subject,
+                          None if isinstance(old_mark, float) and math.isnan(old_mark) else old_mark,
+                          None if math.isnan(mark) else mark, reason, corrected_by))
+        if problems:
+            raise CorrectionError(problems)
+        
+        rolls = list(dict.fromkeys(entry[3] for entry in audit))
+        table = get_results_table(school_folder)
+        old_results = {roll: table.get(roll) for roll in rolls} if table is not None else {}
+        
+        for term, term_cells in cells.items():
+            with span('update_term_store'):
+                update_term_store(get_term_store_path(school_folder, term), term_cells)
+            term_cache.discard((school_folder, term))
+        
+        new_results = {roll: None for roll in rolls}
+        results = None
+        if all(term_data_exists(school_folder, term) for term in TERMS):
+            results = _rematerialize_students(school_folder, rolls)
+            if results is not None:
+                new_results = {roll: results.get(roll) for roll in rolls}
+        generation = bump_generation(school_id, academic_year)
+        
+        with registry_transaction() as conn:
+            conn.executemany(
+                "INSERT INTO corrections (school_id, academic_year, term, roll, subject, old_mark, new_mark, "
+                "reason, corrected_by, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [entry + (datetime.now().isoformat(),) for entry in audit])
+        
+        if results is not None:
+            record_year_stats(school_id, academic_year, len(results), results)
+            classes = {result['class'] for result in new_results.values() if result}
+            classmates = {roll: result for roll, result in results.items() if result['class'] in classes}
+            record_student_history(school_id, academic_year, classmates, rolls=list(classmates))
+    
+    # Drop the corrected students' outdated page and PDF; classmates whose rank
+    # changed get new content-addressed keys and their old entries age out
+    school_name = get_school_name(school_id)
+    for old_result in old_results.values():
+        if old_result is not None:
+            page_cache.discard(result_page_etag(school_id, academic_year, old_result, school_name))
+            pdf_cache.discard(school_folder, pdf_cache_key(old_result, school_name, academic_year))
+    app.logger.info("Applied %d correction(s) to %s %s (generation %d)", len(audit), school_id, academic_year, generation)
+    return new_results
+
+def _rematerialize_students(school_folder, rolls):
+    """Recompute the given students and their classes' ranks and analytics in results.json
+    
+    Returns the updated results dict, falling back to a full materialize_results
+    when there is no up-to-date results file to patch.
+    """
+    results_path = os.path.join(school_folder, RESULTS_FILE)
+    try:
+        with open(results_path, 'r') as f:
+            payload = json.load(f)
+        analytics = load_analytics(school_folder)
+    except (OSError, ValueError):
+        payload = analytics = None
+    if payload is None or analytics is None or 'subjects' not in payload:
+        return materialize_results(school_folder)
+    
+    term1 = get_term_index(school_folder, "1st_term")
+    term2 = get_term_index(school_folder, "2nd_term")
+    results = payload['students']
+    classes = set()
+    with span('compute_student_result'):
+        for roll in rolls:
+            result = compute_student_result(term1, term2, roll)
+            results[roll] = result
+            classes.add(result['class'])
+    
+    with span('compute_analytics'):
+        for student_class in classes:
+            class_results = {roll: result for roll, result in results.items() if result['class'] == student_class}
+            analytics = merge_class_analytics(analytics, student_class, compute_analytics(class_results))
+    
+    _write_json_atomic(os.path.join(school_folder, ANALYTICS_FILE), analytics)
+    payload['sources'] = {'1st_term': _signature_to_json(term1.signature),
+                          '2nd_term': _signature_to_json(term2.signature)}
+    _write_json_atomic(results_path, payload)
+    return results
+
+def list_corrections(school_id, academic_year, roll_number=None, limit=500):
+    """Most recent corrections for a school/year, optionally for one student"""
+    query = "SELECT * FROM corrections WHERE school_id = ? AND academic_year = ?"
+    params = [school_id, academic_year]
+    if roll_number:
+        query += " AND roll = ?"
+        params.append(roll_number)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    with span('registry'):
+        return [dict(row) for row in get_registry().execute(query, params)]
+
+# Bulk import
+# A directory tree or ZIP laid out like DATA_DIR (<school_id>/<year>/<term>.xlsx,
+# plus an optional <school_id>/school.json with "name" and "email") is imported
+# in one go: workbooks are validated and converted in a process pool, each
+# complete school/year is swapped in and materialized under its write lock, and
+# the registry updates for every school are committed as one transaction.
+IMPORT_NAME_PATTERN = re.compile(r'^\w[\w.-]*$')
+IMPORT_STAGING_DIR = os.path.join(DATA_DIR, ".imports")
+
+class ImportSource:
+    """Read-only view of a bulk import directory or ZIP archive by relative name"""
+    def __init__(self, path):
+        self.path = path
+        self.is_zip = not os.path.isdir(path)
+    
+    def names(self):
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as archive:
+                return [info.filename for info in archive.infolist() if not info.is_dir()]
+        return [os.path.relpath(os.path.join(root, filename), self.path).replace(os.sep, '/')
+                for root, _, filenames in os.walk(self.path) for filename in filenames]
+    
+    @contextmanager
+    def open(self, name):
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as archive, archive.open(name) as f:
+                yield f
+        else:
+            with open(os.path.join(self.path, name), 'rb') as f:
+                yield f
+
+def find_import_files(source):
+    """Split a bulk import's files into (workbooks, school_files, skipped)
+    
+    workbooks are (name, school_id, academic_year, term) tuples; only the last
+    three path components are used, so the tree may sit under a top folder.
+    """
+    workbooks, school_files, skipped = [], {}, []
+    for name in sorted(source.names()):
+        parts = name.split('/')
+        if any(part.startswith('.') or part == '__MACOSX' for part in parts):
+            continue
+        if parts[-1] == 'school.json' and len(parts) >= 2 and IMPORT_NAME_PATTERN.match(parts[-2]):
+            school_files[parts[-2]] = name
+            continue
+        term = parts[-1][:-len('.xlsx')] if parts[-1].endswith('.xlsx') else None
+        if term in TERMS and len(parts) >= 3 and all(IMPORT_NAME_PATTERN.match(part) for part in parts[-3:-1]):
+            workbooks.append((name, parts[-3], parts[-2], term))
+        else:
+            skipped.append(name)
+    return workbooks, school_files, skipped
+
+def _ingest_import_file(task):
+    """Process pool worker: stage and convert one workbook of a bulk import"""
+    source_path, name, school_id, academic_year, term = task
+    start = time.perf_counter()
+    # Staged outside the school folder, so a rejected import leaves no empty school/year behind
+    os.makedirs(IMPORT_STAGING_DIR, exist_ok=True)
+    staging = _temp_path(os.path.join(IMPORT_STAGING_DIR, f"{school_id}.{academic_year}.{term}"))
+    upload_path = f"{staging}.upload.xlsx"
+    new_store_path = f"{staging}.new"
+    report = {'file': name, 'school_id': school_id, 'academic_year': academic_year, 'term': term}
+    try:
+        with ImportSource(source_path).open(name) as f, open(upload_path, 'wb') as out:
+            shutil.copyfileobj(f, out)
+        report['students'], report['errors'] = ingest_term_workbook(upload_path, new_store_path)
+    except Exception as e:
+        report['students'], report['errors'] = 0, [{'row': None, 'column': None, 'message': str(e)}]
+    if report['errors']:
+        for path in (upload_path, new_store_path):
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        report['staged'] = (upload_path, new_store_path)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+def import_schools(source_path, workers=None):
+    """Import every school/year found in a directory or ZIP archive
+    
+    A school/year is only swapped in if all of its workbooks validate; the
+    others are left exactly as they were. Returns a report with per-file
+    student counts, errors and timings and per-school/year versions.
+    """
+    start = time.perf_counter()
+    workers = workers or IMPORT_WORKERS
+    source = ImportSource(source_path)
+    workbooks, school_files, skipped = find_import_files(source)
+    schools = {}
+    for school_id, name in school_files.items():
+        try:
+            with source.open(name) as f:
+                details = json.load(f)
+            if not isinstance(details, dict) or not all(
+                    isinstance(details.get(key, ''), str) for key in ('name', 'email')):
+                raise ValueError('expected an object with string "name" and "email"')
+            schools[school_id] = details
+        except ValueError as e:
+            skipped.append(f"{name}: {e}")
+    tasks = [(source_path, name, school_id, academic_year, term) for name, school_id, academic_year, term in workbooks]
+    
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            files = list(pool.map(_ingest_import_file, tasks))
+    else:
+        files = [_ingest_import_file(task) for task in tasks]
+    
+    by_year = {}
+    for report in files:
+        by_year.setdefault((report['school_id'], report['academic_year']), []).append(report)
+    
+    years = []
+    for (school_id, academic_year), reports in sorted(by_year.items()):
+        year_start = time.perf_counter()
+        staged = [report.pop('staged') for report in reports if 'staged' in report]
+        year = {'school_id': school_id, 'academic_year': academic_year,
+                'students': max(report['students'] for report in reports)}
+        if len(staged) < len(reports):
+            for path in (path for paths in staged for path in paths):
+                os.remove(path)
+            year['status'] = 'rejected'
+            years.append(year)
+            continue
+        
+        school_folder = get_school_folder(school_id, academic_year)
+        with school_write_lock(school_folder):
+            for report, (upload_path, new_store_path) in zip(reports, staged):
+                os.replace(upload_path, os.path.join(school_folder, f"{report['term']}.xlsx"))
+                os.replace(new_store_path, get_term_store_path(school_folder, report['term']))
+                term_cache.discard((school_folder, report['term']))
+            year['results'] = materialize_results(school_folder)
+            pdf_cache.invalidate(school_folder)
+        year['status'] = 'imported'
+        year['seconds'] = round(time.perf_counter() - year_start, 3)
+        years.append(year)
+    
+    # Every school's registration, version and statistics are committed together,
+    # so other workers see the whole import at once
+    imported = [year for year in years if year['status'] == 'imported']
+    registered = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with registry_transaction() as conn:
+        for school_id in sorted({year['school_id'] for year in imported}):
+            details = schools.get(school_id, {})
+            conn.execute("INSERT OR IGNORE INTO schools (id, name, email, registered_date, student_count) "
+                         "VALUES (?, ?, ?, ?, 0)",
+                         (school_id, details.get('name') or school_id, details.get('email', ''), registered))
+        for year in imported:
+            results = year.pop('results')
+            year['generation'] = bump_generation(year['school_id'], year['academic_year'])
+            record_year_stats(year['school_id'], year['academic_year'], year['students'], results)
+            record_student_history(year['school_id'], year['academic_year'], results)
+    
+    return {
+        'files': files,
+        'years': years,
+        'skipped': skipped,
+        'schools': len({year['school_id'] for year in imported}),
+        'errors': sum(len(report['errors']) for report in files),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+# Warm-up
+# Run in the gunicorn master before workers fork (see gunicorn.conf.py), so
+# the materialized results are loaded once and shared copy-on-write.
+def warm_up(school_ids=None, academic_years=None):
+    """Load the results tables for the selected schools/years, returning a summary"""
+    start = time.perf_counter()
+    # Routes import these lazily; import them here so forked workers inherit them
+    import numpy  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    
+    if school_ids is None:
+        school_ids = [school_id for school_id in WARMUP_SCHOOLS.split(',') if school_id.strip()]
+    if academic_years is None:
+        academic_years = [year for year in WARMUP_YEARS.split(',') if year.strip()]
+    school_ids = [school_id.strip() for school_id in school_ids] or [school['id'] for school in list_schools()]
+    academic_years = [year.strip() for year in academic_years]
+    
+    loaded = []
+    conn = get_registry()
+    for school_id in school_ids:
+        years = academic_years
+        if not years:
+            # The current year is the latest one with both terms uploaded
+            row = conn.execute("SELECT MAX(academic_year) FROM year_stats WHERE school_id = ? AND terms_uploaded = ?",
+                               (school_id, len(TERMS))).fetchone()
+            years = [row[0]] if row[0] else []
+        for academic_year in years:
+            table = get_results_table(get_school_folder(school_id, academic_year))
+            if table is not None:
+                loaded.append((school_id, academic_year, len(table)))
+    
+    # Render one report card so the font metrics and code paths are warm too
+    render_report_card({'name': '', 'roll': '', 'class': '', 'subjects': {}, 'total1': 0, 'total2': 0,
+                        'percent1': 0, 'percent2': 0, 'combined_percent': 0}, '', '')
+    
+    return {
+        'seconds': round(time.perf_counter() - start, 3),
+        'tables': len(loaded),
+        'students': sum(count for _, _, count in loaded),
+        'loaded': loaded,
+    }
+
+@app.cli.command('warm-up')
+@click.option('--school', 'school_ids', multiple=True, help='School id to warm (repeatable, default: all)')
+@click.option('--year', 'academic_years', multiple=True, help='Academic year (repeatable, default: latest)')
+def warm_up_command(school_ids, academic_years):
+    """Load results tables and report how long the warm-up takes."""
+    summary = warm_up(list(school_ids) or None, list(academic_years) or None)
+    click.echo(f"Warmed {summary['tables']} results tables ({summary['students']} students) "
+               f"in {summary['seconds']:.2f}s")
+
+# Routes
+@app.route('/')
+def index():
+    schools = list_schools()
+    return render_template('index.html', schools=schools)
+
+@app.route('/school_admin')
+def school_admin():
+    schools = list_schools()
+    return render_template('school_admin.html', schools=schools)
+
+@app.route('/student_login')
+def student_login():
+    schools = list_schools()
+    return render_template('student_login.html', schools=schools)
+
+@app.route('/register_school', methods=['POST'])
+def register_school():
+    school_name = request.form.get('school_name')
+    school_id = request.form.get('school_id')
+    contact_email = request.form.get('contact_email', '')
+    
+    # Register the school (fails if the ID already exists)
+    if not add_school(school_id, school_name, contact_email):
+        return render_template('school_admin.html', 
+                                   schools=list_schools(),
+                                   message="School ID already exists!",
+                                   message_type="error")
+    
+    # Create school directory
+    os.makedirs(os.path.join(DATA_DIR, school_id), exist_ok=True)
+    
+    return render_template('school_admin.html', 
+                               schools=list_schools(),
+                               message=f"School '{school_name}' registered successfully!",
+                               message_type="success")
+
+@app.route('/upload_results', methods=['POST'])
+def upload_results():
+    if 'excel_file' not in request.files:
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message="No file selected!",
+                                   message_type="error")
+    
+    file = request.files['excel_file']
+    school_id = request.form.get('school_id')
+    academic_year = request.form.get('academic_year')
+    term = request.form.get('term')
+    
+    if file.filename == '':
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message="No file selected!",
+                                   message_type="error")
+    
+    if term not in TERMS:
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message="Invalid term selected!",
+                                   message_type="error")
+    
+    try:
+        # Save the upload next to the current file, then validate and convert it
+        school_folder = get_school_folder(school_id, academic_year)
+        os.makedirs(school_folder, exist_ok=True)
+        
+        file_path = os.path.join(school_folder, f"{term}.xlsx")
+        store_path = get_term_store_path(school_folder, term)
+        # Per-request staging names, so concurrent uploads never share a file
+        staging = f"{os.getpid()}.{threading.get_ident()}"
+        upload_path = os.path.join(school_folder, f".{term}.{staging}.upload.xlsx")
+        new_store_path = f"{store_path}.{staging}.new"
+        file.save(upload_path)
+        
+        try:
+            with span('ingest_workbook'):
+                record_bytes_read('ingest_workbook', os.path.getsize(upload_path))
+                student_count, errors = ingest_term_workbook(upload_path, new_store_path)
+            if errors:
+                return render_template('school_admin.html',
+                                           schools=list_schools(),
+                                           message=f"Upload rejected: {len(errors)} problem(s) found. No results were changed.",
+                                           message_type="error",
+                                           errors=errors)
+            
+            with school_write_lock(school_folder):
+                # The store must not be older than the xlsx, so it is swapped in last.
+                # Readers that already opened or cached the old files keep serving them.
+                os.replace(upload_path, file_path)
+                os.replace(new_store_path, store_path)
+                
+                # Rebuild the results from the new files, then publish them as a new
+                # generation; until then other workers keep serving the previous one
+                term_cache.discard((school_folder, term))
+                results = materialize_results(school_folder)
+                generation = bump_generation(school_id, academic_year)
+                pdf_cache.invalidate(school_folder)
+                
+                # Update student count, dashboard statistics and the cross-year history
+                record_year_stats(school_id, academic_year, student_count, results)
+                record_student_history(school_id, academic_year, results)
+        finally:
+            for path in (upload_path, new_store_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message=f"Results uploaded successfully! Students: {student_count} (version {generation})",
+                                   message_type="success")
+    
+    except Exception as e:
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message=f"Error uploading file: {str(e)}",
+                                   message_type="error")
+
+@app.route('/student_result', methods=['POST'])
+@throttled
+def student_result():
+    school_id = request.form.get('school_id')
+    academic_year = request.form.get('academic_year')
+    roll_number = request.form.get('roll_number')
+    
+    try:
+        school_folder = get_school_folder(school_id, academic_year)
+        
+        if not term_data_exists(school_folder, "1st_term") or not term_data_exists(school_folder, "2nd_term"):
+            return render_template('student_login.html',
+                                       schools=list_schools(),
+                                       error="Result data not available for selected school and year")
+        
+        result_data = find_student_result(school_folder, roll_number)
+        
+        if result_data is None:
+            return render_template('student_login.html',
+                                       schools=list_schools(),
+                                       error="Roll number not found")
+        
+        # Redirect to the cacheable GET page, so refreshes and shared links revalidate cheaply
+        view_args = {'school_id': school_id, 'academic_year': academic_year, 'roll_number': result_data['roll']}
+        path = url_for('result_page', **view_args)
+        return grant_lookup_pass(redirect(path, code=303), path, view_args)
+        
+    except Exception as e:
+        return render_template('student_login.html',
+                                   schools=list_schools(),
+                                   error=f"Error processing result: {str(e)}")
+
+@app.route('/result/<school_id>/<academic_year>/<roll_number>')
+@throttled
+def result_page(school_id, academic_year, roll_number):
+    try:
+        school_folder = get_school_folder(school_id, academic_year)
+        result_data = find_student_result(school_folder, roll_number)
+        if result_data is None:
+            return render_template('student_login.html',
+                                       schools=list_schools(),
+                                       error="Roll number not found"), 404
+        
+        school_name = get_school_name(school_id)
+        etag = result_page_etag(school_id, academic_year, result_data, school_name)
+        last_modified = result_page_last_modified(school_folder)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = Response(status=304)
+        else:
+            html = page_cache.get(etag)
+            if html is None:
+                html = render_template('student_result.html',
+                                           student_data=result_data,
+                                           school_name=school_name,
+                                           school_id=school_id,
+                                           academic_year=academic_year).encode('utf-8')
+                page_cache.put(etag, html)
+            response = Response(html, mimetype='text/html')
+        
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        if RESULT_PAGE_MAX_AGE:
+            response.headers['Cache-Control'] = f'public, max-age={RESULT_PAGE_MAX_AGE}'
+        else:
+            response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+    
+    except Exception as e:
+        return render_template('student_login.html',
+                                   schools=list_schools(),
+                                   error=f"Error processing result: {str(e)}"), 500
+
+@app.route('/download_result_pdf', methods=['GET', 'POST'])
+@throttled
+def download_result_pdf():
+    school_id = request.values.get('school_id')
+    academic_year = request.values.get('academic_year')
+    roll_number = request.values.get('roll_number')
+    
+    try:
+        # Get student data
+        school_folder = get_school_folder(school_id, academic_year)
+        result_data = find_student_result(school_folder, roll_number)
+        
+        if result_data is None:
+            return "Student data not found", 404
+        
+        # Get school name
+        school_name = get_school_name(school_id)
+        
+        # The cache key doubles as the ETag, so a revalidation never renders
+        etag = pdf_cache_key(result_data, school_name, academic_year)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            pdf_bytes = pdf_cache.get(school_folder, etag)
+            record_cache('pdf', pdf_bytes is not None)
+            if pdf_bytes is None:
+                # Render in the job pool rather than tying up this worker
+                job = submit_job('report_card', {'school_id': school_id, 'academic_year': academic_year,
+                                                 'roll_number': roll_number}, f"report_card:{etag}")
+                return job_response(job)
+            filename = report_card_filename(school_id, roll_number, academic_year)
+            response = send_file(io.BytesIO(pdf_bytes), as_attachment=True, download_name=filename,
+                                 mimetype='application/pdf', conditional=False, etag=False)
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except Exception as e:
+        return f"Error generating PDF: {str(e)}", 500
+
+@app.route('/bulk_report_cards', methods=['POST'])
+def bulk_report_cards():
+    school_id = request.form.get('school_id')
+    academic_year = request.form.get('academic_year')
+    student_class = request.form.get('class') or None
+    section = request.form.get('section') or None
+    
+    try:
+        school_folder = get_school_folder(school_id, academic_year)
+        if not select_students(school_folder, student_class, section):
+            return render_template('school_admin.html',
+                                       schools=list_schools(),
+                                       message="No results found for the selected school, year and class",
+                                       message_type="error")
+        
+        # Same selection of the same results version shares one job
+        version = data_generation(school_folder) or _file_signature(os.path.join(school_folder, RESULTS_FILE))
+        dedupe_key = f"bulk:{school_id}:{academic_year}:{student_class or ''}:{section or ''}:{version}"
+        job = submit_job('bulk_report_cards', {'school_id': school_id, 'academic_year': academic_year,
+                                               'class': student_class, 'section': section}, dedupe_key)
+        return job_response(job)
+    
+    except Exception as e:
+        return f"Error generating report cards: {str(e)}", 500
+
+@app.route('/tabulation_register', methods=['GET', 'POST'])
+@throttled
+def tabulation_register():
+    school_id = request.values.get('school_id')
+    academic_year = request.values.get('academic_year')
+    student_class = request.values.get('class')
+    section = request.values.get('section') or None
+    
+    table = get_results_table(get_school_folder(school_id, academic_year)) if school_id and academic_year else None
+    if table is None or not student_class or not table.select(student_class=student_class, section=section):
+        return "No results found for the selected school, year and class", 404
+    
+    # Streamed page by page straight from the results table
+    pages = tabulation_register_pdf(iter_register_rows(table, student_class, section), get_school_name(school_id),
+                                    academic_year, student_class, section,
+                                    SUBJECTS_MAPPING.get(student_class, table.subjects))
+    filename = register_filename(school_id, academic_year, student_class, section)
+    return Response(pages, mimetype='application/pdf',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/bulk_import', methods=['POST'])
+def bulk_import():
+    file = request.files.get('archive')
+    if file is None or file.filename == '':
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message="No file selected!",
+                                   message_type="error")
+    
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    archive_path = os.path.join(JOBS_DIR, f"{secrets.token_hex(16)}.import.zip")
+    file.save(archive_path)
+    if not zipfile.is_zipfile(archive_path):
+        os.remove(archive_path)
+        return render_template('school_admin.html',
+                                   schools=list_schools(),
+                                   message="Bulk import needs a ZIP archive!",
+                                   message_type="error")
+    
+    # The same archive uploaded twice while the first import is queued or running shares its job;
+    # once it has finished, uploading it again imports it again
+    with open(archive_path, 'rb') as f:
+        digest = hashlib.file_digest(f, 'sha256').hexdigest()
+    job = submit_job('bulk_import', {'archive': archive_path}, f"bulk_import:{digest}", reuse_finished=False)
+    if json.loads(job['params'])['archive'] != archive_path and os.path.exists(archive_path):
+        os.remove(archive_path)
+    return job_response(job)
+
+@app.route('/report_jobs/<job_id>')
+def report_job_status(job_id):
+    job = _job_row(job_id)
+    if job is None:
+        return jsonify({'error': "Unknown job"}), 404
+    return jsonify(job_status(_resume_if_stale(job)))
+
+@app.route('/report_jobs/<job_id>/download')
+def report_job_download(job_id):
+    job = _job_row(job_id)
+    if job is None:
+        return "Unknown job", 404
+    if job['status'] != 'done':
+        return jsonify(job_status(job)), 409
+    if not os.path.exists(job['result_path']):
+        return "Report has expired, please request it again", 410
+    
+    params = json.loads(job['params'])
+    if job['kind'] == 'bulk_import':
+        return send_file(os.path.abspath(job['result_path']), mimetype='application/json')
+    if job['kind'] == 'report_card':
+        filename = report_card_filename(params['school_id'], params['roll_number'], params['academic_year'])
+        return send_file(os.path.abspath(job['result_path']), as_attachment=True, download_name=filename,
+                         mimetype='application/pdf')
+    suffix = "_".join(part for part in (params.get('class'), params.get('section')) if part)
+    filename = f"ReportCards_{params['school_id']}_{params['academic_year']}{'_' + suffix if suffix else ''}.zip"
+    return send_file(os.path.abspath(job['result_path']), as_attachment=True, download_name=filename,
+                     mimetype='application/zip')
+
+@app.cli.command('bulk-reports')
+@click.argument('school_id')
+@click.argument('academic_year')
+@click.option('--class', 'student_class', default=None, help='Only this class, e.g. X')
+@click.option('--section', default=None, help='Only this section, e.g. A')
+@click.option('--workers', type=int, default=None, help='Process pool size (default: BULK_REPORT_WORKERS)')
+@click.option('--output', '-o', default=None, help='ZIP file to write')
+def bulk_reports_command(school_id, academic_year, student_class, section, workers, output):
+    """Generate all report cards for a school/year into a ZIP file."""
+    output = output or f"ReportCards_{school_id}_{academic_year}.zip"
+    with open(output, 'wb') as f:
+        count, elapsed = generate_report_cards_zip(f, school_id, academic_year, student_class, section, workers)
+    rate = count / elapsed if elapsed > 0 else 0
+    click.echo(f"Wrote {count} report cards to {output} in {elapsed:.2f}s ({rate:.1f} cards/sec)")
+
+@app.cli.command('tabulation-register')
+@click.argument('school_id')
+@click.argument('academic_year')
+@click.argument('student_class')
+@click.option('--section', default=None, help='Only this section, e.g. A')
+@click.option('--output', '-o', default=None, help='PDF file to write')
+def tabulation_register_command(school_id, academic_year, student_class, section, output):
+    """Write a class's tabulation register (all students' marks, totals and percentages) to a PDF."""
+    start = time.perf_counter()
+    table = get_results_table(get_school_folder(school_id, academic_year))
+    if table is None:
+        raise click.ClickException(f"No results for {school_id} {academic_year}")
+    output = output or register_filename(school_id, academic_year, student_class, section)
+    students = len(table.select(student_class=student_class, section=section))
+    pages = -1  # The last chunk is the trailer
+    with open(output, 'wb') as f:
+        for chunk in tabulation_register_pdf(iter_register_rows(table, student_class, section),
+                                             get_school_name(school_id), academic_year, student_class, section,
+                                             SUBJECTS_MAPPING.get(student_class, table.subjects)):
+            f.write(chunk)
+            pages += 1
+    click.echo(f"Wrote {students} students on {pages} pages to {output} in {time.perf_counter() - start:.2f}s")
+
+@app.cli.command('import-schools')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--workers', type=int, default=None, help='Process pool size (default: IMPORT_WORKERS)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the full report as JSON')
+def import_schools_command(source, workers, as_json):
+    """Import <school_id>/<year>/<term>.xlsx workbooks from a directory or ZIP archive."""
+    report = import_schools(source, workers)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+    for file in report['files']:
+        status = f"{len(file['errors'])} error(s)" if file['errors'] else f"{file['students']} students"
+        click.echo(f"{file['file']}: {status} in {file['seconds']:.2f}s")
+        for error in file['errors'][:5]:
+            click.echo(f"    row {error['row'] or '-'}, {error['column'] or '-'}: {error['message']}")
+    for year in report['years']:
+        version = f"version {year['generation']}" if year['status'] == 'imported' else "not changed"
+        click.echo(f"{year['school_id']} {year['academic_year']}: {year['status']} ({version})")
+    for name in report['skipped']:
+        click.echo(f"skipped {name}")
+    click.echo(f"Imported {report['schools']} school(s) from {len(report['files'])} workbook(s) "
+               f"in {report['seconds']:.2f}s")
+
+@app.route('/delete_school/<school_id>')
+def delete_school(school_id):
+    try:
+        remove_school(school_id)
+        
+        # Delete school data folder
+        school_folder = os.path.join(DATA_DIR, school_id)
+        if os.path.exists(school_folder):
+            shutil.rmtree(school_folder)
+        
+        return redirect('/school_admin')
+    except Exception as e:
+        return f"Error deleting school: {str(e)}", 500
+
+@app.route('/admin/analytics/<school_id>/<academic_year>')
+def class_analytics(school_id, academic_year):
+    student_class = request.args.get('class')
+    top_n = request.args.get('top', ANALYTICS_TOP_N, type=int)
+    
+    analytics = load_analytics(get_school_folder(school_id, academic_year))
+    if analytics is None:
+        if request.args.get('format') == 'json':
+            return jsonify({'error': "Results not available for this school and year"}), 404
+        return "Results not available for this school and year", 404
+    
+    classes = [dict(summary, toppers=summary['toppers'][:top_n]) for summary in analytics['classes']
+               if not student_class or summary['class'] == student_class]
+    subjects = [stat for stat in analytics['subjects'] if not student_class or stat['class'] == student_class]
+    
+    if request.args.get('format') == 'json':
+        return jsonify({'school_id': school_id, 'academic_year': academic_year,
+                        'classes': classes, 'subjects': subjects})
+    return render_template('analytics.html',
+                           school_name=get_school_name(school_id),
+                           school_id=school_id,
+                           academic_year=academic_year,
+                           classes=classes,
+                           subjects=subjects)
+
+@app.route('/api/results', methods=['POST'])
+@throttled
+def batch_results():
+    """Results for many roll numbers (or a class/section) from one load of the results table"""
+    params = request.get_json(silent=True) if request.is_json else request.form
+    if not isinstance(params, dict):
+        return jsonify({'error': "Request body must be a JSON object"}), 400
+    school_id = params.get('school_id')
+    academic_year = params.get('academic_year')
+    roll_numbers = params.get('roll_numbers')
+    student_class = params.get('class')
+    section = params.get('section')
+    if not school_id or not academic_year or (roll_numbers is None and not student_class):
+        return jsonify({'error': "school_id, academic_year and roll_numbers or class are required"}), 400
+    if not all(isinstance(value, str) for value in (school_id, academic_year)) or not all(
+            value is None or isinstance(value, str) for value in (student_class, section)):
+        return jsonify({'error': "school_id, academic_year, class and section must be strings"}), 400
+    
+    if roll_numbers is not None:
+        if isinstance(roll_numbers, str):
+            roll_numbers = roll_numbers.replace(',', ' ').split()
+        elif not isinstance(roll_numbers, list) or not all(
+                isinstance(roll, (str, int)) and not isinstance(roll, bool) for roll in roll_numbers):
+            return jsonify({'error': "roll_numbers must be a list of roll numbers or a comma-separated string"}), 400
+        # Rolls are stored as strings; JSON clients may send numbers
+        roll_numbers = list(dict.fromkeys(str(roll).strip() for roll in roll_numbers))
+        if len(roll_numbers) > BATCH_MAX_ROLLS:
+            return jsonify({'error': f"At most {BATCH_MAX_ROLLS} roll numbers per request"}), 413
+    
+    table = get_results_table(get_school_folder(school_id, academic_year))
+    if table is None:
+        return jsonify({'error': "Results not available for this school and year"}), 404
+    
+    with span('result_lookup'):
+        records = table.select(roll_numbers, student_class, section)
+        not_found = [roll for roll in roll_numbers or () if roll not in table.records]
+    
+    if request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        # One result per line, built as it is sent, then a summary line
+        def generate():
+            for record in records:
+                yield json.dumps(table.result(record)) + '\n'
+            yield json.dumps({'count': len(records), 'not_found': not_found}) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    with span('result_lookup'):
+        results = [table.result(record) for record in records]
+    return jsonify({'school_id': school_id, 'academic_year': academic_year, 'count': len(results),
+                    'results': results, 'not_found': not_found})
+
+@app.route('/api/corrections', methods=['GET', 'POST'])
+def corrections():
+    """POST single-mark corrections; GET the audit log for a school/year"""
+    if request.method == 'GET':
+        school_id = request.args.get('school_id')
+        academic_year = request.args.get('academic_year')
+        if not school_id or not academic_year:
+            return jsonify({'error': "school_id and academic_year are required"}), 400
+        return jsonify({'corrections': list_corrections(school_id, academic_year, request.args.get('roll'),
+                                                        request.args.get('limit', 500, type=int))})
+    
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        return jsonify({'error': "Request body must be a JSON object"}), 400
+    school_id = params.get('school_id')
+    academic_year = params.get('academic_year')
+    changes = params.get('corrections')
+    if not school_id or not academic_year or not isinstance(changes, list) or not changes:
+        return jsonify({'error': "school_id, academic_year and a non-empty corrections list are required"}), 400
+    if not isinstance(school_id, str) or not isinstance(academic_year, str):
+        return jsonify({'error': "school_id and academic_year must be strings"}), 400
+    if get_school(school_id) is None:
+        return jsonify({'error': "Unknown school"}), 404
+    
+    try:
+        results = apply_corrections(school_id, academic_year, changes,
+                                    str(params.get('reason', '')), str(params.get('corrected_by', '')))
+    except CorrectionError as e:
+        return jsonify({'error': "No corrections were applied", 'problems': e.args[0]}), 400
+    return jsonify({'applied': len(changes), 'results': results})
+
+@app.route('/history/<school_id>/<roll_number>')
+@throttled
+def student_history(school_id, roll_number):
+    history = get_student_history(school_id, roll_number)
+    
+    if request.args.get('format') == 'json':
+        if not history:
+            return jsonify({'error': "No results found for this roll number"}), 404
+        return jsonify({'school_id': school_id, 'roll': roll_number, 'years': history})
+    
+    subjects = list(dict.fromkeys(subject for year in history for subject in year['subjects']))
+    return render_template('history.html',
+                           school_name=get_school_name(school_id),
+                           school_id=school_id,
+                           roll_number=roll_number,
+                           history=history,
+                           subjects=subjects), 200 if history else 404
+
+@app.cli.command('rebuild-history')
+@click.argument('school_ids', nargs=-1)
+def rebuild_history_command(school_ids):
+    """Backfill the cross-year student history from each year's materialized results."""
+    for school_id in school_ids or [school['id'] for school in list_schools()]:
+        school_dir = os.path.join(DATA_DIR, school_id)
+        years = sorted(entry.name for entry in os.scandir(school_dir) if entry.is_dir()) if os.path.isdir(school_dir) else []
+        for academic_year in years:
+            table = get_results_table(get_school_folder(school_id, academic_year))
+            results = {record.roll: table.result(record) for record in table.records.values()} if table else None
+            record_student_history(school_id, academic_year, results)
+            click.echo(f"{school_id} {academic_year}: {len(results or ())} students")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Admin Dashboard Route
+@app.route('/admin_dashboard')
+def admin_dashboard():
+    schools = list_schools()
+    stats = get_dashboard_stats()
+    school_names = {school['id']: school['name'] for school in schools}
+    
+    recent_schools = sorted(schools, key=lambda x: x.get('registered_date', ''), reverse=True)[:5]
+    
+    return render_template('admin_dashboard.html', 
+                                stats=stats, 
+                                school_names=school_names,
+                                recent_schools=recent_schools)
+
+@app.route('/admin_dashboard/stats.json')
+def admin_dashboard_stats():
+    return jsonify(get_dashboard_stats())
+
+if __name__ == '__main__':
+    print("🚀 Starting Multi-School Result Platform...")
+    print("🏫 Features: School Registration, Result Upload, Student Portal")
+    print("📊 Advanced: PDF Reports, Admin Dashboard, Multi-School Support")
+    app.run(debug=False)  # debug=False for production
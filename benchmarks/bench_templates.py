@@ -0,0 +1,58 @@
+"""Requests/sec for the template-heavy pages: /, /student_login and /student_result.
+
+Run from the repository root (or point --repo at another checkout to compare):
+
+    python benchmarks/bench_templates.py --requests 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--repo', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    help='checkout containing app.py (default: this repository)')
+parser.add_argument('--requests', type=int, default=1000, help='requests per route')
+parser.add_argument('--students', type=int, default=500, help='students in the synthetic school')
+parser.add_argument('--json', action='store_true', help='print results as JSON')
+args = parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(args.repo))
+os.chdir(tempfile.mkdtemp(prefix='bench_templates_'))
+# Every request comes from one client; measure the pages, not the rate limiter
+os.environ.setdefault('RATE_LIMIT_IP_PER_SECOND', '0')
+os.environ.setdefault('RATE_LIMIT_SCHOOL_PER_SECOND', '0')
+
+import app as portal  # noqa: E402
+from synthetic import create_school, roll_numbers  # noqa: E402
+
+client = portal.app.test_client()
+create_school(client, 'BENCH', args.students)
+rolls = roll_numbers(args.students)
+
+routes = {
+    '/': lambda i: client.get('/'),
+    '/student_login': lambda i: client.get('/student_login'),
+    '/student_result': lambda i: client.post('/student_result', data={
+        'school_id': 'BENCH', 'academic_year': '2024-25', 'roll_number': rolls[i % len(rolls)]},
+        follow_redirects=True),
+}
+
+results = {}
+for route, call in routes.items():
+    call(0)  # warm up
+    start = time.perf_counter()
+    for i in range(args.requests):
+        response = call(i)
+        assert response.status_code == 200, (route, response.status_code)
+    elapsed = time.perf_counter() - start
+    results[route] = round(args.requests / elapsed, 1)
+
+if args.json:
+    print(json.dumps(results, indent=2))
+else:
+    for route, rate in results.items():
+        print(f"{route:<16} {rate:>9.1f} req/s")
@@ -0,0 +1,91 @@
+"""Startup import time of app.py, measured with python -X importtime.
+
+Imports the app in a fresh interpreter (in a temporary directory, so a new
+registry is created), then serves the pages that should not need the heavy
+report dependencies and checks that pandas, numpy, openpyxl and fpdf were
+never imported. Exits non-zero if the median import time is over budget or
+a heavy module was loaded, so it can guard startup time in CI:
+
+    python benchmarks/import_time.py --runs 5 --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'fpdf')
+LIGHT_ROUTES = ('/', '/school_admin', '/student_login', '/admin_dashboard')
+
+PROBE = """
+import json, sys
+sys.path.insert(0, {repo!r})
+import app
+client = app.app.test_client()
+for route in {routes!r}:
+    assert client.get(route).status_code == 200, route
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+
+def measure(repo):
+    """Return (app import us, {direct import of app: cumulative us}, heavy modules loaded)"""
+    probe = PROBE.format(repo=os.path.abspath(repo), routes=LIGHT_ROUTES, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                               cwd=tempfile.mkdtemp(prefix='import_time_'), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == 'app':
+            app_us = int(cumulative)
+            break
+        # Nested imports are listed before their parent, indented two spaces
+        # per level; keep only the direct imports of the next top-level module
+        if not name.startswith('  '):
+            modules = {}
+        elif not name.startswith('     '):
+            modules[name.strip()] = int(cumulative)
+    return app_us, modules, json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repo', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='checkout containing app.py (default: this repository)')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to measure (median is reported)')
+    parser.add_argument('--budget-ms', type=float, default=800, help='fail if the median import takes longer')
+    parser.add_argument('--top', type=int, default=8, help='slowest top-level imports to list')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    runs = [measure(args.repo) for _ in range(args.runs)]
+    median_ms = statistics.median(app_us for app_us, _, _ in runs) / 1000
+    heavy_loaded = sorted(set().union(*(heavy for _, _, heavy in runs)))
+    slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+    report = {
+        'import_ms': round(median_ms, 1),
+        'runs_ms': [round(app_us / 1000, 1) for app_us, _, _ in runs],
+        'budget_ms': args.budget_ms,
+        'heavy_modules_loaded': heavy_loaded,
+        'slowest_imports_ms': {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import app: {report['import_ms']:.1f} ms median over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+        for name, ms in report['slowest_imports_ms'].items():
+            print(f"  {name:<32} {ms:>8.1f} ms")
+        if heavy_loaded:
+            print(f"heavy modules loaded by {', '.join(LIGHT_ROUTES)}: {', '.join(heavy_loaded)}")
+
+    if median_ms > args.budget_ms or heavy_loaded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Resident memory of one school's results: DataFrames vs result dicts vs the compact ResultsTable.
+
+Builds a synthetic school per size in a temporary directory and measures,
+with tracemalloc, what each in-memory shape keeps alive:
+
+  dataframes    both term sheets as pandas DataFrames (the per-row lookup baseline)
+  result_dicts  the nested dicts from results.json / calculate_student_result
+  compact       ResultsTable: __slots__ records plus int8 mark matrices
+
+    python benchmarks/memory_results.py --students 10000 50000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def retained(build):
+    """Bytes still allocated after build() returns, keeping its result alive"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    return kept, tracemalloc.get_traced_memory()[0] - before
+
+
+def measure(portal, students):
+    from synthetic import create_school
+
+    school_id = f"MEM{students}"
+    create_school(portal.app.test_client(), school_id, students)
+    folder = portal.get_school_folder(school_id, "2024-25")
+    results_path = os.path.join(folder, portal.RESULTS_FILE)
+    portal.results_cache.clear()
+    portal.term_cache.clear()
+    tracemalloc.start()
+
+    def load_payload():
+        with open(results_path) as f:
+            return json.load(f)
+
+    def build_table():
+        payload = load_payload()
+        return portal.ResultsTable(payload['students'], payload['subjects'], None)
+
+    sizes = {}
+    frames, sizes['dataframes'] = retained(lambda: [portal.read_term_store(portal.get_term_store_path(folder, term))
+                                                    for term in portal.TERMS])
+    del frames
+    payload, sizes['result_dicts'] = retained(load_payload)
+    del payload
+    table, sizes['compact'] = retained(build_table)
+    sizes['compact_estimate'] = table.nbytes
+    tracemalloc.stop()
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='+', default=[10000], help='school sizes to measure')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='memory_results_'))
+    os.environ.setdefault('SLOW_REQUEST_MS', '0')
+    import warnings
+    warnings.simplefilter('ignore')
+    import app as portal
+
+    report = {}
+    for students in args.students:
+        sizes = measure(portal, students)
+        per_10k = {name: round(size * 10000 / students / 2 ** 20, 2) for name, size in sizes.items()}
+        report[students] = {
+            'bytes': sizes,
+            'mib_per_10k_students': per_10k,
+            'saved_mib_per_10k_vs_dataframes': round(per_10k['dataframes'] - per_10k['compact'], 2),
+            'saved_mib_per_10k_vs_result_dicts': round(per_10k['result_dicts'] - per_10k['compact'], 2),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for students, row in report.items():
+        per_10k = row['mib_per_10k_students']
+        print(f"{students} students, MiB per 10k students:")
+        for name in ('dataframes', 'result_dicts', 'compact', 'compact_estimate'):
+            print(f"  {name:<18} {per_10k[name]:>8.2f}")
+        print(f"  saved vs DataFrames {row['saved_mib_per_10k_vs_dataframes']:.2f} MiB, "
+              f"vs result dicts {row['saved_mib_per_10k_vs_result_dicts']:.2f} MiB per 10k students")
+
+
+if __name__ == '__main__':
+    main()
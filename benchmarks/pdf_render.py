@@ -0,0 +1,63 @@
+"""Report cards per second: the precomputed-layout renderer vs fpdf's create_pdf_report.
+
+Builds a synthetic school in a temporary directory and renders the same
+students' cards with both renderers (single process, so the numbers are
+per core):
+
+    python benchmarks/pdf_render.py --students 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--repo', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    help='checkout containing app.py (default: this repository)')
+parser.add_argument('--students', type=int, default=1000, help='report cards rendered per renderer')
+parser.add_argument('--json', action='store_true', help='print results as JSON')
+args = parser.parse_args()
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(args.repo))
+os.chdir(tempfile.mkdtemp(prefix='pdf_render_'))
+
+import warnings  # noqa: E402
+warnings.simplefilter('ignore')
+import app as portal  # noqa: E402
+from synthetic import create_school  # noqa: E402
+
+create_school(portal.app.test_client(), 'BENCH', args.students)
+students = portal.select_students(portal.get_school_folder('BENCH', '2024-25'))
+school_name = portal.get_school_name('BENCH')
+
+renderers = {
+    'create_pdf_report': lambda student: bytes(portal.create_pdf_report(student, school_name, '2024-25').output()),
+    'render_report_card': lambda student: portal.render_report_card(student, school_name, '2024-25'),
+}
+
+results = {}
+for name, render in renderers.items():
+    render(students[0])  # warm up: fonts, layouts
+    start = time.perf_counter()
+    size = 0
+    for student in students:
+        size += len(render(student))
+    elapsed = time.perf_counter() - start
+    results[name] = {'pages_per_second': round(len(students) / elapsed, 1),
+                     'ms_per_page': round(elapsed * 1000 / len(students), 3),
+                     'mean_bytes': size // len(students)}
+results['speedup'] = round(results['render_report_card']['pages_per_second'] /
+                           results['create_pdf_report']['pages_per_second'], 1)
+
+if args.json:
+    print(json.dumps(results, indent=2))
+else:
+    for name, row in results.items():
+        if name == 'speedup':
+            continue
+        print(f"{name:<30} {row['pages_per_second']:>9.1f} pages/s  {row['ms_per_page']:>7.3f} ms/page"
+              f"  {row['mean_bytes']:>6} bytes/card")
+    print(f"speedup: {results['speedup']}x")
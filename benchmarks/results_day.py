@@ -0,0 +1,300 @@
+"""Results-day load test: latency percentiles, throughput and peak RSS per school size.
+
+Builds a synthetic school for each size, then drives /upload_results,
+/student_result, /download_result_pdf and /admin_dashboard either through the
+Flask test client (default) or against a local gunicorn. A PDF that is not
+cached yet is rendered as a job (202); its latency runs until the PDF has been
+downloaded, and the number of such requests is reported as "queued":
+
+    python benchmarks/results_day.py --students 100 1000 10000 --output run.json
+    python benchmarks/results_day.py --students 10000 --gunicorn --workers 4 --concurrency 32
+
+Compare two runs by diffing their JSON output.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+ACADEMIC_YEAR = "2024-25"
+SCHOOL_ID = "BENCH"
+
+
+def summarize(latencies, elapsed):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2),
+        'max_ms': round(float(latencies_ms.max()), 2),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def peak_rss_kb(pids=None):
+    """Peak resident set size in KB, of this process or summed over the given pids"""
+    if pids is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in pids:
+        try:
+            for task in os.listdir(f"/proc/{child}/task"):
+                with open(f"/proc/{child}/task/{task}/children") as f:
+                    pids.extend(int(p) for p in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def scenarios(rolls):
+    """(route, method, form data factory) for every scenario driven per size"""
+    def result_form(i):
+        return {'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR, 'roll_number': rolls[i % len(rolls)]}
+    return [
+        ('/student_result', 'POST', result_form),
+        ('/download_result_pdf', 'POST', result_form),
+        ('/admin_dashboard', 'GET', lambda i: None),
+    ]
+
+
+def wait_for_job(get, job):
+    """Poll a 202 job's status_url until it finishes, then download it; get(url) returns (status, body)"""
+    while True:
+        code, body = get(job['status_url'])
+        job = json.loads(body)
+        if job['status'] == 'done':
+            break
+        if job['status'] == 'failed':
+            raise RuntimeError(f"job {job['job_id']} failed: {job.get('error')}")
+        time.sleep(0.02)
+    code, body = get(job['download_url'])
+    assert code == 200, (job['download_url'], code)
+
+
+def run_test_client(portal, rolls, requests):
+    from synthetic import make_term_workbook
+    client = portal.app.test_client()
+    report = {}
+
+    # Re-upload the 2nd term so the upload path itself is measured
+    workbook = make_term_workbook(len(rolls), term=2, seed=1)
+    start = time.perf_counter()
+    response = client.post('/upload_results', content_type='multipart/form-data', data={
+        'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR, 'term': '2nd_term',
+        'excel_file': (workbook, 'term2.xlsx')})
+    assert b'uploaded successfully' in response.data
+    elapsed = time.perf_counter() - start
+    report['/upload_results'] = summarize([elapsed], elapsed)
+
+    def get(url):
+        response = client.get(url)
+        return response.status_code, response.data
+
+    for route, method, form in scenarios(rolls):
+        latencies = []
+        queued = 0
+        start = time.perf_counter()
+        for i in range(requests):
+            began = time.perf_counter()
+            response = client.open(route, method=method, data=form(i), follow_redirects=True,
+                                   headers={'Accept': 'application/json'})
+            assert response.status_code in (200, 202), (route, response.status_code)
+            if response.status_code == 202:
+                # /download_result_pdf answers 202 with a job when the PDF is not cached yet;
+                # time it until the PDF has been downloaded
+                queued += 1
+                wait_for_job(get, response.get_json())
+            latencies.append(time.perf_counter() - began)
+        report[route] = summarize(latencies, time.perf_counter() - start)
+        report[route]['queued'] = queued
+    report['peak_rss_kb'] = peak_rss_kb()
+    return report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def multipart_body(fields, file_field, filename, content):
+    boundary = f"----results-day-{time.time_ns()}"
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                 f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def run_gunicorn(rolls, requests, workers, concurrency, extra_args):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO, 'gunicorn.conf.py'), '--pythonpath', REPO,
+               '--bind', f"127.0.0.1:{port}", '--workers', str(workers), '--log-level', 'warning'] + extra_args + ['app:app']
+    server = subprocess.Popen(command, cwd=os.getcwd())
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                urllib.request.urlopen(base + '/', timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("gunicorn did not start")
+
+        from synthetic import make_term_workbook
+        body, content_type = multipart_body(
+            {'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR, 'term': '2nd_term'},
+            'excel_file', 'term2.xlsx', make_term_workbook(len(rolls), term=2, seed=1).getvalue())
+        start = time.perf_counter()
+        with urllib.request.urlopen(urllib.request.Request(
+                base + '/upload_results', data=body, headers={'Content-Type': content_type}), timeout=600) as r:
+            assert b'uploaded successfully' in r.read()
+        elapsed = time.perf_counter() - start
+        report = {'/upload_results': summarize([elapsed], elapsed)}
+        lock = threading.Lock()
+        accept = {'Accept': 'application/json'}
+        for route, method, form in scenarios(rolls):
+            latencies = []
+            errors = []
+            shed = []
+            queued = []
+
+            def get(url):
+                with urllib.request.urlopen(urllib.request.Request(base + url, headers=accept), timeout=60) as r:
+                    return r.status, r.read()
+
+            def call(i):
+                data = form(i)
+                body = urllib.parse.urlencode(data).encode() if data and method == 'POST' else None
+                began = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(base + route, data=body, headers=accept),
+                                                timeout=60) as r:
+                        status, content = r.status, r.read()
+                    if status == 202:
+                        # Not cached yet: time the job until the PDF has been downloaded
+                        with lock:
+                            queued.append(i)
+                        wait_for_job(get, json.loads(content))
+                except (OSError, RuntimeError) as e:
+                    with lock:
+                        # 503s are requests the app turned away with its queue page
+                        (shed if getattr(e, 'code', None) == 503 else errors).append(str(e))
+                    return
+                with lock:
+                    latencies.append(time.perf_counter() - began)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(call, range(requests)))
+            report[route] = summarize(latencies or [0], time.perf_counter() - start)
+            report[route]['errors'] = len(errors)
+            report[route]['shed'] = len(shed)
+            report[route]['queued'] = len(queued)
+        report['peak_rss_kb'] = peak_rss_kb(process_tree(server.pid))
+        return report
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='school sizes to test (up to 50000)')
+    parser.add_argument('--requests', type=int, default=500, help='requests per route and size')
+    parser.add_argument('--gunicorn', action='store_true', help='drive a local gunicorn instead of the test client')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients against gunicorn')
+    parser.add_argument('--gunicorn-arg', action='append', default=[], help='extra argument passed to gunicorn')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    run = {
+        'mode': 'gunicorn' if args.gunicorn else 'test_client',
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'requests_per_route': args.requests,
+        'sizes': {},
+    }
+    if args.gunicorn:
+        run.update(workers=args.workers, concurrency=args.concurrency)
+
+    # The load comes from one client address, so only the active request cap applies
+    os.environ.setdefault('RATE_LIMIT_IP_PER_SECOND', '0')
+    os.environ.setdefault('RATE_LIMIT_SCHOOL_PER_SECOND', '0')
+    for students in args.students:
+        # Every size gets a fresh working directory (registry, school_data) and process
+        workdir = tempfile.mkdtemp(prefix=f"results_day_{students}_")
+        size_args = [sys.executable, os.path.abspath(__file__), '--_size', str(students), '--_args', json.dumps(vars(args))]
+        output = subprocess.run(size_args, cwd=workdir, check=True, capture_output=True, text=True).stdout
+        run['sizes'][str(students)] = json.loads(output.splitlines()[-1])
+        print(f"{students:>6} students: " + ", ".join(
+            f"{route} p95={stats['p95_ms']}ms" for route, stats in run['sizes'][str(students)].items()
+            if isinstance(stats, dict)), file=sys.stderr)
+
+    report = json.dumps(run, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    print(report)
+
+
+def measure_size(students, args):
+    import app as portal
+    from synthetic import create_school, roll_numbers
+
+    start = time.perf_counter()
+    create_school(portal.app.test_client(), SCHOOL_ID, students)
+    setup_seconds = time.perf_counter() - start
+    rolls = roll_numbers(students)
+
+    if args['gunicorn']:
+        report = run_gunicorn(rolls, args['requests'], args['workers'], args['concurrency'], args['gunicorn_arg'])
+    else:
+        report = run_test_client(portal, rolls, args['requests'])
+    report['setup_seconds'] = round(setup_seconds, 2)
+    return report
+
+
+if __name__ == '__main__':
+    if '--_size' in sys.argv:
+        size = int(sys.argv[sys.argv.index('--_size') + 1])
+        size_args = json.loads(sys.argv[sys.argv.index('--_args') + 1])
+        import warnings
+        warnings.simplefilter('ignore')
+        print(json.dumps(measure_size(size, size_args)))
+    else:
+        main()
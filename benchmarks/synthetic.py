@@ -0,0 +1,47 @@
+"""Synthetic schools and term workbooks in the SUBJECTS_MAPPING column layout."""
+import io
+import random
+
+import openpyxl
+
+from app import SUBJECTS_MAPPING, METADATA_COLUMNS
+
+ALL_SUBJECTS = list(dict.fromkeys(subject for subjects in SUBJECTS_MAPPING.values() for subject in subjects))
+CLASSES = list(SUBJECTS_MAPPING)
+SECTIONS = ["A", "B", "C"]
+
+
+def make_term_workbook(students, term=1, seed=0):
+    """Return an in-memory .xlsx with one row per student for the given term"""
+    rnd = random.Random(seed * 10 + term)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(METADATA_COLUMNS + ALL_SUBJECTS)
+    for i in range(students):
+        student_class = CLASSES[i % len(CLASSES)]
+        row = [1000 + i, f"Student {i}", student_class, SECTIONS[(i // len(CLASSES)) % len(SECTIONS)]]
+        class_subjects = set(SUBJECTS_MAPPING[student_class])
+        row += [rnd.randint(4, 20) if subject in class_subjects else None for subject in ALL_SUBJECTS]
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def create_school(client, school_id, students, academic_year="2024-25", seed=0):
+    """Register a school and upload both terms through the Flask test client"""
+    client.post('/register_school', data={'school_name': f"School {school_id}", 'school_id': school_id})
+    for term in (1, 2):
+        response = client.post('/upload_results', content_type='multipart/form-data', data={
+            'school_id': school_id,
+            'academic_year': academic_year,
+            'term': f"{'1st' if term == 1 else '2nd'}_term",
+            'excel_file': (make_term_workbook(students, term, seed), f"term{term}.xlsx"),
+        })
+        if b'uploaded successfully' not in response.data:
+            raise RuntimeError(f"Upload failed for {school_id} term {term}")
+
+
+def roll_numbers(students):
+    return [str(1000 + i) for i in range(students)]
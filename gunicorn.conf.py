@@ -0,0 +1,39 @@
+"""Gunicorn settings for the result portal.
+
+The app is imported once in the master (preload_app) and warmed up there
+before workers are forked, so every worker starts with pandas, openpyxl and
+fpdf imported and the current year's results tables already in memory,
+shared copy-on-write. Use WARMUP_SCHOOLS / WARMUP_YEARS to limit what is
+loaded and PRELOAD_RESULTS=0 to skip the warm-up entirely.
+
+Workers are threaded so that, when MAX_ACTIVE_REQUESTS lookups are already
+running, further requests are still accepted and answered with the app's
+queue page instead of waiting in the socket backlog until the proxy gives up.
+
+Metrics run in multiprocess mode: each worker flushes its numbers to
+school_data/.metrics, and /metrics answers with the sum over all workers.
+"""
+import gc
+import os
+
+preload_app = True
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+
+def when_ready(server):
+    from app import METRICS_DIR, metrics
+
+    metrics.enable_multiprocess(METRICS_DIR)
+
+    if os.environ.get("PRELOAD_RESULTS", "1") == "0":
+        return
+
+    from app import warm_up
+
+    summary = warm_up()
+    server.log.info("Warm-up loaded %d results tables (%d students) in %.2fs",
+                    summary['tables'], summary['students'], summary['seconds'])
+    # Keep the warmed objects out of the collector so workers do not
+    # touch (and copy) their pages on every GC pass
+    gc.freeze()
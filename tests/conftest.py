@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, 'benchmarks'))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The app module, imported in a scratch directory since it creates school_data and the registry there"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('portal'))
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,83 @@
+"""Mark corrections: incremental recompute, audit log and all-or-nothing validation"""
+import json
+import os
+
+import pytest
+
+SCHOOL_ID = "CORR"
+ACADEMIC_YEAR = "2024-25"
+
+
+@pytest.fixture(scope='module')
+def school(app):
+    from synthetic import CLASSES, create_school
+    client = app.app.test_client()
+    create_school(client, SCHOOL_ID, 120)
+    return client, app.get_school_folder(SCHOOL_ID, ACADEMIC_YEAR), CLASSES
+
+
+def read_outputs(app, school_folder):
+    outputs = {}
+    for name in (app.RESULTS_FILE, app.ANALYTICS_FILE):
+        with open(os.path.join(school_folder, name)) as f:
+            outputs[name] = json.load(f)
+    return outputs
+
+
+def post_corrections(client, corrections):
+    return client.post('/api/corrections', json={'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR,
+                                                 'reason': "test", 'corrected_by': "pytest",
+                                                 'corrections': corrections})
+
+
+def test_incremental_correction_matches_full_materialize(app, school):
+    client, school_folder, classes = school
+    first, second = app.SUBJECTS_MAPPING[classes[0]], app.SUBJECTS_MAPPING[classes[1]]
+    response = post_corrections(client, [
+        {'roll': "1000", 'subject': first[0], 'term': "1st_term", 'mark': 3.5},
+        {'roll': 1000, 'subject': first[1], 'term': "2nd_term", 'mark': None},
+        {'roll': "1001", 'subject': second[0], 'term': "2nd_term", 'mark': 20},
+    ])
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['results']['1000']['subjects'][first[0]]['term1'] == 3.5
+
+    incremental = read_outputs(app, school_folder)
+    app.materialize_results(school_folder)
+    assert read_outputs(app, school_folder) == incremental
+
+    audit = client.get(f'/api/corrections?school_id={SCHOOL_ID}&academic_year={ACADEMIC_YEAR}&roll=1000').get_json()
+    entries = {(entry['subject'], entry['term']): entry for entry in audit['corrections']}
+    assert entries[(first[0], "1st_term")]['new_mark'] == 3.5
+    assert entries[(first[1], "2nd_term")]['new_mark'] is None
+    assert entries[(first[1], "2nd_term")]['old_mark'] is not None
+    assert entries[(first[0], "1st_term")]['corrected_by'] == "pytest"
+
+
+def test_invalid_corrections_change_nothing(app, school):
+    client, school_folder, classes = school
+    subject = app.SUBJECTS_MAPPING[classes[2]][0]
+    before = read_outputs(app, school_folder)
+    audit_before = app.list_corrections(SCHOOL_ID, ACADEMIC_YEAR)
+
+    response = post_corrections(client, [
+        {'roll': "1002", 'subject': subject, 'term': "1st_term", 'mark': 1},
+        "junk",
+        {'roll': "1002", 'subject': [subject], 'term': "1st_term", 'mark': 1},
+        {'roll': ["1002"], 'subject': subject, 'term': "1st_term", 'mark': 1},
+        {'roll': "1002", 'subject': subject, 'term': "1st_term"},
+        {'roll': "1002", 'subject': subject, 'term': "1st_term", 'mark': 21},
+        {'roll': "1002", 'subject': subject, 'term': ["1st_term"], 'mark': 1},
+        {'roll': "9999", 'subject': subject, 'term': "1st_term", 'mark': 1},
+    ])
+    assert response.status_code == 400
+    assert [problem['index'] for problem in response.get_json()['problems']] == [1, 2, 3, 4, 5, 6, 7]
+    assert read_outputs(app, school_folder) == before
+    assert app.list_corrections(SCHOOL_ID, ACADEMIC_YEAR) == audit_before
+
+
+@pytest.mark.parametrize('body', [[{'roll': "1000"}], "corrections", 5])
+def test_corrections_body_must_be_an_object(school, body):
+    client, _, _ = school
+    response = client.post('/api/corrections', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error']
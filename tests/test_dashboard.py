@@ -0,0 +1,11 @@
+"""Dashboard totals count each school's latest academic year once"""
+
+
+def test_backfilled_year_does_not_replace_latest_student_count(app):
+    from synthetic import create_school
+    client = app.app.test_client()
+    create_school(client, "DASH", 60, academic_year="2024-25")
+    before = app.get_dashboard_stats()['total_students']
+    create_school(client, "DASH", 30, academic_year="2023-24")
+    assert app.get_school("DASH")['student_count'] == 60
+    assert app.get_dashboard_stats()['total_students'] == before
@@ -0,0 +1,31 @@
+"""/metrics in multiprocess mode sums every worker's flushed numbers"""
+import json
+
+
+def test_render_sums_other_workers(app, tmp_path):
+    directory = str(tmp_path / "metrics")
+    metrics = app.Metrics()
+    metrics.enable_multiprocess(directory)
+    metrics.inc('portal_requests_total', (('endpoint', "index"),), help_text="Requests")
+    metrics.observe('portal_stage_duration_seconds', 0.003, (('stage', "registry"),), help_text="Stages")
+
+    other = app.Metrics()
+    other.inc('portal_requests_total', (('endpoint', "index"),), value=2, help_text="Requests")
+    other.inc('portal_requests_total', (('endpoint', "result_page"),), help_text="Requests")
+    other.observe('portal_stage_duration_seconds', 0.2, (('stage', "registry"),), help_text="Stages")
+    # An exited worker's last flush still counts
+    with open(tmp_path / "metrics" / "99999.json", 'w') as f:
+        json.dump(other.snapshot(), f)
+    (tmp_path / "metrics" / "99998.json.tmp").write_text("{")
+
+    lines = metrics.render().splitlines()
+    assert 'portal_requests_total{endpoint="index"} 3' in lines
+    assert 'portal_requests_total{endpoint="result_page"} 1' in lines
+    assert 'portal_stage_duration_seconds_count{stage="registry"} 2' in lines
+    assert 'portal_stage_duration_seconds_bucket{stage="registry",le="0.005"} 1' in lines
+    assert 'portal_stage_duration_seconds_bucket{stage="registry",le="0.25"} 2' in lines
+    assert lines.count("# TYPE portal_requests_total counter") == 1
+
+    metrics.flush()
+    with open(tmp_path / "metrics" / f"{metrics.pid}.json") as f:
+        assert json.load(f) == json.loads(json.dumps(metrics.snapshot()))
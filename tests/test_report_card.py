@@ -0,0 +1,70 @@
+"""The precomputed-layout report card must match fpdf's create_pdf_report page for page"""
+import re
+import zlib
+
+import pytest
+
+# create_pdf_report is the original fpdf code, which uses the deprecated ln= API and the Arial alias
+pytestmark = [pytest.mark.filterwarnings('ignore::DeprecationWarning'),
+              pytest.mark.filterwarnings('ignore:Substituting font:UserWarning')]
+
+SCHOOL_ID = "CARDS"
+ACADEMIC_YEAR = "2024-25"
+TOKEN = re.compile(rb'/(\w+)\s+([\d.]+)\s+Tf|([-\d.]+)\s+([-\d.]+)\s+Td|\(((?:\\.|[^\\)])*)\)\s*Tj'
+                   rb'|([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+re', re.S)
+TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}')
+
+
+def page_layout(pdf):
+    """Per page: sorted (font, size, x, y, text) runs and (x, y, w, h) rectangles"""
+    fonts = {}
+    for name, number in re.findall(rb'/(F\d+)\s+(\d+)\s+0\s+R', pdf):
+        base = re.search(rb'\n' + number + rb' 0 obj\s*<<.*?/BaseFont\s*/([\w-]+)', pdf, re.S)
+        fonts[name] = base.group(1).decode()
+    pages = []
+    for match in re.finditer(rb'\bobj\s*<<((?:(?!\bobj\b).)*?)>>\s*stream\r?\n', pdf, re.S):
+        info = match.group(1)
+        length = int(re.search(rb'/Length\s+(\d+)', info).group(1))
+        data = pdf[match.end():match.end() + length]
+        if b'FlateDecode' in info:
+            data = zlib.decompress(data)
+        font = size = x = y = None
+        texts, rects = [], []
+        for token in TOKEN.finditer(data):
+            groups = token.groups()
+            if groups[0]:
+                font, size = fonts[groups[0]], float(groups[1])
+            elif groups[2]:
+                x, y = float(groups[2]), float(groups[3])
+            elif groups[4] is not None:
+                text = re.sub(rb'\\(.)', rb'\1', groups[4]).decode('latin-1')
+                texts.append((font, size, round(x, 1), round(y, 1), TIMESTAMP.sub('<time>', text)))
+            else:
+                rx, ry, w, h = (float(value) for value in groups[5:9])
+                rects.append((round(rx, 1), round(min(ry, ry + h), 1), round(w, 1), round(abs(h), 1)))
+        pages.append((sorted(texts), sorted(rects)))
+    return pages
+
+
+@pytest.fixture(scope='module')
+def students(app):
+    from synthetic import CLASSES, create_school
+    create_school(app.app.test_client(), SCHOOL_ID, 2 * len(CLASSES))
+    students = app.select_students(app.get_school_folder(SCHOOL_ID, ACADEMIC_YEAR))
+    # One student with no marks at all: no subject rows and 0 totals
+    blank = dict(students[0], subjects={}, total1=0, total2=0, percent1=0, percent2=0, combined_percent=0)
+    # Enough subjects to break onto a second page, and a name that needs escaping
+    subjects = {f"Subject {i}": {'term1': 12.5, 'term2': 20.0, 'total': 32.5} for i in range(20)}
+    long_card = dict(students[1], name="D'Souza (Jr.) \\ A", subjects=subjects, total1=250.0, total2=400.0)
+    return students + [blank, long_card]
+
+
+def test_report_card_matches_fpdf_reference(app, students):
+    school_name = app.get_school_name(SCHOOL_ID)
+    for student in students:
+        expected = page_layout(bytes(app.create_pdf_report(student, school_name, ACADEMIC_YEAR).output()))
+        actual = page_layout(app.render_report_card(student, school_name, ACADEMIC_YEAR))
+        assert len(actual) == len(expected), student['roll']
+        for page, (actual_page, expected_page) in enumerate(zip(actual, expected)):
+            assert actual_page[0] == expected_page[0], (student['roll'], page)
+            assert actual_page[1] == expected_page[1], (student['roll'], page)
@@ -0,0 +1,82 @@
+"""The vectorized results must match calculate_student_result, the original per-student logic"""
+import json
+import os
+import random
+
+import pandas as pd
+import pytest
+
+METADATA_COLUMNS = ['Roll #', 'Student Name', 'Class', 'Sec']
+SUBJECTS = ["Math", "English", "Hindi", "EVS", "GK", "Computer", "Science", "Sanskrit", "SST",
+            "Bio", "Physics", "Chemistry", "Drawing"]
+# Mapped classes, a numeric class, and classes with no mapping (all columns count as subjects)
+CLASSES = ["Nursery", "I", "V", "IX", "XI", "XII", 10, "Weird", None]
+MARKS = [0, 7, 15, 20, 12.5, 0.1, 19.99, None, "AB", "15", -3]
+
+
+def term_sheet(seed, students):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(students):
+        # Rolls are drawn with replacement, so some appear twice in a sheet
+        row = {'Roll #': 100 + rnd.randint(0, students), 'Student Name': f"Student {i}",
+               'Class': rnd.choice(CLASSES), 'Sec': "AB"[i % 2]}
+        row.update({subject: rnd.choice(MARKS) for subject in SUBJECTS})
+        rows.append(row)
+    return pd.DataFrame(rows, columns=METADATA_COLUMNS + SUBJECTS)
+
+
+def reference_result(app, df1, df2, roll_number):
+    """The lookup student_result did before results were materialized"""
+    student1 = df1[df1['Roll #'] == roll_number]
+    student2 = df2[df2['Roll #'] == roll_number]
+    if student1.empty and student2.empty:
+        return None
+    student_row = student1 if not student1.empty else student2
+    student_class = str(student_row['Class'].iloc[0])
+    if student_class in app.SUBJECTS_MAPPING:
+        subjects_list = app.SUBJECTS_MAPPING[student_class]
+    else:
+        subjects_list = [col for col in df1.columns if col not in METADATA_COLUMNS]
+    result = app.calculate_student_result(student1, student2, subjects_list)
+    result.update({'name': student_row['Student Name'].iloc[0], 'roll': roll_number, 'class': student_class})
+    return result
+
+
+def comparable(result):
+    if result is None:
+        return None
+    # Section, rank and class size are additions of the materialized table
+    result = {key: value for key, value in result.items() if key not in ('section', 'rank', 'class_size')}
+    return json.dumps(result, sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_materialized_results_match_reference(app, tmp_path, seed):
+    school_folder = str(tmp_path)
+    term1, term2 = term_sheet(seed, 80), term_sheet(seed + 100, 80)
+    if seed == 1:
+        term1 = term1.drop(columns=['Hindi'])
+    term1.to_excel(os.path.join(school_folder, '1st_term.xlsx'), index=False)
+    term2.to_excel(os.path.join(school_folder, '2nd_term.xlsx'), index=False)
+
+    df1 = pd.read_excel(os.path.join(school_folder, '1st_term.xlsx'))
+    df2 = pd.read_excel(os.path.join(school_folder, '2nd_term.xlsx'))
+    df1['Roll #'] = df1['Roll #'].astype(str)
+    df2['Roll #'] = df2['Roll #'].astype(str)
+    rolls = sorted(set(df1['Roll #']) | set(df2['Roll #']))
+
+    results = app.compute_all_results(app.get_term_index(school_folder, '1st_term'),
+                                      app.get_term_index(school_folder, '2nd_term'))
+    assert sorted(results) == rolls
+    app.materialize_results(school_folder)
+    table = app._read_results_table(school_folder)
+
+    for roll in rolls + ['missing']:
+        expected = reference_result(app, df1, df2, roll)
+        assert comparable(results.get(roll)) == comparable(expected), roll
+        assert comparable(table.get(roll)) == comparable(expected), roll
+        if expected is not None:
+            # A term total with no real marks stays the int 0, as in the per-student loop
+            for key in ('total1', 'total2', 'percent1', 'percent2', 'combined_percent'):
+                assert type(table.get(roll)[key]) is type(expected[key]), (roll, key)
@@ -0,0 +1,39 @@
+"""Rate limits: a form lookup and the result page it redirects to cost one token together"""
+import pytest
+
+SCHOOL_ID = "THROTTLE"
+ACADEMIC_YEAR = "2024-25"
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    from synthetic import create_school
+    client = app.app.test_client()
+    create_school(client, SCHOOL_ID, 30)
+    return client
+
+
+def lookup(client, roll):
+    return client.post('/student_result', follow_redirects=True, data={
+        'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR, 'roll_number': roll})
+
+
+def test_lookup_redirect_is_throttled_once(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'ip_limiter', app.RateLimiter(0.001, 3))
+    assert [lookup(client, roll).status_code for roll in ("1000", "1001", "1002")] == [200, 200, 200]
+    assert lookup(client, "1003").status_code == 429
+
+
+def test_result_page_without_a_lookup_pass_is_throttled(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'ip_limiter', app.RateLimiter(0.001, 1))
+    client = app.app.test_client()
+    path = f'/result/{SCHOOL_ID}/{ACADEMIC_YEAR}/1000'
+    assert client.get(path).status_code == 200
+    assert client.get(path).status_code == 429
+    # A pass is only good for the result it was issued for
+    token = app.lookup_pass_serializer.dumps({'school_id': SCHOOL_ID, 'academic_year': ACADEMIC_YEAR,
+                                               'roll_number': "1001"})
+    client.set_cookie(app.LOOKUP_PASS_COOKIE, token, path=path)
+    assert client.get(path).status_code == 429
+    client.set_cookie(app.LOOKUP_PASS_COOKIE, "forged", path=path)
+    assert client.get(path).status_code == 429